@@ -1,17 +1,29 @@
-import os, re, wave, socket, tempfile, traceback
+import os, sys, socket, tempfile, importlib.util
 from datetime import datetime
 import streamlit as st
-import numpy as np
-import sounddevice as sd
-import speech_recognition as sr
-from sklearn.feature_extraction.text import TfidfVectorizer
-
-# Optional dependency for PDF
-try:
-    from fpdf import FPDF
-    HAS_FPDF = True
-except Exception:
-    HAS_FPDF = False
+
+# Shared backend modules live in milestone_3/src
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "milestone_3", "src"))
+if SRC_DIR not in sys.path: sys.path.insert(0, SRC_DIR)
+from audio_capture import CaptureEngine, TranscriptionWorker, to_pcm16
+from textrank_summarizer import TextRankSummarizer
+from artifact_cache import get_cache
+from session_store import SessionStore
+from search_index import SearchIndex
+from tracing import collect, span, write_jsonl, read_jsonl, summarize_spans
+from job_queue import get_job_queue, QueueFull, DONE, FAILED
+from chunked_stt import ENGINES, get_engine, transcribe_long
+from exporter import FORMATS, content_key, get_export_engine
+from outbox import get_outbox, parse_recipients
+from ingest import MIME_TYPES, mime_type, session_upload
+from lazy_imports import lazy_import, prewarm
+from transcript_view import draw_transcript, session_feed, transcript_view
+
+# Heavy libraries load on first use (and are prewarmed after the first paint)
+sr = lazy_import("speech_recognition")
+
+# Optional dependency for PDF (only looked up here; exporter imports it when a PDF is rendered)
+HAS_FPDF = importlib.util.find_spec("fpdf") is not None
 
 # -------------------- PAGE CONFIG --------------------
 st.set_page_config(page_title="🎙️ SPEACH TO TEXT CONVERTION FROM LIVE RECORDING AND FROM FILES", page_icon="🎤", layout="wide")
@@ -94,6 +106,16 @@ if "audio_path" not in st.session_state: st.session_state.audio_path = None
 if "transcription" not in st.session_state: st.session_state.transcription = ""
 if "summary" not in st.session_state: st.session_state.summary = ""
 if "meta" not in st.session_state: st.session_state.meta = {}
+if "capture" not in st.session_state: st.session_state.capture = None
+if "session_id" not in st.session_state: st.session_state.session_id = None
+if "segments" not in st.session_state: st.session_state.segments = []
+if "export_key" not in st.session_state: st.session_state.export_key = None
+if "subtitle_key" not in st.session_state: st.session_state.subtitle_key = None
+if "job_id" not in st.session_state:
+    # Job id is mirrored in the URL so a browser refresh reattaches to the running job
+    job = get_job_queue().get(st.query_params.get("job", ""))
+    st.session_state.job_id = job.id if job else None
+    if job: st.session_state.audio_path = job.args[0]  # process_job(job, path, details, summarizer, engine)
 if "email_cfg" not in st.session_state:
     st.session_state.email_cfg = {
         "smtp_host": "smtp.gmail.com",
@@ -104,95 +126,140 @@ if "email_cfg" not in st.session_state:
         "subject": ""
     }
 
-recognizer = sr.Recognizer()
-
 # -------------------- HELPERS --------------------
-def summarize_tfidf(text, num_sentences=3):
-    sentences = re.split(r'(?<=[.!?]) +', text.strip())
-    sentences = [s.strip() for s in sentences if s.strip()]
-    if len(sentences) <= num_sentences: return text
-    vec = TfidfVectorizer(stop_words="english")
-    X = vec.fit_transform(sentences)
-    scores = np.asarray(X.sum(axis=1)).ravel()
-    idx = np.argsort(scores)[::-1][:num_sentences]
-    return " ".join([sentences[i] for i in sorted(idx)])
-
-def transcribe_google(path):
-    with sr.AudioFile(path) as src:
-        audio = recognizer.record(src)
-    return recognizer.recognize_google(audio)
-
-def record_audio(duration=5, fs=44100):
-    st.info(f"🎤 Recording for {duration} seconds... Speak now!")
-    rec = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16')
-    sd.wait()
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-    with wave.open(tmp.name, 'wb') as wf:
-        wf.setnchannels(1); wf.setsampwidth(2); wf.setframerate(fs)
-        wf.writeframes(rec.tobytes())
-    st.success("✅ Recording complete! Click 'Process Audio'.")
-    return tmp.name
-
-def build_markdown(title, date, transcript, summary, speakers=""):
-    return f"""# {title or 'Meeting Summary'}
-Date: {date}{f"  |  Speakers: {speakers}" if speakers else ""}
-
----
-
-## Transcription
-{transcript or "(empty)"}
-
-## Summary
-{summary or "(empty)"}
-"""
-
-def md_to_pdf_bytes(md_text):
-    from fpdf import FPDF
-    import urllib.request
-    font_path = os.path.join(tempfile.gettempdir(), "DejaVuSans.ttf")
-    if not os.path.exists(font_path):
-        urllib.request.urlretrieve(
-            "https://github.com/dejavu-fonts/dejavu-fonts/raw/version_2_37/ttf/DejaVuSans.ttf",
-            font_path
-        )
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.add_font("DejaVu", "", font_path, uni=True)
-    pdf.set_font("DejaVu", size=12)
-    width = pdf.w - pdf.l_margin - pdf.r_margin
-    safe_text = md_text.encode("utf-8", "ignore").decode("utf-8")
-    for line in safe_text.split("\n"):
-        pdf.multi_cell(width, 6, line)
-    return pdf.output(dest="S").encode("latin1", "ignore")
-
-def send_email(smtp_host, smtp_port, user, pwd, to, subject, body, attachments):
-    import smtplib
-    from email.mime.multipart import MIMEMultipart
-    from email.mime.text import MIMEText
-    from email.mime.base import MIMEBase
-    from email import encoders
-    from email.header import Header
-    from email.utils import formataddr
-    msg = MIMEMultipart()
-    msg["From"] = formataddr((str(Header("Speech-to-Text App", "utf-8")), user))
-    msg["To"] = to
-    msg["Subject"] = Header(subject or "Meeting Summary", "utf-8")
-    msg.attach(MIMEText(body, "plain", "utf-8"))
-    for fname, data, main, sub in attachments:
-        part = MIMEBase(main, sub)
-        part.set_payload(data)
-        encoders.encode_base64(part)
-        part.add_header("Content-Disposition", f'attachment; filename="{fname}"')
-        msg.attach(part)
-    with smtplib.SMTP_SSL(smtp_host, int(smtp_port)) as server:
-        server.login(user, pwd)
-        server.sendmail(user, [to], msg.as_string())
+@st.cache_data(max_entries=8)
+def read_export(path):
+    # Export files are content-addressed: same path, same bytes
+    with open(path, "rb") as f: return f.read()
+
+def session_summarizer():
+    # Stateful per session: a growing transcript only indexes the new sentences
+    if "summarizer" not in st.session_state: st.session_state.summarizer = TextRankSummarizer()
+    return st.session_state.summarizer
+
+def transcribe_file(path, engine="google", progress=None):
+    # Split at pauses and transcribed chunk-parallel; memoized on the audio content hash
+    cache = get_cache()
+    result, _ = cache.get_or_compute("stt", cache.digest(path), {"engine": engine, "mode": "chunked"},
+                                     lambda: transcribe_long(path, get_engine(engine), progress=progress))
+    return result
+
+def transcribe_chunk(samples, rate):
+    try:
+        return sr.Recognizer().recognize_google(sr.AudioData(to_pcm16(samples), rate, 2))
+    except sr.UnknownValueError:
+        return ""
+
+def start_recording():
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".wav"); tmp.close()
+    engine = CaptureEngine(out_path=tmp.name)
+    worker = TranscriptionWorker(engine.chunks, transcribe_chunk)
+    engine.start(); worker.start()
+    st.session_state.capture = {"engine": engine, "worker": worker, "path": tmp.name}
+
+def stop_recording():
+    cap = st.session_state.capture
+    cap["engine"].stop(); cap["worker"].stop()
+    st.session_state.audio_path = cap["path"]
+    st.session_state.transcription = cap["worker"].text
+    st.session_state.export_key = None
+    st.session_state.capture = None
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+@st.cache_resource
+def get_session_store():
+    # One store per server process; old per-session folders are imported once
+    store = SessionStore(os.path.join(APP_DIR, "sessions_store"))
+    store.import_legacy(os.path.join(APP_DIR, "sessions"))
+    store.start_compactor()
+    return store
+
+@st.cache_resource
+def get_search_index():
+    index = SearchIndex(os.path.join(APP_DIR, "search_index"))
+    if len(index) == 0:
+        # First start: backfill from the session history
+        for row in get_session_store().query(columns=["session_id", "title", "transcript", "summary"], limit=None):
+            index.add_session(row["session_id"], title=row["title"], summary=row["summary"], transcript=row["transcript"])
+        index.flush()
+    index.start_merger()
+    return index
+
+def save_session(transcript, summary, details, segments=None):
+    # details: title / date / speakers / audio_path captured from the sidebar at submit time
+    with span("session_write", input_size=len(transcript)):
+        session_id = get_session_store().append({**details, "transcript": transcript, "summary": summary})[0]
+    with span("search_index", input_size=len(transcript)):
+        index = get_search_index()
+        index.add_session(session_id, segments=segments, title=details["title"], summary=summary, transcript=transcript)
+        index.flush()
+    return session_id
+
+# -------------------- BACKGROUND JOBS --------------------
+def process_job(job, path, details, summarizer, engine="google"):
+    # Runs on a job worker thread: no st.* calls here, progress is reported through `job`
+    with collect() as spans:
+        job.report("🎧 Transcribing...", 0.05)
+        with span("transcribe", input_size=os.path.getsize(path), engine=engine):
+            stt = transcribe_file(path, engine, lambda done, total: job.report(f"🎧 Transcribing... chunk {done}/{total}", 0.05 + 0.65 * done / total))
+        text = stt["text"]
+        job.report("🧠 Summarizing...", 0.7)
+        with span("summarize", input_size=len(text)):
+            summary = summarizer.update(text).summary(3)
+        job.report("💾 Saving session...", 0.85)
+        session_id = save_session(text, summary, details, stt["segments"])
+    # Stage spans are written as JSON lines next to the session record
+    write_jsonl(spans, get_session_store().trace_path(session_id))
+    # Subtitles depend on the segment timings: keyed on the audio content and the engine that timed it
+    subtitle_key = content_key(get_cache().digest(path), engine)
+    return {"transcription": text, "summary": summary, "session_id": session_id, "segments": stt["segments"], "subtitle_key": subtitle_key}
+
+@st.fragment(run_every=2)
+def email_status(session_id):
+    status = get_outbox().status(session_id)
+    if not status["messages"]: return
+    st.caption(f"📬 Email: {status['sent']} sent · {status['pending']} pending · {status['failed']} failed")
+    for err in status["errors"]: st.caption(f"⚠️ {err}")
+
+def clear_job():
+    st.session_state.job_id = None; st.query_params.pop("job", None)
+
+@st.fragment(run_every=1)
+def job_panel():
+    jobs = get_job_queue(); job = jobs.get(st.session_state.job_id or "")
+    if job is None: return
+    if not job.is_finished:
+        ahead = jobs.position(job.id)
+        st.progress(job.progress, text=f"{job.stage} ({ahead} ahead in queue)" if ahead else job.stage)
+        if st.button("✖️ Cancel", key="cancel_job", disabled=job.cancel_requested): jobs.cancel(job.id)
+        return
+    if job.status == DONE:
+        st.session_state.transcription = job.result["transcription"]
+        st.session_state.summary = job.result["summary"]
+        st.session_state.session_id = job.result["session_id"]
+        st.session_state.segments = job.result["segments"]
+        st.session_state.subtitle_key = job.result["subtitle_key"]
+        st.session_state.export_key = None
+        clear_job(); st.rerun()
+    elif job.status == FAILED:
+        lines = (job.error or "").strip().splitlines()
+        st.error(f"❌ {lines[0] if lines else 'Job failed'}")
+        with st.expander("Details"): st.code(job.error)
+    else:
+        st.warning("⏹️ Cancelled.")
+    if st.button("OK", key="dismiss_job"):
+        clear_job(); st.rerun()
 
 # -------------------- SIDEBAR --------------------
 st.sidebar.header("🧾 Session Details")
 title = st.sidebar.text_input("Title", "Meeting Summary")
 date_str = st.sidebar.text_input("Date", datetime.now().strftime("%Y-%m-%d"))
 speakers = st.sidebar.text_input("Speakers (optional)", "")
+engine_names = [e for e in ENGINES if e != "standin"]
+# google needs no extra install (faster-whisper / vosk are optional); STT_ENGINE overrides, as in milestone_3/app.py
+stt_engine = st.sidebar.selectbox("Speech engine", engine_names, index=engine_names.index(os.environ.get("STT_ENGINE", "google")),
+                                  help="google = online API; whisper / vosk run locally on all CPU cores")
 
 st.sidebar.markdown("---")
 st.sidebar.subheader("📧 Email / Export")
@@ -201,36 +268,72 @@ cfg["smtp_host"] = st.sidebar.text_input("SMTP Host", cfg["smtp_host"])
 cfg["smtp_port"] = st.sidebar.text_input("SMTP Port", cfg["smtp_port"])
 cfg["email_user"] = st.sidebar.text_input("From Email", cfg["email_user"])
 cfg["email_pass"] = st.sidebar.text_input("App Password", type="password", value=cfg["email_pass"])
-cfg["email_to"] = st.sidebar.text_input("To Email", cfg["email_to"])
-cfg["subject"] = st.sidebar.text_input
+cfg["email_to"] = st.sidebar.text_input("To Email", cfg["email_to"], help="Several addresses: separate with commas")
+cfg["subject"] = st.sidebar.text_input("Subject", cfg["subject"])
+
+show_timing = st.sidebar.checkbox("⏱️ Show timing", value=False)
+
+st.sidebar.markdown("---")
+st.sidebar.subheader("🗂️ History")
+if "history_page" not in st.session_state: st.session_state.history_page = 0
+history = get_session_store().query(columns=["session_id", "timestamp", "title"], limit=10,
+                                    offset=st.session_state.history_page * 10)
+for row in history:
+    st.sidebar.caption(f"{row['timestamp']:%Y-%m-%d %H:%M} · {row['title'] or row['session_id']}")
+query = st.sidebar.text_input("🔎 Search past meetings", "", help='Use "quotes" for exact phrases')
+if query:
+    for res in get_search_index().search(query, limit=5):
+        st.sidebar.markdown(f"**{res['title'] or res['session_id']}** · score {res['score']}")
+        for hit in res["hits"]:
+            st.sidebar.caption(f"⏱️ {hit['start']:.1f}s — {hit['text'][:120]}")
+        if st.sidebar.button("▶ Open", key=f"open_{res['session_id']}"):
+            rec = get_session_store().get(res["session_id"])
+            if rec and rec["audio_path"] and os.path.exists(rec["audio_path"]):
+                start = int(res["hits"][0]["start"]) if res["hits"] else 0
+                st.sidebar.audio(rec["audio_path"], start_time=start)
+h1, h2 = st.sidebar.columns(2)
+if h1.button("◀ Newer", disabled=st.session_state.history_page == 0):
+    st.session_state.history_page -= 1; st.rerun()
+if h2.button("Older ▶", disabled=len(history) < 10):
+    st.session_state.history_page += 1; st.rerun()
 # -------------------- INPUT SECTION --------------------
 st.markdown('<div class="card">', unsafe_allow_html=True)
 st.markdown("### 🎧 Input Options")
 st.markdown("<p style='color:#9aa7b2;'>Choose how you want to provide audio — record live or upload a file.</p>", unsafe_allow_html=True)
 
-mode = st.radio("Select Input Method:", ["🎙️ Record from Microphone", "📂 Upload WAV File"], horizontal=True)
+mode = st.radio("Select Input Method:", ["🎙️ Record from Microphone", "📂 Upload Audio File"], horizontal=True)
 
 if mode.startswith("🎙️"):
-    duration = st.slider("⏱️ Recording Duration (seconds)", 5, 60, 20)
     c1, c2 = st.columns([1, 1])
     with c1:
-        if st.button("🎤 Start Recording"):
-            st.session_state.audio_path = record_audio(duration)
+        if st.session_state.capture is None:
+            if st.button("🎤 Start Recording"):
+                start_recording(); st.rerun()
+        else:
+            if st.button("⏹️ Stop Recording"):
+                stop_recording(); st.rerun()
+
+            @st.fragment(run_every=1)
+            def live_panel():
+                cap = st.session_state.capture
+                if cap is None: return
+                st.info(f"🔴 Recording... {cap['engine'].seconds:.0f}s captured")
+                if cap["worker"].text:
+                    draw_transcript(session_feed("live").sync_text(cap["worker"].text), "live", height=200, window=2)
+            live_panel()
     with c2:
-        if st.session_state.audio_path:
+        if st.session_state.audio_path and st.session_state.capture is None:
             st.markdown("**🔊 Preview Recorded Audio**")
             st.audio(st.session_state.audio_path)
-            st.success(f"✅ Recorded {duration} seconds of audio")
+            st.success("✅ Recording saved. Click 'Process Audio'.")
 
 elif mode.startswith("📂"):
-    uploaded = st.file_uploader("📂 Upload a .wav file", type=["wav"])
+    uploaded = st.file_uploader("📂 Upload an audio file", type=[ext[1:] for ext in MIME_TYPES])
     if uploaded is not None:
-        tmp_path = os.path.join(tempfile.gettempdir(), "uploaded_audio.wav")
-        with open(tmp_path, "wb") as f:
-            f.write(uploaded.read())
-        st.session_state.audio_path = tmp_path
+        # Streamed to a content-addressed file with its real suffix once per upload; decoded once later (ingest.py)
+        st.session_state.audio_path = session_upload(uploaded)
         st.markdown("**🔊 Preview Uploaded Audio**")
-        st.audio(st.session_state.audio_path, format="audio/wav")
+        st.audio(st.session_state.audio_path, format=mime_type(st.session_state.audio_path))
         st.success("✅ File uploaded successfully!")
 
 st.markdown('</div>', unsafe_allow_html=True)
@@ -239,32 +342,57 @@ if st.session_state.audio_path:
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown("### 🧠 Output")
 
-    if st.button("🚀 Process Audio"):
+    if st.button("🚀 Process Audio", disabled=st.session_state.job_id is not None):
+        details = {"title": title, "date": date_str, "speakers": speakers, "audio_path": st.session_state.audio_path}
         try:
-            with st.spinner("🎧 Transcribing..."):
-                text = transcribe_google(st.session_state.audio_path)
-            with st.spinner("🧠 Summarizing..."):
-                summary = summarize_tfidf(text)
-            st.session_state.transcription = text
-            st.session_state.summary = summary
-            st.success("✅ Done! See below.")
-        except Exception as e:
-            st.error(f"❌ {e}")
-            st.code(traceback.format_exc())
+            job_id = get_job_queue().submit(process_job, st.session_state.audio_path, details, session_summarizer(), stt_engine, kind="process")
+            st.session_state.job_id = job_id; st.query_params["job"] = job_id
+        except QueueFull as e:
+            st.warning(f"⏳ Server busy: {e}")
+    job_panel()
 
     if st.session_state.transcription:
         st.markdown("**📝 Transcription**")
-        st.text_area("", st.session_state.transcription, height=200)
+        # Append-only window in its own fragment: other widgets never re-send the whole transcript
+        feed = session_feed("transcript")
+        if st.session_state.segments: feed.sync_segments(st.session_state.segments, st.session_state.session_id)
+        else: feed.sync_text(st.session_state.transcription)
+        transcript_view(feed, "transcript")
 
     if st.session_state.summary:
         st.markdown("**🧾 Summary**")
         st.text_area("", st.session_state.summary, height=150)
 
-        md = build_markdown(title, date_str, st.session_state.transcription or "", st.session_state.summary or "", speakers)
-        st.download_button("⬇️ Download Markdown (.md)", data=md.encode("utf-8"), file_name=f"{title or 'summary'}.md", mime="text/markdown")
-        if HAS_FPDF:
-            pdf_bytes = md_to_pdf_bytes(md)
-            st.download_button("📄 Download PDF (.pdf)", data=pdf_bytes, file_name=f"{title or 'summary'}.pdf", mime="application/pdf")
+        # Only the selected format is rendered, once per content; reruns are a cache lookup
+        formats = {"Markdown": "md", **({"PDF": "pdf"} if HAS_FPDF else {}), **({"SRT": "srt", "VTT": "vtt"} if st.session_state.segments else {})}
+        choice = st.radio("Export format", list(formats), horizontal=True); fmt = formats[choice]
+        transcription, summary = st.session_state.transcription or "", st.session_state.summary or ""
+        if st.session_state.export_key is None:  # the transcript is hashed once per result, not on every rerun
+            st.session_state.export_key = content_key(transcription, summary)
+        key = st.session_state.export_key
+        exports = get_export_engine()
+        with collect(enabled=show_timing) as export_spans:
+            with span(f"export_{fmt}", input_size=len(transcription)):
+                if fmt in ("md", "pdf"):
+                    path = getattr(exports, "markdown" if fmt == "md" else fmt)(key, title, date_str, transcription, summary, speakers)
+                else:
+                    path = getattr(exports, fmt)(st.session_state.subtitle_key, st.session_state.segments)
+        st.download_button(f"⬇️ Download {choice} (.{fmt})", data=read_export(path), file_name=f"{title or 'summary'}.{fmt}", mime=FORMATS[fmt])
+
+        # Queued to the disk outbox and delivered in the background; the page never waits on SMTP
+        recipients = parse_recipients(cfg["email_to"])
+        if st.button(f"📧 Email summary + {choice}", disabled=not (cfg["email_user"] and recipients)):
+            outbox = get_outbox()
+            account = outbox.add_account(cfg["smtp_host"], cfg["smtp_port"], cfg["email_user"], cfg["email_pass"])
+            outbox.send(account, recipients, cfg["subject"] or title, f"{title}\n{date_str}\n\n{summary}",
+                        attachments=[(f"{title or 'summary'}.{fmt}", read_export(path), FORMATS[fmt])], session_id=st.session_state.session_id)
+            st.success(f"📨 Queued for {len(recipients)} recipient(s).")
+        email_status(st.session_state.session_id)
+
+        if show_timing and st.session_state.session_id:
+            with st.expander("⏱️ Stage timing", expanded=True):
+                trace = read_jsonl(get_session_store().trace_path(st.session_state.session_id))
+                st.dataframe(summarize_spans(trace + export_spans), use_container_width=True)
 
         # Replay & Clear
         st.markdown("---")
@@ -276,6 +404,8 @@ if st.session_state.audio_path:
             if st.button("🗑️ Clear All"):
                 for k in ["audio_path", "transcription", "summary"]:
                     st.session_state[k] = None if k == "audio_path" else ""
+                st.session_state.segments = []
+                st.session_state.export_key = st.session_state.subtitle_key = None
                 st.experimental_rerun()
 
     st.markdown('</div>', unsafe_allow_html=True)
@@ -283,4 +413,5 @@ if st.session_state.audio_path:
 st.markdown(
     "<hr><p style='text-align:center;color:#94A3B8;'>✨ Built with Streamlit by <strong>Soumodip Ghosh</strong></p>",
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+prewarm("speech_recognition", "sklearn.feature_extraction.text")
\ No newline at end of file
@@ -1,17 +1,13 @@
-import librosa
-import numpy as np
-import soundfile as sf
-from scipy.signal import medfilt
+import os
+import sys
+# Streaming spectral-gating denoiser (block-wise STFT, bounded memory) lives in milestone_3/src/denoise.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "milestone_3", "src"))
+from denoise import denoise_file, main
 file_path = r"C:\Users\SOUMODIP\Downloads\harvard.wav\harvard.wav"
-# Load the audio
-y, sr = librosa.load(file_path, sr=None)
-# Compute magnitude spectrogram
-s_full, phase = librosa.magphase(librosa.stft(y))
-# Compute average noise power safely
-frames_0_1s = min(int(0.1 * s_full.shape[1]), s_full.shape[1])
-noise_power = np.mean(s_full[:, :frames_0_1s], axis=1)
-# Example: apply a simple median filter for cleaning (placeholder)
-y_clean = medfilt(y, kernel_size=3)
-# Save cleaned audio properly
-sf.write(file='clean.wav', data=y_clean, samplerate=sr)
-print("Cleaned audio saved as 'clean.wav'")
+if __name__ == "__main__":
+    # Any arguments go to the full CLI: python data_cleaning.py <file|dir> -o <out> [--workers N]
+    if len(sys.argv) > 1:
+        main()
+    else:
+        denoise_file(file_path, "clean.wav")
+        print("Cleaned audio saved as 'clean.wav'")
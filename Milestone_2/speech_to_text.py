@@ -1,15 +1,37 @@
+import os
+import sys
+import argparse
 import whisper
+# Full-file decoding (one log-mel pass, batched 30 s window views) lives in milestone_3/src/whisper_longform.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "milestone_3", "src"))
+from whisper_longform import transcribe_full
+
+parser = argparse.ArgumentParser(description="Transcribe an audio file with Whisper")
+parser.add_argument("audio", nargs="?", default="clean.wav")
+parser.add_argument("--first-30s", action="store_true", help="only decode the first 30 seconds (single window)")
+parser.add_argument("--overlap", type=float, default=5.0, help="seconds of overlap between 30 s windows")
+parser.add_argument("--batch-size", type=int, default=8, help="windows decoded per batch")
+args = parser.parse_args()
+
 model = whisper.load_model("turbo")
-# load audio and pad/trim it to fit 30 seconds
-audio = whisper.load_audio("clean.wav")
-audio = whisper.pad_or_trim(audio)
-# make log-Mel spectrogram and move to the same device as the model
-mel = whisper.log_mel_spectrogram(audio, n_mels=model.dims.n_mels).to(model.device)
-# detect the spoken language
-_, probs = model.detect_language(mel)
-print(f"Detected language: {max(probs, key=probs.get)}")
-# decode the audio
-options = whisper.DecodingOptions()
-result = whisper.decode(model, mel, options)
-# print the recognized text
-print(result.text)
\ No newline at end of file
+if args.first_30s:
+    # load audio and pad/trim it to fit 30 seconds
+    audio = whisper.load_audio(args.audio)
+    audio = whisper.pad_or_trim(audio)
+    # make log-Mel spectrogram and move to the same device as the model
+    mel = whisper.log_mel_spectrogram(audio, n_mels=model.dims.n_mels).to(model.device)
+    # detect the spoken language
+    _, probs = model.detect_language(mel)
+    print(f"Detected language: {max(probs, key=probs.get)}")
+    # decode the audio
+    options = whisper.DecodingOptions()
+    result = whisper.decode(model, mel, options)
+    # print the recognized text
+    print(result.text)
+else:
+    # whole file: features computed once, language detected on the first speech window
+    result = transcribe_full(model, args.audio, overlap_seconds=args.overlap, batch_size=args.batch_size, verbose=True)
+    print(f"Detected language: {result['language']}")
+    for seg in result["segments"]:
+        print(f"[{seg['start']:7.2f} - {seg['end']:7.2f}] {seg['text']}")
+    print(result["text"])
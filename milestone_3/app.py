@@ -1,12 +1,20 @@
 import os
+import sys
 import streamlit as st
-import sounddevice as sd
-import wave
 import tempfile
-import speech_recognition as sr
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-import re
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from audio_capture import CaptureEngine, TranscriptionWorker, to_pcm16
+from textrank_summarizer import TextRankSummarizer
+from job_queue import get_job_queue, QueueFull, DONE, FAILED
+from chunked_stt import get_engine, transcribe_long
+from ingest import MIME_TYPES, session_upload
+from lazy_imports import lazy_import, prewarm
+from transcript_view import draw_transcript, session_feed, transcript_view
+from tracing import collect, span, summarize_spans
+
+# Heavy libraries load on first use (and are prewarmed after the first paint)
+sr = lazy_import("speech_recognition")
 
 # -------------------- PAGE SETUP --------------------
 st.set_page_config(
@@ -163,7 +171,7 @@ st.markdown("""
   <div class="app-subtitle">Record live or upload audio. Clean transcripts, quick summaries, smooth experience.</div>
   <div style="margin-top:12px; display:flex; gap:10px; flex-wrap:wrap;">
     <span class="pill">🎙️ Live capture</span>
-    <span class="pill">📁 WAV upload</span>
+    <span class="pill">📁 Audio upload</span>
     <span class="pill">🧠 Extractive summary</span>
   </div>
 </div>
@@ -176,65 +184,144 @@ if "transcription" not in st.session_state:
     st.session_state.transcription = ""
 if "summary" not in st.session_state:
     st.session_state.summary = ""
+if "capture" not in st.session_state:
+    st.session_state.capture = None
+if "spans" not in st.session_state:
+    st.session_state.spans = []
+if "job_id" not in st.session_state:
+    # The job id lives in the URL too, so a browser refresh reattaches to a running job
+    st.session_state.job_id = st.query_params.get("job")
+    job = get_job_queue().get(st.session_state.job_id) if st.session_state.job_id else None
+    if job is None:
+        st.session_state.job_id = None
+    else:
+        st.session_state.audio_path = job.args[0]  # process_job(job, path, summarizer)
 
 # -------------------- SIMPLE SUMMARIZER --------------------
-def simple_summarizer(text, num_sentences=3):
-    sentences = re.split(r'(?<=[.!?]) +', text)
-    if len(sentences) <= num_sentences:
-        return text
-    vectorizer = TfidfVectorizer(stop_words="english")
-    X = vectorizer.fit_transform(sentences)
-    scores = np.asarray(X.sum(axis=1)).ravel()
-    ranked = np.argsort(scores)[::-1][:num_sentences]
-    summary = " ".join([sentences[i] for i in sorted(ranked)])
-    return summary
+def session_summarizer():
+    # Incremental: when the transcript only grew, just the new sentences are indexed
+    if "summarizer" not in st.session_state:
+        st.session_state.summarizer = TextRankSummarizer(strip=False)
+    return st.session_state.summarizer
 
 # -------------------- SPEECH RECOGNITION --------------------
-recognizer = sr.Recognizer()
 
-def transcribe_audio(path):
-    with sr.AudioFile(path) as source:
-        audio_data = recognizer.record(source)
-        text = recognizer.recognize_google(audio_data)
-    return text
+def transcribe_audio(path, progress=None):
+    # Long files are split at pauses and sent as parallel requests (one request chokes past ~1 min)
+    return transcribe_long(path, get_engine(os.environ.get("STT_ENGINE", "google")), progress=progress)["text"]
+
+# -------------------- BACKGROUND PROCESSING --------------------
+def process_job(job, path, summarizer):
+    # Runs on a job worker thread: no st.* calls in here, progress goes through `job`
+    with collect() as spans:
+        job.report("🎧 Transcribing…", 0.05)
+        with span("transcribe", input_size=os.path.getsize(path)):
+            text = transcribe_audio(path, lambda done, total: job.report(f"🎧 Transcribing… chunk {done}/{total}", 0.05 + 0.75 * done / total))
+        job.report("🧠 Summarizing…", 0.8)
+        with span("summarize", input_size=len(text)):
+            summary = summarizer.update(text).summary(3)
+    return {"transcription": text, "summary": summary, "spans": spans}
+
+def submit_job():
+    job_id = get_job_queue().submit(process_job, st.session_state.audio_path, session_summarizer(), kind="transcribe")
+    st.session_state.job_id = job_id
+    st.query_params["job"] = job_id
+
+def clear_job():
+    st.session_state.job_id = None
+    st.query_params.pop("job", None)
+
+@st.fragment(run_every=1)
+def job_panel():
+    queue = get_job_queue()
+    job = queue.get(st.session_state.job_id) if st.session_state.job_id else None
+    if job is None:
+        return
+    if not job.is_finished:
+        ahead = queue.position(job.id)
+        st.progress(job.progress, text=f"{job.stage} ({ahead} ahead in queue)" if ahead else job.stage)
+        if st.button("✖️ Cancel", key="cancel_job", disabled=job.cancel_requested):
+            queue.cancel(job.id)
+        return
+    if job.status == DONE:
+        st.session_state.transcription = job.result["transcription"]
+        st.session_state.summary = job.result["summary"]
+        st.session_state.spans = job.result["spans"]
+        clear_job()
+        st.rerun()
+    elif job.status == FAILED:
+        lines = (job.error or "").strip().splitlines()
+        st.error(f"❌ {lines[0] if lines else 'Job failed'}")
+    else:
+        st.warning("⏹️ Cancelled.")
+    if st.button("OK", key="dismiss_job"):
+        clear_job()
+        st.rerun()
 
 # -------------------- AUDIO RECORDING --------------------
-def record_audio(duration=5, fs=44100):
-    st.info("🎤 Recording… Speak now")
-    recording = sd.rec(int(duration * fs), samplerate=fs, channels=1, dtype='int16')
-    sd.wait()
+def transcribe_chunk(samples, rate):
+    try:
+        return sr.Recognizer().recognize_google(sr.AudioData(to_pcm16(samples), rate, 2))
+    except sr.UnknownValueError:
+        return ""
+
+def start_recording():
+    # Capture runs on the audio callback + worker threads; the script returns immediately
     tmpfile = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-    with wave.open(tmpfile.name, 'wb') as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(fs)
-        wf.writeframes(recording.tobytes())
-    st.success("✅ Recording finished. Ready to process.")
-    return tmpfile.name
+    tmpfile.close()
+    engine = CaptureEngine(out_path=tmpfile.name)
+    worker = TranscriptionWorker(engine.chunks, transcribe_chunk)
+    engine.start()
+    worker.start()
+    st.session_state.capture = {"engine": engine, "worker": worker, "path": tmpfile.name}
+
+def stop_recording():
+    cap = st.session_state.capture
+    cap["engine"].stop()
+    cap["worker"].stop()
+    st.session_state.audio_path = cap["path"]
+    st.session_state.transcription = cap["worker"].text
+    st.session_state.capture = None
+
+# -------------------- SIDEBAR --------------------
+show_timing = st.sidebar.checkbox("⏱️ Show timing", value=False)
 
 # -------------------- MAIN LAYOUT --------------------
 st.markdown('<div class="section grid-1-center">', unsafe_allow_html=True)
 with st.container():
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown("### 🎧 Input")
-    mode = st.radio("Choose input type", ["🎤 Record from microphone", "📁 Upload WAV file"])
+    mode = st.radio("Choose input type", ["🎤 Record from microphone", "📁 Upload audio file"])
 
     if mode.startswith("🎤"):
-        duration = st.slider("⏱️ Duration (seconds)", 3, 20, 5)
         c1, c2 = st.columns([1, 1])
         with c1:
-            if st.button("🎙️ Start recording"):
-                st.session_state.audio_path = record_audio(duration)
+            if st.session_state.capture is None:
+                if st.button("🎙️ Start recording"):
+                    start_recording()
+                    st.rerun()
+            else:
+                if st.button("⏹️ Stop recording"):
+                    stop_recording()
+                    st.rerun()
+
+                @st.fragment(run_every=1)
+                def live_panel():
+                    cap = st.session_state.capture
+                    if cap is None:
+                        return
+                    st.info(f"🔴 Recording… {cap['engine'].seconds:.0f}s captured")
+                    if cap["worker"].text:
+                        draw_transcript(session_feed("live").sync_text(cap["worker"].text), "live", height=200, window=2)
+                live_panel()
         with c2:
-            if st.session_state.audio_path:
+            if st.session_state.audio_path and st.session_state.capture is None:
                 st.audio(st.session_state.audio_path)
     else:
-        uploaded = st.file_uploader("📂 Select a .wav file", type=["wav"])
+        uploaded = st.file_uploader("📂 Select an audio file", type=[ext[1:] for ext in MIME_TYPES])
         if uploaded:
-            tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-            tmp.write(uploaded.read())
-            st.session_state.audio_path = tmp.name
-            st.audio(tmp.name)
+            st.session_state.audio_path = session_upload(uploaded)
+            st.audio(st.session_state.audio_path)
             st.success("✅ File uploaded")
 
     # Input actions
@@ -258,7 +345,7 @@ if st.session_state.get("reset_btn"):
     st.session_state.audio_path = None
     st.session_state.transcription = ""
     st.session_state.summary = ""
-    st.experimental_set_query_params()  # soft refresh marker
+    clear_job()  # a refresh must not reattach to the old job
 
 # -------------------- OUTPUT (conditionally visible) --------------------
 if st.session_state.audio_path:
@@ -271,17 +358,12 @@ if st.session_state.audio_path:
         st.markdown("Refine your audio to text and extract a concise summary.")
         colp1, colp2 = st.columns([1, 1])
         with colp1:
-            if st.button("🧠 Run transcription & summary", key="run_process"):
+            if st.button("🧠 Run transcription & summary", key="run_process", disabled=st.session_state.job_id is not None):
                 try:
-                    with st.spinner("🎧 Transcribing…"):
-                        text = transcribe_audio(st.session_state.audio_path)
-                        st.session_state.transcription = text
-                    with st.spinner("🧠 Summarizing…"):
-                        summary = simple_summarizer(text, num_sentences=3)
-                        st.session_state.summary = summary
-                    st.success("✅ Done. See results on the right.")
-                except Exception as e:
-                    st.error(f"❌ {e}")
+                    submit_job()
+                except QueueFull as e:
+                    st.warning(f"⏳ Server busy: {e}")
+            job_panel()
         with colp2:
             st.caption("Your audio stays local to the app during processing.")
 
@@ -294,7 +376,8 @@ if st.session_state.audio_path:
 
         if st.session_state.transcription:
             st.markdown("**📝 Transcribed text**")
-            st.text_area("", st.session_state.transcription, height=200)
+            # Append-only window in its own fragment: other widgets never re-send the whole transcript
+            transcript_view(session_feed("transcript").sync_text(st.session_state.transcription), "transcript")
 
         if st.session_state.summary:
             st.markdown("**🧾 Summary**")
@@ -321,9 +404,14 @@ if st.session_state.audio_path:
         else:
             st.info("Run the process to generate transcription and summary.")
 
+        if show_timing and st.session_state.spans:
+            with st.expander("⏱️ Stage timing", expanded=True):
+                st.dataframe(summarize_spans(st.session_state.spans), use_container_width=True)
+
         st.markdown('</div>', unsafe_allow_html=True)
 
     st.markdown('</div>', unsafe_allow_html=True)
 
 # -------------------- FOOTER --------------------
-st.markdown('<div class="footer">Built by Soumodip Ghosh • SPEACH TO TEXT CONVERTION FROM LIVE RECORDING AND FROM FILES</div>', unsafe_allow_html=True)
\ No newline at end of file
+st.markdown('<div class="footer">Built by Soumodip Ghosh • SPEACH TO TEXT CONVERTION FROM LIVE RECORDING AND FROM FILES</div>', unsafe_allow_html=True)
+prewarm("speech_recognition", "sklearn.feature_extraction.text")
@@ -1,82 +1,200 @@
 # -*- coding: utf-8 -*-
+import argparse
+import glob
+import hashlib
+import json
 import os
 import sys
-from pipeline import main as run_pipeline
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pipeline import transcribe_file, write_transcript, load_models
 from summarizer import summarize_text
+from tracing import collect, span, write_jsonl, summarize_spans
+from precision import MODES, resolve_compute_type
 
 # ---- FIX 1: Force UTF-8 output to avoid 'charmap' errors on Windows ----
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
 
-
-def main():
-    print("\n===== MODULE 5 & 6: TRANSCRIPTION + SUMMARIZATION =====\n")
-
-    # Check if audio path is passed as argument
-    if len(sys.argv) < 2:
-        print("⚠️  Usage: python app_module_5_6.py <audio_file_path>")
-        sys.exit(1)
-
-    audio_path = sys.argv[1]
-
-    # Validate file path
-    if not os.path.exists(audio_path):
-        print(f"❌ Error: File not found — {audio_path}")
-        sys.exit(1)
-
-    print(f"🎧 Processing audio file: {audio_path}\n")
-
-    # ---------------------------
-    # STEP 1: TRANSCRIPTION
-    # ---------------------------
-    print("🔹 Step 1: Transcribing audio using WhisperX...\n")
-
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg")
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUT_DIR = os.path.join(BASE_DIR, "outputs")
+
+
+# ---------------------------
+# INPUTS / OUTPUTS
+# ---------------------------
+def collect_inputs(items):
+    """Expands files, glob patterns and directories into a sorted, de-duplicated file list."""
+    found = []
+    for item in items:
+        if os.path.isdir(item):
+            for name in sorted(os.listdir(item)):
+                if name.lower().endswith(AUDIO_EXTENSIONS):
+                    found.append(os.path.join(item, name))
+        elif os.path.exists(item):
+            found.append(item)
+        else:
+            found.extend(sorted(glob.glob(item, recursive=True)))
+    seen, unique = set(), []
+    for path in found:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def assign_output_dirs(inputs, out_root):
+    """One folder per input; same-named files get a short path hash so nothing is overwritten."""
+    stems = {}
+    for path in inputs:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        stems[stem] = stems.get(stem, 0) + 1
+    dirs = []
+    for path in inputs:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if stems[stem] > 1:
+            stem += "_" + hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:8]
+        dirs.append(os.path.join(out_root, stem))
+    return dirs
+
+
+# ---------------------------
+# WORKER
+# ---------------------------
+def _init_worker(threads):
+    # Each worker process loads its models once and keeps them in its registry.
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    load_models()
+
+
+def process_file(audio_path, out_dir, summarize=True, verbose=False, diarization=True):
+    """
+    Transcribes, aligns, diarizes and summarizes one file into out_dir.
+
+    Returns:
+        dict: Report row with timings and real-time factor.
+    """
+    record = {"input": audio_path, "output_dir": out_dir, "status": "ok"}
+    start = time.perf_counter()
+    with collect() as spans:
+        _process(audio_path, out_dir, summarize, verbose, record, start, diarization)
+    if os.path.isdir(out_dir):
+        write_jsonl(spans, os.path.join(out_dir, "trace.jsonl"))
+    record["stages"] = summarize_spans(spans)
+    record["wall_seconds"] = round(time.perf_counter() - start, 3)
+    if record.get("audio_seconds"):
+        record["rtf"] = round(record["wall_seconds"] / record["audio_seconds"], 3)
+    return record
+
+
+def _process(audio_path, out_dir, summarize, verbose, record, start, diarization):
     try:
-        run_pipeline()  # pipeline.py handles transcription + diarization
+        os.makedirs(out_dir, exist_ok=True)
+        transcript, duration = transcribe_file(audio_path, verbose=verbose, diarization=diarization)
+        record["transcribe_seconds"] = round(time.perf_counter() - start, 3)
+        write_transcript(transcript, os.path.join(out_dir, "transcription.txt"))
+        transcript.save(os.path.join(out_dir, "transcript.trn"))
+        if diarization:
+            write_transcript(transcript, os.path.join(out_dir, "transcript_with_speakers.txt"), speakers=True)
+            record["speakers"] = len(transcript.speakers)
+
+        if summarize:
+            t0 = time.perf_counter()
+            summary = summarize_text(transcript.plain_text())
+            with span("export_summary", input_size=len(summary)), \
+                    open(os.path.join(out_dir, "summary.txt"), "w", encoding="utf-8") as f:
+                f.write(summary)
+            record["summarize_seconds"] = round(time.perf_counter() - t0, 3)
+        record["audio_seconds"] = round(duration, 3)
     except Exception as e:
-        print(f"❌ Transcription failed: {e}")
-        sys.exit(1)
-
-    # Read generated transcript file
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    transcript_file = os.path.join(base_dir, "transcription.txt")
+        record["status"] = "error"
+        record["error"] = str(e)
+
+
+def run_batch(inputs, out_root, workers=1, summarize=True, diarization=True):
+    """Runs process_file over all inputs, in-process for one worker or across a process pool."""
+    out_dirs = assign_output_dirs(inputs, out_root)
+    records = []
+    if workers <= 1:
+        for path, out_dir in zip(inputs, out_dirs):
+            print(f"🎧 Processing audio file: {path}")
+            records.append(process_file(path, out_dir, summarize, verbose=True, diarization=diarization))
+        return records
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(threads,)) as pool:
+        futures = {pool.submit(process_file, p, d, summarize, False, diarization): p for p, d in zip(inputs, out_dirs)}
+        for future in as_completed(futures):
+            rec = future.result()
+            mark = "✅" if rec["status"] == "ok" else "❌"
+            print(f"{mark} {rec['input']}  ({rec['wall_seconds']:.1f}s, RTF {rec.get('rtf', '-')})")
+            records.append(rec)
+    order = {p: i for i, p in enumerate(inputs)}
+    return sorted(records, key=lambda r: order[r["input"]])
+
+
+def write_report(records, out_root, total_seconds):
+    audio = sum(r.get("audio_seconds", 0) for r in records)
+    report = {
+        "files": len(records),
+        "failed": sum(r["status"] != "ok" for r in records),
+        "total_wall_seconds": round(total_seconds, 3),
+        "total_audio_seconds": round(audio, 3),
+        "overall_rtf": round(total_seconds / audio, 3) if audio else None,
+        "results": records,
+    }
+    path = os.path.join(out_root, "report.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return path, report
+
+
+def main(argv=None):
+    print("\n===== MODULE 5 & 6: TRANSCRIPTION + SUMMARIZATION =====\n")
 
-    if not os.path.exists(transcript_file):
-        print("❌ transcription.txt not found. Ensure pipeline.py generated it.")
+    parser = argparse.ArgumentParser(description="Transcribe + summarize one or many audio files")
+    parser.add_argument("inputs", nargs="+", help="audio files, glob patterns or directories")
+    parser.add_argument("-o", "--out-dir", default=DEFAULT_OUT_DIR, help="root folder for per-file outputs")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--no-summary", action="store_true", help="skip summarization")
+    parser.add_argument("--no-diarization", action="store_true", help="skip speaker labelling")
+    parser.add_argument("--precision", choices=("auto",) + MODES, default=os.environ.get("WHISPER_PRECISION", "auto"),
+                        help="WhisperX compute type; auto = fastest within the WER budget on this host")
+    args = parser.parse_args(argv)
+
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        print(f"❌ Error: No audio files found for — {' '.join(args.inputs)}")
         sys.exit(1)
+    os.makedirs(args.out_dir, exist_ok=True)
+    # Resolved once here (auto may benchmark); worker processes inherit the concrete type
+    os.environ["WHISPER_PRECISION"] = resolve_compute_type(args.precision)
+    print(f"🔹 {len(inputs)} file(s), {args.workers} worker(s), compute_type={os.environ['WHISPER_PRECISION']} → {args.out_dir}\n")
 
-    with open(transcript_file, "r", encoding="utf-8") as f:
-        transcript = f.read().strip()
-
-    print("\n--- TRANSCRIPT ---")
-    print(transcript)
-    print("\n")
+    start = time.perf_counter()
+    records = run_batch(inputs, args.out_dir, args.workers, summarize=not args.no_summary,
+                        diarization=not args.no_diarization)
+    report_path, report = write_report(records, args.out_dir, time.perf_counter() - start)
 
     # ---------------------------
-    # STEP 2: SUMMARIZATION
+    # SUMMARY REPORT
     # ---------------------------
-    print("🔹 Step 2: Generating summary...\n")
-
-    try:
-        summary = summarize_text(transcript)
-        print("\n--- SUMMARY ---")
-        print(summary)
-    except Exception as e:
-        print(f"❌ Summarization failed: {e}")
+    print("\n--- REPORT ---")
+    for r in records:
+        if r["status"] == "ok":
+            print(f"✅ {r['input']}: {r['audio_seconds']:.1f}s audio in {r['wall_seconds']:.1f}s (RTF {r.get('rtf', '-')})")
+        else:
+            print(f"❌ {r['input']}: {r['error']}")
+    print(f"\n✅ Report saved to: {report_path}")
+    if report["failed"]:
         sys.exit(1)
 
-    # ---------------------------
-    # SAVE OUTPUT
-    # ---------------------------
-    summary_file = os.path.join(base_dir, "summary.txt")
-
-    try:
-        with open(summary_file, "w", encoding="utf-8") as f:
-            f.write(summary)
-        print(f"\n✅ Summary saved to: {summary_file}")
-    except Exception as e:
-        print(f"⚠️ Could not save summary: {e}")
-
 
 if __name__ == "__main__":
     main()
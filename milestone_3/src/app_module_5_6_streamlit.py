@@ -1,9 +1,18 @@
 import streamlit as st
-import tempfile
-import torch
-import whisperx
 import os
 import time
+from model_registry import get_registry
+from artifact_cache import get_cache
+from pipeline import transcribe_file
+from tracing import collect, summarize_spans
+from exporter import FORMATS, content_key, get_export_engine
+from ingest import session_upload
+from precision import MODES, resolve_compute_type
+from lazy_imports import lazy_import, prewarm
+from transcript_view import session_feed, transcript_view
+from inference_client import get_client
+
+torch = lazy_import("torch")  # only touched once a file is uploaded
 
 # ------------------- PAGE CONFIG -------------------
 st.set_page_config(
@@ -14,67 +23,69 @@ st.set_page_config(
 
 # ------------------- TITLE -------------------
 st.title("🎧 WhisperX Speech-to-Text Dashboard")
-st.markdown("Upload an audio file below to get **transcription with word-level alignment** (Speaker diarization disabled for CPU mode).")
+st.markdown("Upload an audio file below to get **transcription with word-level alignment and speaker labels** (CPU diarization).")
+
+show_timing = st.sidebar.checkbox("⏱️ Show timing", value=False)
+precision = st.sidebar.selectbox("⚙️ Precision", ("auto",) + MODES,
+                                 help="auto = fastest compute type within the WER budget, calibrated once per host")
+num_speakers = st.sidebar.number_input("🗣️ Number of speakers (0 = auto)", min_value=0, max_value=8, value=0)
 
 # ------------------- UPLOAD SECTION -------------------
 uploaded_file = st.file_uploader("📁 Upload your audio file (mp3, wav, m4a, etc.)", type=["mp3", "wav", "m4a"])
 
 if uploaded_file is not None:
-    # Save uploaded file temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-        tmp_file.write(uploaded_file.read())
-        audio_path = tmp_file.name
+    # Streamed to disk under its content hash, keeping the real suffix (mp3 / m4a are not wav)
+    audio_path = session_upload(uploaded_file)
 
     st.success(f"✅ File uploaded successfully: `{uploaded_file.name}`")
 
-    # ------------------- MODEL SETUP -------------------
-    st.markdown("### ⚙️ Loading WhisperX model...")
+    # ------------------- TRANSCRIPTION + ALIGNMENT -------------------
+    # Both stages are memoized on the audio content hash: a rerun on the same upload skips them.
     start_time = time.time()
 
     device = "cuda" if torch.cuda.is_available() else "cpu"
-    compute_type = "float32"  # Force float32 for CPU compatibility
-
-    model = whisperx.load_model("small", device=device, compute_type=compute_type)
-    st.info(f"🔹 Model loaded on **{device.upper()}** (compute_type={compute_type}).")
-
-    # ------------------- TRANSCRIPTION -------------------
-    st.markdown("### 📝 Transcribing Audio...")
-    transcribe_start = time.time()
-    audio = whisperx.load_audio(audio_path)
-    result = model.transcribe(audio)
-    st.success("✅ Transcription complete in {:.2f} seconds.".format(time.time() - transcribe_start))
+    with st.spinner("⚙️ Selecting precision (benchmarked once per host)..."):
+        compute_type = resolve_compute_type(precision, device=device)
 
-    # ------------------- ALIGNMENT -------------------
-    st.markdown("### 🎯 Aligning Words...")
-    model_a, metadata = whisperx.load_align_model(language_code=result["language"], device=device)
-    result = whisperx.align(result["segments"], model_a, metadata, audio, device)
-    st.success("✅ Word alignment complete.")
+    st.markdown("### 📝 Transcribing & Aligning Audio...")
+    with collect(enabled=show_timing) as spans:
+        transcript, duration = transcribe_file(audio_path, verbose=False, device=device, compute_type=compute_type,
+                                           diarization=True, num_speakers=num_speakers or None)
+    st.success("✅ Transcription, word alignment and diarization complete in {:.2f} seconds (**{}**, compute_type={}).".format(
+        time.time() - start_time, device.upper(), compute_type))
 
-    # ------------------- DIARIZATION (DISABLED) -------------------
-    st.markdown("### 🧠 Speaker Diarization (Disabled for CPU Mode)")
-    st.warning("⏭️ Skipped speaker diarization due to incompatible pyannote.audio version on CPU. Use GPU + pyannote.audio==2.1.1 for full diarization.")
+    # ------------------- DIARIZATION (CPU) -------------------
+    st.markdown("### 🧠 Speaker Diarization")
+    talk = transcript.talk_time()
+    st.info(f"🗣️ {len(transcript.speakers)} speaker(s) detected: " + ", ".join(f"{k} ({v:.0f}s)" for k, v in talk.items()))
 
     end_time = time.time()
     st.info(f"⏱️ Total processing time: {end_time - start_time:.2f} seconds")
+    with st.expander("📦 Model cache"):
+        client = get_client()
+        st.json(client.stats() if client else get_registry().stats())  # the daemon's models when one is running
+        cache = get_cache()
+        st.json({"artifact_hits": cache.hits, "artifact_misses": cache.misses})
+    if show_timing:
+        with st.expander("⏱️ Stage timing", expanded=True):
+            st.dataframe(summarize_spans(spans), use_container_width=True)
 
     # ------------------- DISPLAY OUTPUT -------------------
     st.markdown("### 🎙️ Final Transcript")
-    if "segments" in result and len(result["segments"]) > 0:
-        for seg in result["segments"]:
-            text = seg.get("text", "")
-            st.markdown(f"🗒️ **Text:** {text}")
+    if transcript.n_segments > 0:
+        # Windowed view in its own fragment instead of one element per segment
+        feed = session_feed("transcript")
+        source = (get_cache().digest(audio_path), num_speakers, compute_type)
+        if feed.source != source:
+            feed.sync_segments(list(transcript.segments()), source)
+        transcript_view(feed, "transcript", height=500)
     else:
         st.error("❌ No transcription segments found.")
 
     # ------------------- DOWNLOAD SECTION -------------------
     st.markdown("### 💾 Download Transcription")
-    transcript_text = "\n".join(
-        [f"{seg.get('text', '')}" for seg in result.get("segments", [])]
-    )
-
-    transcript_file = "final_transcript.txt"
-    with open(transcript_file, "w", encoding="utf-8") as f:
-        f.write(transcript_text)
+    transcript_file = "transcript_with_speakers.txt"
+    transcript.to_txt(transcript_file, speakers=True)
 
     with open(transcript_file, "rb") as f:
         st.download_button(
@@ -84,5 +95,14 @@ if uploaded_file is not None:
             mime="text/plain"
         )
 
+    # Subtitles are streamed from the segments once per audio content and reused afterwards
+    key = content_key(get_cache().digest(audio_path), num_speakers, compute_type)
+    for fmt in ("srt", "vtt"):
+        with open(getattr(get_export_engine(), fmt)(key, transcript.segments()), "rb") as f:
+            st.download_button(f"🎬 Download Subtitles (.{fmt})", data=f, file_name=f"transcript.{fmt}", mime=FORMATS[fmt])
+
 else:
     st.info("📥 Please upload an audio file to begin.")
+
+if get_client() is None:  # the inference daemon already holds warm models
+    prewarm("torch", "whisperx")
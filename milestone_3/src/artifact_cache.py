@@ -0,0 +1,243 @@
+# artifact_cache.py
+"""
+Artifact Cache Module
+---------------------
+Content-addressed on-disk memoization for pipeline stages
+(transcription, alignment, summarization, ...).
+
+Each artifact is keyed by the stage name, a content hash of its input and
+the parameters that affect the output (model name, compute type, language,
+summary lengths...). Changing one stage's parameters therefore only misses
+that stage; the earlier ones are reused.
+
+Writes go to a temporary file and are published with an atomic os.replace,
+so several processes can share one cache directory without locks. Reads
+touch the file's mtime and the oldest artifacts are evicted once the cache
+grows past its size limit. The size is a running total shared by every
+process in the counter file <root>/size.counter, updated under an
+exclusive file lock (flock / msvcrt): writes only walk the tree when the
+counter is missing or passes the limit, and a walk resets it to what is on
+disk. An unreadable or corrupt artifact is a miss.
+
+Settings:
+    ARTIFACT_CACHE_DIR     cache folder (default ~/.cache/speech_summarizer/artifacts)
+    ARTIFACT_CACHE_MAX_MB  size limit (default 2048, 0 = disable the cache)
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from contextlib import contextmanager
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "speech_summarizer", "artifacts")
+_MISSING = object()
+EVICT_TO = 0.9  # a full cache is trimmed to this fraction of its limit, so the next writes do not walk it again
+COUNTER = "size.counter"
+
+
+@contextmanager
+def _file_lock(f):
+    """Exclusive lock on an open file, across processes."""
+    if os.name == "nt":
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """sha256 of a file's bytes, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ArtifactCache:
+    """
+    Size-bounded, multi-process safe pickle store.
+
+    Args:
+        root (str): Cache directory.
+        max_bytes (int): Size limit; 0 disables caching entirely.
+    """
+
+    def __init__(self, root: str = DEFAULT_DIR, max_bytes: int = 2048 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._digests = {}  # (path, size, mtime) -> sha256, avoids rehashing the same file
+        self._lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(root, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def digest(self, path: str) -> str:
+        """file_digest memoized on (path, size, mtime) for this process."""
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        if key not in self._digests:
+            self._digests[key] = file_digest(path)
+        return self._digests[key]
+
+    @staticmethod
+    def make_key(stage: str, input_hash: str, params: dict = None) -> str:
+        payload = json.dumps({"stage": stage, "input": input_hash, "params": params or {}},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, stage: str) -> str:
+        return os.path.join(self.root, stage, key[:2], key + ".pkl")
+
+    def get(self, stage: str, input_hash: str, params: dict = None, default=None):
+        if not self.enabled:
+            return default
+        path = self._path(self.make_key(stage, input_hash, params), stage)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except Exception:  # missing, truncated, or pickled from code that changed since: recompute
+            with self._lock:
+                self.misses += 1
+            return default
+        try:
+            os.utime(path)  # LRU bookkeeping
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, stage: str, input_hash: str, params: dict, value):
+        if not self.enabled:
+            return
+        path = self._path(self.make_key(stage, input_hash, params), stage)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                written = f.tell()
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        with self._counter() as (total, update):
+            if total is None or total + written - replaced > self.max_bytes:
+                update(self._evict(int(self.max_bytes * EVICT_TO)))
+            else:
+                update(total + written - replaced)
+
+    @contextmanager
+    def _counter(self):
+        """
+        Holds the shared size counter locked; yields (total or None if unknown, update(new_total)).
+        A write that lands during an eviction walk may be counted twice, never missed.
+        """
+        with self._lock, open(os.path.join(self.root, COUNTER), "a+b") as f, _file_lock(f):
+            f.seek(0)
+            try:
+                total = int(f.read().decode("ascii").strip() or "x")
+            except ValueError:
+                total = None
+
+            def update(value):
+                f.seek(0)
+                f.truncate()
+                f.write(str(max(0, int(value))).encode("ascii"))
+                f.flush()
+            yield total, update
+    def get_or_compute(self, stage: str, input_hash: str, params: dict, compute):
+        """
+        Returns the cached artifact or runs compute() and stores its result.
+
+        Returns:
+            tuple: (value, hit) where hit tells whether compute() was skipped.
+        """
+        value = self.get(stage, input_hash, params, _MISSING)
+        if value is not _MISSING:
+            return value, True
+        value = compute()
+        self.put(stage, input_hash, params, value)
+        return value, False
+
+    def _entries(self):
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(".pkl"):
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield st.st_mtime, st.st_size, path
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, target: int = None):
+        """Deletes least recently used artifacts until the cache fits `target` (default: its limit)."""
+        target = self.max_bytes if target is None else target
+        with self._counter() as (_, update):
+            update(self._evict(target))
+
+    def _evict(self, target: int) -> int:
+        """Walks the tree and evicts down to `target`; returns the size left (counter lock held)."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # another process evicted it first
+            total -= size
+        return total
+
+    def clear(self):
+        with self._counter() as (_, update):
+            update(self._evict(0))
+
+
+_CACHE = None
+
+
+def get_cache() -> ArtifactCache:
+    """Process-wide cache configured from the environment."""
+    global _CACHE
+    if _CACHE is None:
+        root = os.environ.get("ARTIFACT_CACHE_DIR", DEFAULT_DIR)
+        max_mb = float(os.environ.get("ARTIFACT_CACHE_MAX_MB", "2048") or 0)
+        _CACHE = ArtifactCache(root, int(max_mb * 1024 * 1024))
+    return _CACHE
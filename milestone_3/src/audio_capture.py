@@ -0,0 +1,367 @@
+# audio_capture.py
+"""
+Audio Capture Module
+--------------------
+Non-blocking microphone capture built on `sounddevice.InputStream`.
+
+The audio callback only downmixes to mono, resamples to 16 kHz (polyphase,
+anti-aliased, filter state carried across callbacks) and writes
+into a preallocated ring buffer. A pump thread drains the ring, streams the
+audio to a 16-bit WAV file and emits fixed-size, energy-gated chunks onto a
+queue that a transcription worker consumes while recording is still going.
+Memory stays flat no matter how long the meeting runs.
+
+`FileInputStream` replays a WAV file through the same callback interface,
+so the engine can be exercised without a microphone.
+
+Usage:
+    engine = CaptureEngine(out_path="meeting.wav")
+    worker = TranscriptionWorker(engine.chunks, transcribe_fn)
+    engine.start(); worker.start()
+    ...
+    engine.stop(); worker.stop()
+"""
+
+import math
+import queue
+import threading
+import time
+import wave
+
+import numpy as np
+
+TARGET_RATE = 16000
+
+
+# ---------------------------
+# RESAMPLING
+# ---------------------------
+class StreamingResampler:
+    """
+    Polyphase resampler by up / down = rate_out / rate_in (reduced), block by block.
+
+    The low-pass is a Kaiser-windowed sinc cut at the lower Nyquist rate (the
+    same design as scipy.signal.resample_poly), so a 44.1 / 48 kHz microphone
+    does not fold energy above 8 kHz into the speech band. The last input
+    samples the filter still needs are carried over, so block boundaries are
+    seamless; output lags input by half the filter (well under 1 ms).
+    """
+
+    def __init__(self, rate_in: int, rate_out: int = TARGET_RATE, half_taps: int = 10, beta: float = 5.0):
+        g = math.gcd(int(rate_in), int(rate_out))
+        self.up, self.down = int(rate_out) // g, int(rate_in) // g
+        if self.up == self.down:
+            return
+        cutoff = 1.0 / max(self.up, self.down)
+        n_taps = 2 * half_taps * max(self.up, self.down) + 1
+        t = np.arange(n_taps) - (n_taps - 1) / 2
+        h = cutoff * np.sinc(cutoff * t) * np.kaiser(n_taps, beta) * self.up
+        self._taps = -(-n_taps // self.up)  # input samples per output sample
+        # phase p, tap j -> h[p + j * up]
+        self._poly = np.zeros((self.up, self._taps), dtype=np.float32)
+        for p in range(self.up):
+            coeffs = h[p::self.up]
+            self._poly[p, :len(coeffs)] = coeffs
+        self._delay = (n_taps - 1) // 2
+        self._hist = np.zeros(self._taps, dtype=np.float32)  # last inputs, ending at index self._n - 1
+        self._n = 0   # input samples seen
+        self._m = 0   # output samples produced
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        if self.up == self.down or len(x) == 0:
+            return x.astype(np.float32, copy=False)
+        buf = np.concatenate((self._hist, x.astype(np.float32, copy=False)))
+        base = self._n - len(self._hist)  # stream index of buf[0]
+        self._n += len(x)
+        # output m needs inputs up to (m * down + delay) // up
+        last = (self._n * self.up - 1 - self._delay) // self.down
+        m = np.arange(self._m, last + 1, dtype=np.int64)
+        self._m = max(self._m, last + 1)
+        self._hist = buf[-self._taps:]
+        if len(m) == 0:
+            return np.zeros(0, dtype=np.float32)
+        pos = m * self.down + self._delay
+        newest = pos // self.up - base
+        idx = newest[:, None] - np.arange(self._taps)
+        return np.einsum("ij,ij->i", self._poly[pos % self.up], buf[np.maximum(idx, 0)] * (idx >= 0)).astype(np.float32)
+
+
+# ---------------------------
+# RING BUFFER
+# ---------------------------
+class RingBuffer:
+    """Fixed-capacity single-producer / single-consumer float32 ring."""
+
+    def __init__(self, capacity: int):
+        self._buf = np.zeros(capacity, dtype=np.float32)
+        self.capacity = capacity
+        self.written = 0   # total samples ever written
+        self.read = 0      # total samples ever read
+        self.overruns = 0  # samples dropped because the reader fell behind
+        self._cond = threading.Condition()
+
+    def write(self, x: np.ndarray):
+        n = len(x)
+        if n == 0:
+            return
+        if n > self.capacity:
+            x = x[-self.capacity:]
+            n = self.capacity
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self._buf[start:start + first] = x[:first]
+        self._buf[:n - first] = x[first:]
+        with self._cond:
+            self.written += n
+            lag = self.written - self.read
+            if lag > self.capacity:
+                self.overruns += lag - self.capacity
+                self.read = self.written - self.capacity
+            self._cond.notify()
+
+    def available(self) -> int:
+        return self.written - self.read
+
+    def wait(self, n: int, timeout: float) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self.available() >= n, timeout)
+
+    def pop(self, n: int) -> np.ndarray:
+        with self._cond:
+            n = min(n, self.available())
+            start = self.read % self.capacity
+            self.read += n
+        first = min(n, self.capacity - start)
+        return np.concatenate((self._buf[start:start + first], self._buf[:n - first]))
+
+
+# ---------------------------
+# FAKE INPUT DEVICE
+# ---------------------------
+class FileInputStream:
+    """
+    Drop-in stand-in for `sounddevice.InputStream` that plays a WAV file
+    into the callback from a background thread.
+
+    Args:
+        path (str): 16-bit PCM WAV file.
+        callback (callable): Same signature as the sounddevice callback.
+        blocksize (int): Frames per callback.
+        realtime (bool): Sleep between blocks to mimic a live device.
+    """
+
+    def __init__(self, path, callback, blocksize=1024, realtime=True, **_):
+        self.path = path
+        self.callback = callback
+        self.blocksize = blocksize
+        self.realtime = realtime
+        with wave.open(path, "rb") as wf:
+            self.samplerate = wf.getframerate()
+            self.channels = wf.getnchannels()
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        with wave.open(self.path, "rb") as wf:
+            while not self._stop.is_set():
+                raw = wf.readframes(self.blocksize)
+                if not raw:
+                    break
+                block = np.frombuffer(raw, dtype=np.int16).reshape(-1, self.channels)
+                self.callback(block.astype(np.float32) / 32768.0, len(block), None, None)
+                if self.realtime:
+                    time.sleep(len(block) / self.samplerate)
+        self.finished.set()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def close(self):
+        self.stop()
+
+
+# ---------------------------
+# CAPTURE ENGINE
+# ---------------------------
+class CaptureEngine:
+    """
+    Callback-based recorder producing 16 kHz mono chunks.
+
+    Args:
+        out_path (str): Optional WAV file the whole recording is streamed to.
+        chunk_seconds (float): Length of each emitted chunk.
+        energy_threshold_db (float): Chunks quieter than this RMS (dBFS) are not emitted.
+        ring_seconds (float): Capacity of the ring buffer.
+        device: sounddevice input device (index or name).
+        samplerate (int): Capture rate; defaults to the device's native rate.
+        stream_factory (callable): Builds the input stream; defaults to sd.InputStream.
+            Pass `functools.partial(FileInputStream, path)` to replay a file.
+        max_queue (int): Chunks held for the worker before new ones are dropped.
+    """
+
+    def __init__(self, out_path=None, chunk_seconds=5.0, energy_threshold_db=-45.0,
+                 ring_seconds=30.0, device=None, samplerate=None, stream_factory=None,
+                 max_queue=32):
+        self.out_path = out_path
+        self.chunk_samples = int(chunk_seconds * TARGET_RATE)
+        self.energy_threshold_db = energy_threshold_db
+        self.device = device
+        self.samplerate = samplerate
+        self.stream_factory = stream_factory
+        self.ring = RingBuffer(int(ring_seconds * TARGET_RATE))
+        self.chunks = queue.Queue(maxsize=max_queue)
+        self.stats = {"chunks": 0, "silent": 0, "dropped": 0, "status_errors": 0}
+        self._resampler = None
+        self._stream = None
+        self._pump = None
+        self._running = threading.Event()
+        self._emitted = 0  # samples already handed to the chunker
+
+    @property
+    def seconds(self) -> float:
+        return self.ring.written / TARGET_RATE
+
+    @property
+    def is_recording(self) -> bool:
+        return self._running.is_set()
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            self.stats["status_errors"] += 1
+        if indata.dtype == np.int16:
+            indata = indata.astype(np.float32) / 32768.0
+        mono = indata.mean(axis=1) if indata.ndim > 1 else indata
+        self.ring.write(self._resampler.process(mono))
+
+    def _open_stream(self):
+        if self.stream_factory is not None:
+            stream = self.stream_factory(callback=self._callback)
+            rate = stream.samplerate
+        else:
+            import sounddevice as sd
+            rate = self.samplerate or int(sd.query_devices(self.device, "input")["default_samplerate"])
+            stream = sd.InputStream(samplerate=rate, channels=1, dtype="float32",
+                                    device=self.device, callback=self._callback)
+        self._resampler = StreamingResampler(int(rate), TARGET_RATE)
+        return stream
+
+    def start(self):
+        if self.is_recording:
+            return
+        self._stream = self._open_stream()
+        self._running.set()
+        self._pump = threading.Thread(target=self._pump_loop, daemon=True)
+        self._pump.start()
+        self._stream.start()
+
+    def stop(self):
+        """Stops capture, flushes the tail chunk and closes the WAV file."""
+        if not self.is_recording:
+            return
+        self._stream.stop()
+        self._stream.close()
+        self._running.clear()
+        self._pump.join()
+
+    def _pump_loop(self):
+        wf = None
+        if self.out_path:
+            wf = wave.open(self.out_path, "wb")
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(TARGET_RATE)
+        pending = []
+        pending_len = 0
+        try:
+            while self._running.is_set() or self.ring.available():
+                self.ring.wait(self.chunk_samples, timeout=0.2)
+                block = self.ring.pop(self.ring.available())
+                if len(block) == 0:
+                    continue
+                if wf:
+                    wf.writeframes(to_pcm16(block))
+                pending.append(block)
+                pending_len += len(block)
+                while pending_len >= self.chunk_samples:
+                    data = np.concatenate(pending)
+                    self._emit(data[:self.chunk_samples])
+                    rest = data[self.chunk_samples:]
+                    pending, pending_len = [rest], len(rest)
+            if pending_len:
+                self._emit(np.concatenate(pending))
+        finally:
+            if wf:
+                wf.close()
+
+    def _emit(self, samples: np.ndarray):
+        start = self._emitted / TARGET_RATE
+        self._emitted += len(samples)
+        rms = float(np.sqrt(np.mean(np.square(samples)))) if len(samples) else 0.0
+        rms_db = 20 * np.log10(max(rms, 1e-10))
+        if rms_db < self.energy_threshold_db:
+            self.stats["silent"] += 1
+            return
+        chunk = {"start": start, "end": self._emitted / TARGET_RATE,
+                 "samples": samples, "rms_db": rms_db}
+        try:
+            self.chunks.put_nowait(chunk)
+            self.stats["chunks"] += 1
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+
+# ---------------------------
+# TRANSCRIPTION WORKER
+# ---------------------------
+class TranscriptionWorker:
+    """
+    Background thread that transcribes chunks while recording continues.
+
+    Args:
+        chunks (queue.Queue): The engine's chunk queue.
+        transcribe_fn (callable): Takes (samples float32 @16 kHz, sample_rate) and returns text.
+    """
+
+    def __init__(self, chunks, transcribe_fn):
+        self.chunks = chunks
+        self.transcribe_fn = transcribe_fn
+        self.texts = []
+        self.errors = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def text(self) -> str:
+        return " ".join(t for t in self.texts if t)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, drain: bool = True):
+        """Stops the worker; by default finishes the chunks already queued."""
+        if not drain:
+            self._stop.set()
+        self.chunks.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            chunk = self.chunks.get()
+            if chunk is None:
+                break
+            try:
+                self.texts.append(self.transcribe_fn(chunk["samples"], TARGET_RATE))
+            except Exception as e:
+                self.errors.append(f"{chunk['start']:.1f}s: {e}")
+
+
+def to_pcm16(samples: np.ndarray) -> bytes:
+    """Float32 [-1, 1] samples to little-endian 16-bit PCM bytes."""
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
@@ -0,0 +1,329 @@
+# benchmark.py
+"""
+Benchmark Module
+----------------
+End-to-end benchmark of every pipeline stage on generated audio.
+
+Stages: audio_load, denoise, model_load, transcribe, align, diarize,
+summarize_abstractive, summarize_tfidf, export, session_write.
+
+Synthetic speech-like recordings (voiced bursts separated by pauses, plus
+background noise) are generated for each requested duration. With
+--standin (the default when WhisperX / transformers are not installed)
+lightweight stand-in models replace Whisper, the aligner and T5, so the
+suite runs offline on any CPU.
+
+Each stage reports p50/p95 latency, real-time factor, throughput and peak
+RSS growth as JSON. With --baseline, p50 latencies are compared against a
+previous run and regressions beyond --threshold make the script exit 1.
+
+Usage:
+    python benchmark.py --durations 1 10 60 --repeat 3 --out bench.json
+    python benchmark.py --baseline bench_baseline.json --threshold 0.15
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import soundfile as sf
+
+from model_registry import ModelRegistry, _rss_bytes
+
+SAMPLE_RATE = 16000
+WORDS = ("budget quarter team revenue product customer release timeline review plan "
+         "design feedback launch metrics hiring roadmap risk decision action owner").split()
+
+
+# ---------------------------
+# FIXTURES
+# ---------------------------
+def make_speech_like(minutes: float, sr: int = SAMPLE_RATE, seed: int = 0) -> np.ndarray:
+    """Voiced harmonic bursts of 1-4 s separated by 0.2-1 s pauses, over light noise."""
+    rng = np.random.default_rng(seed)
+    n = int(minutes * 60 * sr)
+    out = 0.005 * rng.standard_normal(n).astype(np.float32)
+    pos = 0
+    while pos < n:
+        length = min(int(rng.uniform(1, 4) * sr), n - pos)
+        t = np.arange(length) / sr
+        f0 = rng.uniform(100, 220)
+        voiced = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 5))
+        envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t))  # ~4 Hz syllable rate
+        out[pos:pos + length] += (0.1 * voiced * envelope).astype(np.float32)
+        pos += length + int(rng.uniform(0.2, 1.0) * sr)
+    return np.clip(out, -1, 1)
+
+
+def write_fixture(folder: str, minutes: float) -> str:
+    path = os.path.join(folder, f"synthetic_{minutes:g}min.wav")
+    if not os.path.exists(path):
+        sf.write(path, make_speech_like(minutes), SAMPLE_RATE, subtype="PCM_16")
+    return path
+
+
+# ---------------------------
+# STAND-IN MODELS
+# ---------------------------
+class StandInWhisper:
+    """Energy-based segmenter that emits pseudo text, shaped like a WhisperX result."""
+
+    def transcribe(self, audio, batch_size=None):
+        frame = SAMPLE_RATE // 50
+        n = len(audio) // frame
+        energy = np.sqrt(np.mean(audio[:n * frame].reshape(n, frame) ** 2, axis=1))
+        voiced = energy > 0.02
+        edges = np.flatnonzero(np.diff(voiced.astype(np.int8)))
+        bounds = np.concatenate(([0], edges + 1, [n]))
+        rng = np.random.default_rng(len(audio))
+        segments = []
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            if voiced[a]:
+                words = rng.choice(WORDS, size=max(1, (b - a) // 15))
+                segments.append({"start": a / 50, "end": b / 50, "text": " ".join(words) + "."})
+        return {"segments": segments, "language": "en"}
+
+
+def standin_align(segments):
+    for seg in segments:
+        words = seg["text"].split()
+        step = (seg["end"] - seg["start"]) / max(len(words), 1)
+        seg["words"] = [{"word": w, "start": seg["start"] + i * step, "end": seg["start"] + (i + 1) * step}
+                        for i, w in enumerate(words)]
+    return {"segments": segments}
+
+
+class StandInSummarizer:
+    """Lead-3 extractive stand-in with the transformers pipeline call shape."""
+
+    def __call__(self, text, **kwargs):
+        sentences = re.split(r"(?<=[.!?])\s+", text.strip())
+        return [{"summary_text": " ".join(sentences[:3])}]
+
+
+# ---------------------------
+# MEASUREMENT
+# ---------------------------
+class _PeakRss:
+    """Samples RSS on a thread while a stage runs."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start = self.peak = 0
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self.start = self.peak = _rss_bytes()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+    @property
+    def delta_mb(self):
+        return (self.peak - self.start) / (1024 * 1024)
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) if values else None
+
+
+def measure(fn, repeat: int, audio_seconds: float = None, items: int = None):
+    """Runs fn() once untimed (one-time imports / initialisation), then `repeat` timed runs."""
+    latencies, peaks = [], []
+    result = fn()
+    for _ in range(repeat):
+        with _PeakRss() as rss:
+            t0 = time.perf_counter()
+            result = fn()
+            latencies.append(time.perf_counter() - t0)
+        peaks.append(rss.delta_mb)
+    p50 = _percentile(latencies, 50)
+    row = {
+        "repeat": repeat,
+        "p50_s": round(p50, 6),
+        "p95_s": round(_percentile(latencies, 95), 6),
+        "peak_rss_delta_mb": round(max(peaks), 2),
+    }
+    if audio_seconds:
+        row["rtf"] = round(p50 / audio_seconds, 6)
+        row["audio_seconds_per_s"] = round(audio_seconds / p50, 2) if p50 else None
+    if items is not None:
+        row["items_per_s"] = round(items / p50, 2) if p50 else None
+    return row, result
+
+
+# ---------------------------
+# STAGES
+# ---------------------------
+def run_suite(durations, repeat=3, standin=True, workdir=None):
+    workdir = workdir or tempfile.mkdtemp(prefix="bench_")
+    registry = ModelRegistry()
+    results = []
+
+    if standin:
+        load_asr = lambda: registry.get("whisperx", "standin", loader=lambda *a: StandInWhisper())
+        load_sum = lambda: registry.get("summarizer", "standin", loader=lambda *a: StandInSummarizer())
+        align = lambda segments, audio: standin_align(segments)
+    else:
+        import whisperx
+        from precision import resolve_compute_type
+        compute_type = resolve_compute_type()  # same precision the pipeline would run with
+        load_asr = lambda: registry.get("whisperx", "small", compute_type=compute_type)
+        load_sum = lambda: registry.get("summarizer", "t5-small")
+
+        def align(segments, audio):
+            model_a, metadata = registry.get("align", None, language="en")
+            return whisperx.align(segments, model_a, metadata, audio, "cpu")
+
+    def record(stage, minutes, row):
+        row.update({"stage": stage, "minutes": minutes})
+        results.append(row)
+        print(f"  {stage:<22} {minutes:>5g} min  p50 {row['p50_s']:.4f}s  "
+              f"RTF {row.get('rtf', '-')}  ΔRSS {row['peak_rss_delta_mb']} MB")
+
+    for minutes in durations:
+        print(f"\n🔹 {minutes:g} minute fixture")
+        path = write_fixture(workdir, minutes)
+        seconds = minutes * 60
+
+        row, audio = measure(lambda: sf.read(path, dtype="float32")[0], repeat, seconds)
+        record("audio_load", minutes, row)
+
+        from denoise import denoise_file
+        out = os.path.join(workdir, "denoised.wav")
+        row, _ = measure(lambda: denoise_file(path, out), repeat, seconds)
+        record("denoise", minutes, row)
+
+        def cold_load():
+            registry.evict()
+            return load_asr(), load_sum()
+        row, (asr, summarizer) = measure(cold_load, repeat)
+        record("model_load", minutes, row)
+
+        row, raw = measure(lambda: asr.transcribe(audio), repeat, seconds)
+        record("transcribe", minutes, row)
+
+        row, aligned = measure(lambda: align([dict(s) for s in raw["segments"]], audio), repeat, seconds)
+        record("align", minutes, row)
+
+        from diarizer import diarize
+        row, _ = measure(lambda: diarize(audio), repeat, seconds)
+        record("diarize", minutes, row)
+
+        text = " ".join(s["text"] for s in aligned["segments"])
+        row, _ = measure(lambda: summarizer(text, max_length=120, min_length=25, do_sample=False),
+                         repeat, seconds)
+        record("summarize_abstractive", minutes, row)
+
+        from tfidf_summarizer import IncrementalTfidfSummarizer
+        n_sent = len(aligned["segments"])
+        row, _ = measure(lambda: IncrementalTfidfSummarizer().update(text).summary(3), repeat, seconds, n_sent)
+        record("summarize_tfidf", minutes, row)
+
+        from pipeline import write_transcript
+        from transcript import Transcript
+        transcript = Transcript.from_whisperx(aligned)
+        txt = os.path.join(workdir, "transcript.txt")
+        row, _ = measure(lambda: write_transcript(transcript, txt), repeat, seconds, n_sent)
+        record("export", minutes, row)
+
+        from session_store import SessionStore
+        store = SessionStore(os.path.join(workdir, "sessions"))
+        record_data = {"title": "bench", "transcript": text, "summary": text[:500], "duration_seconds": seconds}
+        row, _ = measure(lambda: store.append(record_data), repeat, seconds)
+        record("session_write", minutes, row)
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "standin": standin,
+        "host": {"python": platform.python_version(), "machine": platform.machine(),
+                 "cpus": os.cpu_count()},
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold=0.15):
+    """
+    Flags stages whose p50 grew by more than `threshold` relative to the baseline.
+
+    Returns:
+        list[dict]: Regressions (empty when everything is within tolerance).
+    """
+    base = {(r["stage"], r["minutes"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for row in report["results"]:
+        old = base.get((row["stage"], row["minutes"]))
+        if not old or not old["p50_s"]:
+            continue
+        ratio = row["p50_s"] / old["p50_s"]
+        row["vs_baseline"] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append({"stage": row["stage"], "minutes": row["minutes"],
+                                "baseline_p50_s": old["p50_s"], "p50_s": row["p50_s"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def _have_real_models():
+    # Looked up without importing (whisperx alone takes seconds to import)
+    from importlib.util import find_spec
+    return all(find_spec(name) is not None for name in ("whisperx", "transformers"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline benchmark suite")
+    parser.add_argument("--durations", type=float, nargs="+", default=[1, 10, 60], help="fixture lengths in minutes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--standin", action="store_true", help="use stand-in models even if real ones exist")
+    parser.add_argument("--out", default="bench.json")
+    parser.add_argument("--baseline", help="previous bench JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed p50 slowdown (0.15 = 15%%)")
+    parser.add_argument("--workdir", help="keep fixtures here between runs")
+    args = parser.parse_args(argv)
+
+    standin = args.standin or not _have_real_models()
+    print(f"===== BENCHMARK ({'stand-in' if standin else 'real'} models) =====")
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench_")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        report = run_suite(args.durations, args.repeat, standin, workdir)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        report["regressions"] = regressions
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results saved to: {args.out}")
+
+    if regressions:
+        for r in regressions:
+            print(f"❌ Regression: {r['stage']} @ {r['minutes']:g} min  {r['baseline_p50_s']}s → {r['p50_s']}s (x{r['ratio']})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
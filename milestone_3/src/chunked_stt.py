@@ -0,0 +1,373 @@
+# chunked_stt.py
+"""
+Chunked Speech-to-Text Module
+-----------------------------
+Long-file transcription: split at silences, transcribe chunks in parallel,
+stitch the pieces back on one global timeline.
+
+1. The file is transcoded once to canonical 16 kHz mono PCM and memory
+   mapped (ingest.py); chunks are views into that map.
+2. Frame energies locate pauses; the audio is cut at the pause closest to
+   `target_seconds` inside [min_seconds, max_seconds]. When a stretch has no
+   pause, it is hard-cut at max_seconds with `overlap_seconds` of overlap.
+3. Chunks are transcribed concurrently on a thread pool. Every engine below
+   spends its time in native code or on the network, so threads scale.
+4. Chunk-relative times are shifted to file time. In overlap regions words
+   are kept from whichever chunk is nearer its centre; engines without word
+   times fall back to dropping the repeated word run at the seam.
+
+Engines (pluggable through ENGINES / get_engine):
+    whisper   faster-whisper (local, CTranslate2)
+    vosk      Vosk / Kaldi (local, VOSK_MODEL_PATH)
+    google    Google Web Speech API via speech_recognition (online)
+    standin   energy-based stand-in with a simulated real-time factor (tests, benchmarks)
+
+While the inference daemon (inference_server.py) is running, get_engine()
+returns a RemoteEngine for the local model engines (whisper, vosk): chunks
+go to the daemon's shared model through shared memory.
+
+Usage:
+    from chunked_stt import get_engine, transcribe_long
+    result = transcribe_long("meeting.wav", get_engine("whisper"), workers=4)
+    print(result["text"], result["segments"][0])
+"""
+
+import contextvars
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from audio_capture import to_pcm16
+from ingest import load_audio
+from model_registry import get_model
+from inference_client import get_client
+
+SAMPLE_RATE = 16000
+
+
+# ---------------------------
+# ENGINES
+# ---------------------------
+class Engine(ABC):
+    """
+    Transcribes one chunk of 16 kHz mono float32 audio.
+
+    transcribe() returns segments with chunk-relative times:
+        [{"start": s, "end": s, "text": str, "words": [{"word", "start", "end"}, ...]}]
+    "words" is optional. Implementations must be safe to call from several threads;
+    an engine without transcribe() fails when it is constructed, not mid-job.
+    """
+
+    name = "engine"
+    default_workers = os.cpu_count() or 1
+
+    @abstractmethod
+    def transcribe(self, samples: np.ndarray) -> list:
+        """Segments of one chunk, times relative to the chunk start."""
+
+
+class WhisperEngine(Engine):
+    """faster-whisper; one model shared by all workers (num_workers = parallel decodes)."""
+
+    name = "whisper"
+
+    def __init__(self, model_size: str = "small", compute_type: str = "int8", workers: int = None,
+                 language: str = None):
+        self.default_workers = workers or max(1, (os.cpu_count() or 1) // 2)
+        self.language = language
+        threads = max(1, (os.cpu_count() or 1) // self.default_workers)
+
+        def load(name, device, compute_type, language):
+            from faster_whisper import WhisperModel
+            return WhisperModel(name, device=device, compute_type=compute_type,
+                                cpu_threads=threads, num_workers=self.default_workers)
+        self.model = get_model("faster_whisper", model_size, compute_type=compute_type, loader=load)
+
+    def transcribe(self, samples):
+        segments, _ = self.model.transcribe(samples, language=self.language, word_timestamps=True,
+                                            vad_filter=False, condition_on_previous_text=False)
+        return [{"start": s.start, "end": s.end, "text": s.text.strip(),
+                 "words": [{"word": w.word.strip(), "start": w.start, "end": w.end} for w in (s.words or [])]}
+                for s in segments]
+
+
+class VoskEngine(Engine):
+    """Vosk; the Model is shared, each call gets its own KaldiRecognizer."""
+
+    name = "vosk"
+
+    def __init__(self, model_path: str = None, workers: int = None):
+        self.model_path = model_path or os.environ.get("VOSK_MODEL_PATH", "model")
+        if workers:
+            self.default_workers = workers
+
+        def load(name, device, compute_type, language):
+            import vosk
+            vosk.SetLogLevel(-1)
+            return vosk.Model(name)
+        self.model = get_model("vosk", self.model_path, loader=load)
+
+    def transcribe(self, samples):
+        import json
+        from vosk import KaldiRecognizer
+        rec = KaldiRecognizer(self.model, SAMPLE_RATE)
+        rec.SetWords(True)
+        pcm = to_pcm16(samples)
+        results = []
+        for i in range(0, len(pcm), 8000):
+            if rec.AcceptWaveform(pcm[i:i + 8000]):
+                results.append(json.loads(rec.Result()))
+        results.append(json.loads(rec.FinalResult()))
+        segments = []
+        for r in results:
+            words = [{"word": w["word"], "start": w["start"], "end": w["end"]} for w in r.get("result", [])]
+            if words:
+                segments.append({"start": words[0]["start"], "end": words[-1]["end"],
+                                 "text": r.get("text", ""), "words": words})
+        return segments
+
+
+class GoogleEngine(Engine):
+    """Google Web Speech API; one request per chunk, no word timestamps."""
+
+    name = "google"
+    default_workers = 4  # network bound
+
+    def __init__(self, language: str = "en-US"):
+        import speech_recognition as sr
+        self.sr = sr
+        self.language = language
+
+    def transcribe(self, samples):
+        recognizer = self.sr.Recognizer()  # not shared: Recognizer keeps per-call state
+        try:
+            text = recognizer.recognize_google(self.sr.AudioData(to_pcm16(samples), SAMPLE_RATE, 2),
+                                               language=self.language)
+        except self.sr.UnknownValueError:
+            return []
+        return [{"start": 0.0, "end": len(samples) / SAMPLE_RATE, "text": text}]
+
+
+class StandInEngine(Engine):
+    """
+    Offline stand-in: one pseudo word per voiced 0.25 s frame block.
+
+    Args:
+        rtf (float): Simulated real-time factor (sleeps rtf * chunk duration,
+            releasing the GIL like a native engine would).
+    """
+
+    name = "standin"
+
+    def __init__(self, rtf: float = 0.0):
+        self.rtf = rtf
+
+    def transcribe(self, samples):
+        if self.rtf:
+            time.sleep(self.rtf * len(samples) / SAMPLE_RATE)
+        step = SAMPLE_RATE // 4
+        n = len(samples) // step
+        if n == 0:
+            return []
+        energy = np.sqrt(np.mean(samples[:n * step].reshape(n, step) ** 2, axis=1))
+        words = [{"word": f"w{int(energy[i] * 1e4) % 997}", "start": int(i) / 4, "end": (int(i) + 1) / 4}
+                 for i in np.flatnonzero(energy > 0.02)]
+        if not words:
+            return []
+        return [{"start": words[0]["start"], "end": words[-1]["end"],
+                 "text": " ".join(w["word"] for w in words), "words": words}]
+
+
+class RemoteEngine(Engine):
+    """
+    Sends chunks to an engine held by the inference daemon; each chunk travels as a shared-memory block.
+
+    Args:
+        client (InferenceClient): Connection to the daemon (one socket per worker thread).
+        engine (str): ENGINES name the daemon instantiates with **kwargs.
+    """
+
+    def __init__(self, client, engine: str, **kwargs):
+        self.client = client
+        self.name = engine
+        self.kwargs = kwargs
+        self.default_workers = kwargs.get("workers") or max(1, (os.cpu_count() or 1) // 2)
+
+    def transcribe(self, samples):
+        return self.client.stt(self.name, self.kwargs, samples)
+
+
+ENGINES = {
+    "whisper": WhisperEngine,
+    "vosk": VoskEngine,
+    "google": GoogleEngine,
+    "standin": StandInEngine,
+}
+REMOTE_ENGINES = ("whisper", "vosk")  # engines whose models the daemon can hold
+
+
+def get_engine(name: str, **kwargs) -> Engine:
+    if name not in ENGINES:
+        raise ValueError(f"Unknown STT engine '{name}' (choose from {', '.join(ENGINES)})")
+    if name in REMOTE_ENGINES:
+        client = get_client()
+        if client:
+            return RemoteEngine(client, name, **kwargs)
+    return ENGINES[name](**kwargs)
+
+
+# ---------------------------
+# CHUNKING
+# ---------------------------
+def plan_chunks(samples: np.ndarray, sr: int = SAMPLE_RATE, target_seconds: float = 30.0,
+                min_seconds: float = 10.0, max_seconds: float = 45.0, overlap_seconds: float = 1.0,
+                min_silence: float = 0.3, frame_ms: int = 30):
+    """
+    Chooses chunk boundaries at pauses.
+
+    Returns:
+        list[tuple]: (start_sample, end_sample) pairs; consecutive chunks only
+        overlap where a stretch without any pause had to be hard-cut.
+    """
+    total = len(samples)
+    if total <= max_seconds * sr:
+        return [(0, total)]
+    frame = int(sr * frame_ms / 1000)
+    n = total // frame
+    rms = np.sqrt(np.mean(samples[:n * frame].reshape(n, frame) ** 2, axis=1) + 1e-12)
+    db = 20 * np.log10(rms)
+    threshold = max(np.percentile(db, 10) + 10.0, -60.0)
+
+    # Centres of silent runs that are long enough to be pauses.
+    silent = np.concatenate(([0], (db < threshold).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(silent))
+    starts, ends = edges[::2], edges[1::2]
+    keep = (ends - starts) * frame >= min_silence * sr
+    cuts = ((starts[keep] + ends[keep]) // 2) * frame
+
+    chunks, pos = [], 0
+    while total - pos > max_seconds * sr:
+        lo, hi = pos + min_seconds * sr, pos + max_seconds * sr
+        window = cuts[(cuts > lo) & (cuts <= hi)]
+        if len(window):
+            cut = int(window[np.argmin(np.abs(window - (pos + target_seconds * sr)))])
+            chunks.append((pos, cut))
+            pos = cut
+        else:
+            cut = int(hi)
+            chunks.append((pos, cut))
+            pos = cut - int(overlap_seconds * sr)
+    chunks.append((pos, total))
+    return chunks
+
+
+# ---------------------------
+# STITCHING
+# ---------------------------
+def _norm(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def _drop_repeated_prefix(prev_text: str, text: str, max_words: int = 12) -> str:
+    """Removes the longest leading word run of `text` that repeats the end of `prev_text`."""
+    prev, cur = prev_text.split(), text.split()
+    prev_n, cur_n = [_norm(w) for w in prev[-max_words:]], [_norm(w) for w in cur[:max_words]]
+    for k in range(min(len(prev_n), len(cur_n)), 0, -1):
+        if prev_n[-k:] == cur_n[:k]:
+            return " ".join(cur[k:])
+    return text
+
+
+def stitch(chunk_results, chunks, sr: int = SAMPLE_RATE):
+    """
+    Shifts chunk-relative segments to file time and resolves overlaps.
+
+    Args:
+        chunk_results (list): Engine output per chunk, in chunk order.
+        chunks (list): The (start_sample, end_sample) pairs from plan_chunks.
+    """
+    merged = []
+    for i, (segments, (a, b)) in enumerate(zip(chunk_results, chunks)):
+        offset = a / sr
+        # Overlap seams: keep everything before the midpoint from the earlier chunk.
+        lo = (a + chunks[i - 1][1]) / 2 / sr if i and chunks[i - 1][1] > a else None
+        hi = (b + chunks[i + 1][0]) / 2 / sr if i + 1 < len(chunks) and chunks[i + 1][0] < b else None
+        for seg in segments:
+            seg = dict(seg, start=seg["start"] + offset, end=seg["end"] + offset)
+            if seg.get("words"):
+                words = [dict(w, start=w["start"] + offset, end=w["end"] + offset) for w in seg["words"]]
+                words = [w for w in words if (lo is None or w["start"] >= lo) and (hi is None or w["start"] < hi)]
+                if not words:
+                    continue
+                seg.update(words=words, start=words[0]["start"], end=words[-1]["end"],
+                           text=" ".join(w["word"] for w in words))
+            elif lo is not None and merged:
+                seg["text"] = _drop_repeated_prefix(merged[-1]["text"], seg["text"])
+                lo = None  # only the first segment after a seam can repeat
+            if seg["text"].strip():
+                merged.append(seg)
+    return merged
+
+
+# ---------------------------
+# DRIVER
+# ---------------------------
+def transcribe_long(audio, engine: Engine, workers: int = None, progress=None, **plan_kwargs):
+    """
+    Transcribes a file (path) or 16 kHz mono samples of any length.
+
+    Args:
+        audio (str | np.ndarray): Audio path or samples.
+        engine (Engine): Any ENGINES implementation.
+        workers (int): Parallel chunk transcriptions (default: engine.default_workers).
+        progress (callable): Optional progress(done_chunks, total_chunks) callback.
+        **plan_kwargs: Forwarded to plan_chunks (target_seconds, max_seconds, ...).
+
+    Returns:
+        dict: {"text", "segments", "duration", "chunks", "engine"}
+    """
+    samples = load_audio(audio) if isinstance(audio, str) else np.asarray(audio, dtype=np.float32)
+    chunks = plan_chunks(samples, **plan_kwargs)
+    results = [None] * len(chunks)
+    workers = max(1, min(workers or engine.default_workers, len(chunks)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Each chunk runs in a copy of this context: spans inside the engine reach the caller's collect()
+        futures = {pool.submit(contextvars.copy_context().run, engine.transcribe, samples[a:b]): i
+                   for i, (a, b) in enumerate(chunks)}
+        try:
+            for done, fut in enumerate(as_completed(futures), 1):
+                results[futures[fut]] = fut.result()
+                if progress:
+                    progress(done, len(chunks))
+        except BaseException:
+            # An engine error or a cancelling progress callback: don't start the remaining chunks.
+            for fut in futures:
+                fut.cancel()
+            raise
+    segments = stitch(results, chunks)
+    return {
+        "text": " ".join(s["text"].strip() for s in segments),
+        "segments": segments,
+        "duration": len(samples) / SAMPLE_RATE,
+        "chunks": len(chunks),
+        "engine": engine.name,
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 2:
+        print("Usage: python chunked_stt.py <audio_file> [engine] [workers]")
+        sys.exit(1)
+    engine = get_engine(sys.argv[2] if len(sys.argv) > 2 else "whisper")
+    t0 = time.perf_counter()
+    result = transcribe_long(sys.argv[1], engine, int(sys.argv[3]) if len(sys.argv) > 3 else None,
+                             progress=lambda d, t: print(f"🔹 chunk {d}/{t}"))
+    wall = time.perf_counter() - t0
+    print(result["text"])
+    print(f"✅ {result['duration']:.0f}s of audio in {result['chunks']} chunks, {wall:.1f}s wall "
+          f"(RTF {wall / max(result['duration'], 1e-9):.3f})")
@@ -0,0 +1,316 @@
+# diarizer.py
+"""
+Diarizer Module
+---------------
+CPU speaker diarization without pyannote or a GPU.
+
+1. Embeddings: 20 MFCCs per 10 ms frame (one batched FFT over the file);
+   every `window`-second speech window is summarised by the mean and
+   standard deviation of its MFCCs, normalised across the recording and
+   L2-normalised -> one 38-dim vector per window.
+2. Clustering: cosine affinities between windows, pruned to each row's
+   strongest neighbours. Spectral clustering picks the speaker count from
+   the largest eigengap of the normalised Laplacian; agglomerative
+   (average-linkage, cosine distance threshold) is available as well.
+   Both work on at most `max_windows` evenly spaced windows (dense n x n
+   affinities); on longer recordings the other windows join the cluster
+   with the nearest centroid.
+3. Labels are majority-smoothed, merged into speaker turns and assigned to
+   WhisperX words with a single sweep over the two sorted interval lists.
+
+Usage:
+    from diarizer import diarize, assign_speakers
+    turns = diarize(samples)                  # 16 kHz mono float32
+    assign_speakers(result_aligned, turns)    # then Transcript.from_whisperx(result_aligned)
+"""
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+N_FFT = 512
+HOP = 160       # 10 ms frames
+N_MELS = 40
+N_MFCC = 20
+
+
+# ---------------------------
+# FEATURES
+# ---------------------------
+def _mel_filterbank(sr=SAMPLE_RATE, n_fft=N_FFT, n_mels=N_MELS, fmin=60.0, fmax=7600.0):
+    mel = lambda f: 2595.0 * np.log10(1.0 + f / 700.0)
+    hz = lambda m: 700.0 * (10 ** (m / 2595.0) - 1.0)
+    points = hz(np.linspace(mel(fmin), mel(fmax), n_mels + 2))
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sr)
+    lower, centre, upper = points[:-2, None], points[1:-1, None], points[2:, None]
+    up = (bins - lower) / (centre - lower)
+    down = (upper - bins) / (upper - centre)
+    return np.maximum(0.0, np.minimum(up, down)).astype(np.float32)
+
+
+def mfcc_frames(samples: np.ndarray, sr: int = SAMPLE_RATE):
+    """
+    MFCCs and log energy for every 10 ms frame.
+
+    Returns:
+        tuple: (mfcc [n_frames, N_MFCC - 1] without c0, log_energy [n_frames])
+    """
+    from scipy.fft import dct  # scipy is imported on first use, not with the module
+    samples = np.asarray(samples, dtype=np.float32)
+    if len(samples) < N_FFT:
+        samples = np.pad(samples, (0, N_FFT - len(samples)))
+    frames = np.lib.stride_tricks.sliding_window_view(samples, N_FFT)[::HOP]
+    window = np.hanning(N_FFT).astype(np.float32)
+    mfcc, energy = [], []
+    for i in range(0, len(frames), 20000):  # bounded memory on long files
+        block = frames[i:i + 20000] * window
+        power = np.abs(np.fft.rfft(block, axis=1)) ** 2
+        logmel = np.log(power.astype(np.float32) @ _mel_filterbank(sr).T + 1e-8)
+        mfcc.append(dct(logmel, type=2, axis=1, norm="ortho")[:, 1:N_MFCC])
+        energy.append(np.log(power.sum(axis=1) + 1e-8))
+    return np.concatenate(mfcc), np.concatenate(energy)
+
+
+def window_embeddings(samples: np.ndarray, sr: int = SAMPLE_RATE, window: float = 1.5, hop: float = 0.75,
+                      min_speech: float = 0.5):
+    """
+    One embedding per speech window.
+
+    Returns:
+        tuple: (embeddings [n, 2 * (N_MFCC - 1)], window centres in seconds [n])
+    """
+    mfcc, energy = mfcc_frames(samples, sr)
+    fps = sr / HOP
+    speech = energy > max(np.percentile(energy, 20) + 3.0, energy.max() - 12.0)  # within ~50 dB of the peak
+
+    win, step = int(window * fps), int(hop * fps)
+    n = max(0, (len(mfcc) - win) // step + 1)
+    if n == 0:
+        return np.zeros((0, 2 * mfcc.shape[1]), np.float32), np.zeros(0)
+    starts = np.arange(n) * step
+
+    # Windowed speech-only sums through cumulative sums: no per-window Python loop.
+    w = speech.astype(np.float32)[:, None]
+    c1 = np.vstack([np.zeros((1, mfcc.shape[1])), np.cumsum(mfcc * w, axis=0)])
+    c2 = np.vstack([np.zeros((1, mfcc.shape[1])), np.cumsum(mfcc ** 2 * w, axis=0)])
+    cn = np.concatenate([[0.0], np.cumsum(w[:, 0])])
+    count = cn[starts + win] - cn[starts]
+    keep = count >= min_speech * fps
+    starts, count = starts[keep], count[keep][:, None]
+    mean = (c1[starts + win] - c1[starts]) / count
+    std = np.sqrt(np.maximum((c2[starts + win] - c2[starts]) / count - mean ** 2, 0.0))
+
+    emb = np.hstack([mean, std])
+    emb = (emb - emb.mean(axis=0)) / (emb.std(axis=0) + 1e-8)
+    emb /= np.linalg.norm(emb, axis=1, keepdims=True) + 1e-8
+    return emb.astype(np.float32), (starts + win / 2) / fps
+
+
+# ---------------------------
+# CLUSTERING
+# ---------------------------
+def _kmeans(x, k, iters=50, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = [x[rng.integers(len(x))]]
+    for _ in range(1, k):  # k-means++ seeding
+        d = np.min(((x[:, None, :] - np.array(centres)[None]) ** 2).sum(-1), axis=1)
+        centres.append(x[rng.choice(len(x), p=d / d.sum())] if d.sum() > 0 else x[rng.integers(len(x))])
+    centres = np.array(centres)
+    labels = np.zeros(len(x), dtype=int)
+    for _ in range(iters):
+        new = np.argmin(((x[:, None, :] - centres[None]) ** 2).sum(-1), axis=1)
+        if np.array_equal(new, labels) and _ > 0:
+            break
+        labels = new
+        for j in range(k):
+            if np.any(labels == j):
+                centres[j] = x[labels == j].mean(axis=0)
+    return labels
+
+
+def _subsample(emb, max_windows):
+    """Evenly spaced window indices (all of them when there are at most max_windows)."""
+    if not max_windows or len(emb) <= max_windows:
+        return None
+    return np.linspace(0, len(emb) - 1, max_windows).round().astype(int)
+
+
+def _assign_nearest(emb, sample, labels, block=8192):
+    """Labels every window with the cluster whose (normalised) centroid is most cosine-similar."""
+    ids = np.unique(labels)
+    centres = np.stack([emb[sample[labels == j]].mean(axis=0) for j in ids])
+    centres /= np.linalg.norm(centres, axis=1, keepdims=True) + 1e-8
+    out = np.empty(len(emb), dtype=int)
+    for i in range(0, len(emb), block):
+        out[i:i + block] = ids[np.argmax(emb[i:i + block] @ centres.T, axis=1)]
+    return out
+
+
+def spectral_cluster(emb: np.ndarray, num_speakers: int = None, min_speakers: int = 1,
+                     max_speakers: int = 8, prune: float = 0.25, max_windows: int = 2000):
+    """
+    Spectral clustering of L2-normalised embeddings.
+
+    Args:
+        num_speakers (int): Fixed count; estimated from the eigengap when None.
+        prune (float): Fraction of strongest affinities kept per row.
+        max_windows (int): Windows clustered directly (memory is O(max_windows^2));
+            the rest are assigned to the nearest centroid.
+    """
+    from scipy.linalg import eigh
+    sample = _subsample(emb, max_windows)
+    if sample is not None:
+        labels = spectral_cluster(emb[sample], num_speakers, min_speakers, max_speakers, prune, None)
+        return _assign_nearest(emb, sample, labels)
+    n = len(emb)
+    if n < 2:
+        return np.zeros(n, dtype=int)
+    sim = emb @ emb.T
+    keep = max(2, int(prune * n))
+    thresh = np.partition(sim, n - keep, axis=1)[:, n - keep][:, None]
+    aff = np.where(sim >= thresh, np.maximum(sim, 0.0), 0.0)
+    aff = np.maximum(aff, aff.T)
+    np.fill_diagonal(aff, 0.0)
+    d = 1.0 / np.sqrt(aff.sum(axis=1) + 1e-8)
+    lap = np.eye(n, dtype=np.float32) - aff * d[:, None] * d[None, :]
+    top = min(max_speakers + 1, n)
+    vals, vecs = eigh(lap, subset_by_index=[0, top - 1])
+    if num_speakers is None:
+        gaps = np.diff(vals)
+        lo = max(min_speakers, 1)
+        k = lo + int(np.argmax(gaps[lo - 1:max_speakers]))
+        # A connected, single-speaker graph has no clear gap at all.
+        if k > 1 and gaps[k - 1] < 0.05:
+            k = max(1, min_speakers)
+    else:
+        k = num_speakers
+    if k <= 1:
+        return np.zeros(n, dtype=int)
+    rows = vecs[:, :k]
+    rows /= np.linalg.norm(rows, axis=1, keepdims=True) + 1e-8
+    return _kmeans(rows, k)
+
+
+def agglomerative_cluster(emb: np.ndarray, num_speakers: int = None, threshold: float = 0.7,
+                          max_windows: int = 2000):
+    """Average-linkage clustering on cosine distance; cut at `threshold` unless num_speakers is given."""
+    from scipy.cluster.hierarchy import fcluster, linkage
+    sample = _subsample(emb, max_windows)
+    if sample is not None:
+        return _assign_nearest(emb, sample, agglomerative_cluster(emb[sample], num_speakers, threshold, None))
+    if len(emb) < 2:
+        return np.zeros(len(emb), dtype=int)
+    tree = linkage(emb, method="average", metric="cosine")
+    if num_speakers:
+        labels = fcluster(tree, num_speakers, criterion="maxclust")
+    else:
+        labels = fcluster(tree, threshold, criterion="distance")
+    return labels - 1
+
+
+# ---------------------------
+# DIARIZATION
+# ---------------------------
+def diarize(samples: np.ndarray, sr: int = SAMPLE_RATE, num_speakers: int = None, min_speakers: int = 1,
+            max_speakers: int = 8, method: str = "spectral", window: float = 1.5, hop: float = 0.75):
+    """
+    Speaker turns for 16 kHz mono audio.
+
+    Returns:
+        list[dict]: [{"start", "end", "speaker"}] sorted by start; speakers are
+        numbered SPEAKER_00, SPEAKER_01, ... in order of first appearance.
+    """
+    emb, centres = window_embeddings(samples, sr, window, hop)
+    if len(emb) == 0:
+        return []
+    if method == "agglomerative":
+        labels = agglomerative_cluster(emb, num_speakers)
+    else:
+        labels = spectral_cluster(emb, num_speakers, min_speakers, max_speakers)
+    labels = mode_filter(labels, size=5)
+
+    order = {}
+    for lab in labels:
+        order.setdefault(lab, len(order))
+    # Each window owns the hop-wide slice around its centre; neighbours of equal label merge.
+    turns = []
+    for centre, lab in zip(centres, labels):
+        start, end, name = max(0.0, centre - hop / 2), centre + hop / 2, f"SPEAKER_{order[lab]:02d}"
+        if turns and turns[-1]["speaker"] == name and start - turns[-1]["end"] < window:
+            turns[-1]["end"] = end
+        else:
+            turns.append({"start": round(start, 3), "end": round(end, 3), "speaker": name})
+    return turns
+
+
+def mode_filter(labels: np.ndarray, size: int = 5) -> np.ndarray:
+    """
+    Majority label over a centred window of `size` windows (edges repeat the end labels).
+
+    Labels are categorical, so a median could yield a third cluster no
+    neighbour has; ties keep the window's own label.
+    """
+    if len(labels) < size:
+        return labels
+    ids, codes = np.unique(labels, return_inverse=True)
+    half = size // 2
+    padded = np.pad(codes, half, mode="edge")
+    windows = np.lib.stride_tricks.sliding_window_view(padded, size)
+    counts = (windows[:, :, None] == np.arange(len(ids))).sum(axis=1).astype(np.float32)
+    counts[np.arange(len(codes)), codes] += 0.5  # tie-break towards the current label
+    return ids[np.argmax(counts, axis=1)]
+
+
+def assign_speakers(result: dict, turns: list) -> dict:
+    """
+    Labels WhisperX words and segments in place (word["speaker"], seg["speaker"]).
+
+    Words are matched to the turn they overlap most in one forward sweep over
+    both sorted lists; untimed words borrow their neighbour's speaker and each
+    segment takes its words' majority speaker.
+    """
+    if not turns:
+        return result
+    starts = [t["start"] for t in turns]
+    ends = [t["end"] for t in turns]
+    j = 0
+    for seg in result.get("segments", []):
+        words = seg.get("words") or [{"start": seg.get("start"), "end": seg.get("end")}]
+        last = None
+        for w in words:
+            if w.get("start") is None:
+                w["speaker"] = last
+                continue
+            ws = w["start"]
+            we = w["end"] if w.get("end") is not None else ws
+            while j + 1 < len(turns) and ends[j] <= ws:
+                j += 1
+            best, overlap, k = turns[j]["speaker"], -1.0, j
+            while k < len(turns) and starts[k] < max(we, ws + 1e-3):
+                ov = min(we, ends[k]) - max(ws, starts[k])
+                if ov > overlap:
+                    best, overlap = turns[k]["speaker"], ov
+                k += 1
+            w["speaker"] = last = best
+        votes = {}
+        for w in words:
+            if w.get("speaker"):
+                votes[w["speaker"]] = votes.get(w["speaker"], 0.0) + max((w.get("end") or 0) - (w.get("start") or 0), 0.01)
+        seg["speaker"] = max(votes, key=votes.get) if votes else "Unknown"
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    if len(sys.argv) < 2:
+        print("Usage: python diarizer.py <audio_file> [num_speakers]")
+        sys.exit(1)
+    from ingest import load_audio
+    audio = load_audio(sys.argv[1])
+    t0 = time.perf_counter()
+    turns = diarize(audio, num_speakers=int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    wall = time.perf_counter() - t0
+    for t in turns:
+        print(f"[{t['start']:.2f} - {t['end']:.2f}] {t['speaker']}")
+    speakers = len({t['speaker'] for t in turns})
+    print(f"✅ {speakers} speaker(s), {len(turns)} turns in {wall:.2f}s (RTF {wall / (len(audio) / SAMPLE_RATE):.3f})")
@@ -0,0 +1,209 @@
+# exporter.py
+"""
+Export Module
+-------------
+On-demand Markdown / PDF / SRT / VTT exports, cached on disk by content hash.
+
+Each export is written once to <root>/<sha256>.<ext>, where the hash covers
+the export format and everything that goes into it. Asking again for the
+same content (e.g. on every Streamlit rerun) is one os.path.exists call.
+
+SRT and VTT are streamed cue by cue from aligned segments straight into the
+output file, so a multi-hour transcript never becomes one giant string.
+Long segments are split into cues of at most two 42-character lines, with
+times interpolated by character count.
+
+The PDF font (DejaVuSans, Bitstream Vera licence) ships in assets/fonts,
+so nothing is downloaded at run time.
+
+Usage:
+    engine = ExportEngine()
+    key = content_key(transcript_text, summary)
+    md_path = engine.markdown(key, title, date, transcript_text, summary)
+    srt_path = engine.srt(key, segments)       # dicts or (start, end, speaker, text) tuples
+"""
+
+import hashlib
+import os
+import tempfile
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "speech_summarizer", "exports")
+FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "fonts", "DejaVuSans.ttf")
+FORMATS = {"md": "text/markdown", "pdf": "application/pdf", "srt": "application/x-subrip", "vtt": "text/vtt"}
+LINE_CHARS = 42
+CUE_LINES = 2
+RENDER_VERSION = 1  # bump when the output layout changes
+
+
+def content_key(*parts) -> str:
+    """sha256 over the given strings (hash the big transcript once, reuse the key on reruns)."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+# ---------------------------
+# RENDERERS
+# ---------------------------
+def build_markdown(title, date, transcript, summary, speakers=""):
+    return f"""# {title or 'Meeting Summary'}
+Date: {date}{f"  |  Speakers: {speakers}" if speakers else ""}
+
+---
+
+## Transcription
+{transcript or "(empty)"}
+
+## Summary
+{summary or "(empty)"}
+"""
+
+
+def markdown_to_pdf(md_text: str) -> bytes:
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.add_font("DejaVu", "", FONT_PATH, uni=True)
+    pdf.set_font("DejaVu", size=12)
+    width = pdf.w - pdf.l_margin - pdf.r_margin
+    pdf.multi_cell(width, 6, md_text)  # one call: multi_cell handles the line breaks itself
+    out = pdf.output(dest="S")
+    return bytes(out) if isinstance(out, (bytes, bytearray)) else out.encode("latin1", "ignore")
+
+
+def _segment_tuples(segments):
+    for seg in segments:
+        if isinstance(seg, dict):
+            yield seg["start"], seg["end"], seg.get("speaker"), seg.get("text", "")
+        else:
+            yield seg
+
+
+def _wrap(text: str, width: int):
+    """Greedy word wrap (textwrap.wrap is several times slower on long transcripts)."""
+    lines, line = [], ""
+    for word in text.split():
+        if not line:
+            line = word
+        elif len(line) + 1 + len(word) <= width:
+            line += " " + word
+        else:
+            lines.append(line)
+            line = word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def iter_cues(segments, line_chars: int = LINE_CHARS, cue_lines: int = CUE_LINES):
+    """Yields (start, end, speaker, lines) with at most cue_lines lines of line_chars each."""
+    for start, end, speaker, text in _segment_tuples(segments):
+        lines = _wrap(str(text), line_chars)
+        if not lines:
+            continue
+        total = sum(len(line) for line in lines) or 1
+        t, per_char = float(start), (float(end) - float(start)) / total
+        for i in range(0, len(lines), cue_lines):
+            group = lines[i:i + cue_lines]
+            t_end = t + per_char * sum(len(line) for line in group)
+            yield t, t_end, speaker, group
+            t = t_end
+
+
+def _timestamp(seconds: float, sep: str) -> str:
+    ms = int(round(max(seconds, 0.0) * 1000))
+    h, ms = divmod(ms, 3600000)
+    m, ms = divmod(ms, 60000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
+
+def iter_srt(segments, speakers: bool = True):
+    for n, (start, end, speaker, lines) in enumerate(iter_cues(segments), 1):
+        prefix = f"{speaker}: " if speakers and speaker and speaker != "Unknown" else ""
+        yield f"{n}\n{_timestamp(start, ',')} --> {_timestamp(end, ',')}\n{prefix}" + "\n".join(lines) + "\n\n"
+
+
+def iter_vtt(segments, speakers: bool = True):
+    yield "WEBVTT\n\n"
+    for start, end, speaker, lines in iter_cues(segments):
+        voice = f"<v {speaker}>" if speakers and speaker and speaker != "Unknown" else ""
+        yield f"{_timestamp(start, '.')} --> {_timestamp(end, '.')}\n{voice}" + "\n".join(lines) + "\n\n"
+
+
+# ---------------------------
+# ENGINE
+# ---------------------------
+class ExportEngine:
+    """
+    Content-addressed export files.
+
+    Args:
+        root (str): Output directory (shared by every session and process).
+    """
+
+    def __init__(self, root: str = DEFAULT_DIR):
+        self.root = root
+        self.renders = 0  # exports actually produced (cache misses)
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key: str, fmt: str) -> str:
+        return os.path.join(self.root, f"{content_key(fmt, key, RENDER_VERSION)}.{fmt}")
+
+    def _get(self, key: str, fmt: str, write) -> str:
+        """Returns the cached file, or runs write(file) into a temp file and publishes it atomically."""
+        path = self.path(key, fmt)
+        if os.path.exists(path):
+            return path
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        self.renders += 1
+        return path
+
+    @staticmethod
+    def _stream(chunks, batch: int = 500):
+        """Writer that encodes `batch` chunks at a time: bounded memory, few write calls."""
+        def write(f):
+            pending = []
+            for chunk in chunks:
+                pending.append(chunk)
+                if len(pending) >= batch:
+                    f.write("".join(pending).encode("utf-8"))
+                    pending.clear()
+            f.write("".join(pending).encode("utf-8"))
+        return write
+
+    def markdown(self, key, title, date, transcript, summary, speakers="") -> str:
+        md = lambda: build_markdown(title, date, transcript, summary, speakers)
+        return self._get(content_key(key, title, date, speakers), "md", lambda f: f.write(md().encode("utf-8")))
+
+    def pdf(self, key, title, date, transcript, summary, speakers="") -> str:
+        md = lambda: build_markdown(title, date, transcript, summary, speakers)
+        return self._get(content_key(key, title, date, speakers), "pdf", lambda f: f.write(markdown_to_pdf(md())))
+
+    def srt(self, key, segments, speakers: bool = True) -> str:
+        return self._get(content_key(key, speakers), "srt", self._stream(iter_srt(segments, speakers)))
+
+    def vtt(self, key, segments, speakers: bool = True) -> str:
+        return self._get(content_key(key, speakers), "vtt", self._stream(iter_vtt(segments, speakers)))
+
+
+_ENGINE = None
+
+
+def get_export_engine() -> ExportEngine:
+    global _ENGINE
+    if _ENGINE is None:
+        _ENGINE = ExportEngine(os.environ.get("EXPORT_CACHE_DIR", DEFAULT_DIR))
+    return _ENGINE
@@ -0,0 +1,210 @@
+# inference_client.py
+"""
+Inference Client Module
+-----------------------
+Thin client for the local inference daemon (inference_server.py).
+
+The daemon owns the loaded models (WhisperX, align models, faster-whisper /
+Vosk engines, the summarizer); CLI runs, batch workers and Streamlit
+sessions send it requests over a Unix socket instead of loading private
+copies. Messages are length-prefixed JSON. Audio never travels through the
+socket: it is passed as a file path (the daemon maps the canonical PCM,
+see ingest.py) or as the name of a shared-memory block holding float32
+samples.
+
+This module only imports the standard library (numpy when an array is
+sent), so creating a client is instant.
+
+Settings:
+    INFERENCE           auto (use the daemon when it answers, default) | off | required
+    INFERENCE_SOCKET    socket path (default ~/.cache/speech_summarizer/inference.sock)
+
+Usage:
+    client = get_client()            # None when no daemon is running (INFERENCE=auto)
+    if client:
+        result = client.transcribe("meeting.wav", model_size="small", compute_type="int8")
+        summary = client.summarize(text)
+"""
+
+import json
+import os
+import socket
+import struct
+import threading
+from contextlib import contextmanager
+
+DEFAULT_SOCKET = os.path.join(os.path.expanduser("~"), ".cache", "speech_summarizer", "inference.sock")
+HEADER = struct.Struct("!I")
+
+
+class InferenceError(RuntimeError):
+    """Raised when the daemon reports a failed request."""
+
+
+def socket_path() -> str:
+    return os.environ.get("INFERENCE_SOCKET", DEFAULT_SOCKET)
+
+
+# ---------------------------
+# WIRE FORMAT
+# ---------------------------
+def _json_default(obj):
+    if hasattr(obj, "item"):  # numpy scalars
+        return obj.item()
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return str(obj)
+
+
+def send_msg(sock, obj):
+    data = json.dumps(obj, default=_json_default).encode("utf-8")
+    sock.sendall(HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(min(n - len(buf), 1 << 20))
+        if not chunk:
+            raise ConnectionError("inference daemon closed the connection")
+        buf += chunk
+    return bytes(buf)
+
+
+def recv_msg(sock):
+    header = sock.recv(HEADER.size)
+    if not header:
+        return None  # peer closed between messages
+    if len(header) < HEADER.size:
+        header += _recv_exact(sock, HEADER.size - len(header))
+    return json.loads(_recv_exact(sock, HEADER.unpack(header)[0]).decode("utf-8"))
+
+
+@contextmanager
+def audio_ref(audio):
+    """
+    Payload for a path or a float32 array.
+
+    Arrays are copied once into a shared-memory block that the daemon maps;
+    the block is unlinked when the request is done.
+    """
+    if isinstance(audio, (str, os.PathLike)):
+        yield {"path": os.path.abspath(audio)}
+        return
+    import numpy as np
+    from multiprocessing import shared_memory
+    samples = np.ascontiguousarray(audio, dtype=np.float32)
+    shm = shared_memory.SharedMemory(create=True, size=max(samples.nbytes, 1))
+    try:
+        np.ndarray(samples.shape, dtype=np.float32, buffer=shm.buf)[:] = samples
+        yield {"shm": shm.name, "length": int(samples.shape[0])}
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+# ---------------------------
+# CLIENT
+# ---------------------------
+class InferenceClient:
+    """
+    Connection to the daemon; one socket per calling thread, so it can be shared by worker pools.
+
+    Args:
+        path (str): Unix socket path.
+        timeout (float): Socket timeout in seconds (None = wait for long transcriptions).
+    """
+
+    def __init__(self, path: str = None, timeout: float = None):
+        self.path = path or socket_path()
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _sock(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            self._local.sock = sock
+        return sock
+
+    def close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def call(self, op: str, **payload):
+        sock = self._sock()
+        try:
+            send_msg(sock, {"op": op, **payload})
+            reply = recv_msg(sock)
+        except (OSError, ValueError):
+            self.close()  # next call reconnects
+            raise
+        if reply is None:
+            self.close()
+            raise ConnectionError("inference daemon closed the connection")
+        if not reply.get("ok"):
+            raise InferenceError(reply.get("error", "unknown error"))
+        return reply.get("result")
+
+    def ping(self) -> bool:
+        try:
+            return self.call("ping")["pid"] > 0
+        except (OSError, ValueError, InferenceError, TypeError, KeyError):
+            return False
+
+    def stats(self) -> dict:
+        return self.call("stats")
+
+    # ---- model calls ----
+    def transcribe(self, audio, model_size: str = "small", device: str = "cpu", compute_type: str = "float32",
+                   language: str = None) -> dict:
+        """WhisperX transcription; returns the WhisperX result plus "duration" in seconds."""
+        with audio_ref(audio) as ref:
+            return self.call("transcribe", audio=ref, model_size=model_size, device=device,
+                             compute_type=compute_type, language=language)
+
+    def align(self, segments: list, language: str, audio, device: str = "cpu") -> dict:
+        with audio_ref(audio) as ref:
+            return self.call("align", segments=segments, language=language, audio=ref, device=device)
+
+    def stt(self, engine: str, engine_kwargs: dict, audio) -> list:
+        """One chunk through a chunked_stt engine held by the daemon."""
+        with audio_ref(audio) as ref:
+            return self.call("stt", engine=engine, kwargs=engine_kwargs, audio=ref)
+
+    def summarize(self, text: str, model_name: str = "t5-small", max_length: int = 120, min_length: int = 25,
+                  long_document: bool = True, **long_kwargs) -> str:
+        return self.call("summarize", text=text, model_name=model_name, max_length=max_length,
+                         min_length=min_length, long_document=long_document, long_kwargs=long_kwargs)
+
+
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_client():
+    """
+    The shared client when the daemon is reachable, else None (INFERENCE=auto).
+
+    Raises:
+        ConnectionError: INFERENCE=required and the daemon does not answer.
+    """
+    mode = os.environ.get("INFERENCE", "auto")
+    if mode == "off":
+        return None
+    path = socket_path()
+    if mode != "required" and not os.path.exists(path):
+        return None
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(path)
+        if client is None:
+            client = _CLIENTS[path] = InferenceClient(path)
+    if client.ping():
+        return client
+    if mode == "required":
+        raise ConnectionError(f"inference daemon not reachable at {path} (start: python inference_server.py)")
+    return None
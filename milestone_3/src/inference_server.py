@@ -0,0 +1,204 @@
+# inference_server.py
+"""
+Inference Server Module
+-----------------------
+Long-lived local daemon that owns the loaded models for every process on
+the host (CLI runs, batch workers, Streamlit sessions).
+
+It listens on a Unix socket (mode 0600) and serves length-prefixed JSON
+requests from inference_client.py, one thread per connection:
+
+    ping / stats                      liveness, model registry stats, request counters
+    transcribe  {audio, model_size, device, compute_type, language}
+    align       {segments, language, audio, device}
+    stt         {engine, kwargs, audio}    one chunk through a chunked_stt engine
+    summarize   {text, model_name, max_length, min_length, long_document, long_kwargs}
+
+`audio` is {"path": ...} (mapped through ingest.load_audio, so every client
+shares the canonical PCM pages) or {"shm": name, "length": n} for float32
+samples in shared memory. Models live in the usual model registry, so the
+RAM budget (MODEL_REGISTRY_MAX_MB) applies to the whole host.
+
+Usage:
+    python inference_server.py                       # socket from INFERENCE_SOCKET
+    python inference_server.py --preload whisperx summarizer
+"""
+
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from inference_client import recv_msg, send_msg, socket_path
+
+# Requests handled here must run on this process's models, never loop back to the daemon.
+os.environ["INFERENCE"] = "off"
+
+
+@contextmanager
+def open_audio(ref: dict):
+    """float32 samples for an audio payload (memmap for paths, a view of the block for shared memory)."""
+    import numpy as np
+    if "path" in ref:
+        from ingest import load_audio
+        yield load_audio(ref["path"])
+        return
+    from multiprocessing import resource_tracker, shared_memory
+    shm = shared_memory.SharedMemory(name=ref["shm"])
+    resource_tracker.unregister(shm._name, "shared_memory")  # the client owns and unlinks the block
+    try:
+        yield np.ndarray((ref["length"],), dtype=np.float32, buffer=shm.buf)
+    finally:
+        try:
+            shm.close()
+        except BufferError:  # a model kept a view; the mapping goes with the last reference
+            pass
+
+
+# ---------------------------
+# HANDLERS
+# ---------------------------
+class InferenceService:
+    """Request handlers; models come from the process-wide registry."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests = {}
+        self.busy_seconds = 0.0
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    def handle(self, request: dict):
+        op = request.pop("op", None)
+        handler = getattr(self, f"op_{op}", None)
+        if handler is None:
+            raise ValueError(f"unknown op '{op}'")
+        t0 = time.perf_counter()
+        try:
+            return handler(**request)
+        finally:
+            with self._lock:
+                self.requests[op] = self.requests.get(op, 0) + 1
+                self.busy_seconds += time.perf_counter() - t0
+
+    def op_ping(self):
+        return {"pid": os.getpid(), "uptime": round(time.time() - self.started, 1)}
+
+    def op_stats(self):
+        from model_registry import get_registry
+        with self._lock:
+            counters = {"requests": dict(self.requests), "busy_seconds": round(self.busy_seconds, 3),
+                        "engines": [name for name, _ in self._engines]}
+        from summarizer import get_summary_batcher
+        batcher = get_summary_batcher()
+        return {"pid": os.getpid(), "uptime": round(time.time() - self.started, 1), **counters,
+                "registry": get_registry().stats(), "summary_batcher": batcher.stats() if batcher else None}
+
+    def op_transcribe(self, audio, model_size="small", device="cpu", compute_type="float32", language=None):
+        from model_registry import get_model
+        model = get_model("whisperx", model_size, device=device, compute_type=compute_type)
+        with open_audio(audio) as samples:
+            result = model.transcribe(samples, language=language) if language else model.transcribe(samples)
+            result["duration"] = len(samples) / 16000
+        return result
+
+    def op_align(self, segments, language, audio, device="cpu"):
+        import whisperx
+        from model_registry import get_model
+        model_a, metadata = get_model("align", None, device=device, language=language)
+        with open_audio(audio) as samples:
+            return whisperx.align(segments, model_a, metadata, samples, device)
+
+    def op_stt(self, engine, kwargs, audio):
+        from chunked_stt import ENGINES
+        key = (engine, tuple(sorted(kwargs.items())))
+        with self._lock:
+            instance = self._engines.get(key)
+        if instance is None:
+            instance = ENGINES[engine](**kwargs)  # the model itself is shared through the registry
+            with self._lock:
+                instance = self._engines.setdefault(key, instance)
+        with open_audio(audio) as samples:
+            return instance.transcribe(samples)
+
+    def op_summarize(self, text, model_name="t5-small", max_length=120, min_length=25, long_document=True,
+                     long_kwargs=None):
+        from summarizer import _summarize
+        return _summarize(text, model_name, max_length, min_length, long_document, **(long_kwargs or {}))
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        service = self.server.service
+        while True:
+            try:
+                request = recv_msg(self.connection)
+            except (OSError, ValueError):
+                return
+            if request is None:
+                return
+            try:
+                reply = {"ok": True, "result": service.handle(request)}
+            except Exception as e:
+                reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            try:
+                send_msg(self.connection, reply)
+            except OSError:
+                return
+
+
+class InferenceServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str = None):
+        self.path = path or socket_path()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if os.path.exists(self.path):
+            os.remove(self.path)  # stale socket from a previous run
+        self.service = InferenceService()
+        super().__init__(self.path, _Handler)
+        os.chmod(self.path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def preload(kinds, model_size="small", compute_type=None, summarizer_model="t5-small"):
+    """Loads models before the first request (kinds: whisperx, summarizer)."""
+    from model_registry import get_model
+    if "whisperx" in kinds:
+        from precision import resolve_compute_type
+        get_model("whisperx", model_size, compute_type=compute_type or resolve_compute_type(model_size=model_size))
+    if "summarizer" in kinds:
+        get_model("summarizer", summarizer_model)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Local inference daemon shared by all entry points")
+    parser.add_argument("--socket", default=None, help="Unix socket path (default INFERENCE_SOCKET)")
+    parser.add_argument("--preload", nargs="*", default=[], choices=("whisperx", "summarizer"),
+                        help="models to load before serving")
+    args = parser.parse_args(argv)
+
+    server = InferenceServer(args.socket)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # service managers stop with SIGTERM: still remove the socket
+    if args.preload:
+        print(f"⏳ Preloading {', '.join(args.preload)}...")
+        preload(args.preload)
+    print(f"✅ Inference daemon (pid {os.getpid()}) listening on {server.path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping inference daemon")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# ingest.py
+"""
+Ingest Module
+-------------
+Upload ingestion and canonical audio access.
+
+1. save_upload() streams an uploaded file to disk in 1 MB chunks while
+   hashing it, and stores it once as <uploads>/<sha256><original suffix>.
+   session_upload() does that once per Streamlit upload (memoized by file
+   id), so reruns do not hash and rewrite the file again.
+2. canonical_pcm() transcodes a file once to raw 16 kHz mono float32
+   (<pcm cache>/<sha256>.f32). Decoding is streamed block by block:
+   soundfile for files it reads that are already 16 kHz, an ffmpeg pipe for
+   everything else (other sample rates, m4a, mp4, ...; ffmpeg's resampler
+   low-passes before decimating, so nothing aliases into the speech band),
+   and the decoded audio never sits in RAM as a whole.
+3. load_audio() returns a copy-on-write np.memmap of the canonical PCM:
+   every stage (STT, alignment, diarization) shares the same page cache
+   instead of decoding the file again.
+
+Settings:
+    UPLOAD_DIR          uploaded files (default ~/.cache/speech_summarizer/uploads)
+    UPLOAD_MAX_MB       size limit before the least recently used uploads go (default 4096)
+    PCM_CACHE_DIR       canonical PCM (default ~/.cache/speech_summarizer/pcm)
+    PCM_CACHE_MAX_MB    size limit before the least recently used files go (default 4096)
+
+Usage:
+    path = save_upload(uploaded_file)      # Streamlit UploadedFile or any binary file object
+    samples = load_audio(path)             # np.memmap, float32, 16 kHz mono
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+
+import numpy as np
+
+from artifact_cache import get_cache
+
+SAMPLE_RATE = 16000
+CACHE_ROOT = os.path.join(os.path.expanduser("~"), ".cache", "speech_summarizer")
+UPLOAD_DIR = os.environ.get("UPLOAD_DIR", os.path.join(CACHE_ROOT, "uploads"))
+UPLOAD_MAX_BYTES = int(float(os.environ.get("UPLOAD_MAX_MB", "4096")) * 1024 * 1024)
+PCM_DIR = os.environ.get("PCM_CACHE_DIR", os.path.join(CACHE_ROOT, "pcm"))
+PCM_MAX_BYTES = int(float(os.environ.get("PCM_CACHE_MAX_MB", "4096")) * 1024 * 1024)
+CHUNK_BYTES = 1 << 20
+MIME_TYPES = {".wav": "audio/wav", ".mp3": "audio/mpeg", ".m4a": "audio/mp4", ".flac": "audio/flac", ".ogg": "audio/ogg"}
+
+
+# ---------------------------
+# UPLOADS
+# ---------------------------
+def save_upload(uploaded, root: str = UPLOAD_DIR, name: str = None) -> str:
+    """
+    Streams a file object to <root>/<sha256><suffix>; an identical upload is stored once.
+
+    Args:
+        uploaded: Binary file object (Streamlit UploadedFile, open file, BytesIO).
+        name (str): Original file name, for its suffix (defaults to uploaded.name).
+
+    Returns:
+        str: Path of the stored file.
+    """
+    suffix = os.path.splitext(name or getattr(uploaded, "name", "") or "")[1].lower() or ".bin"
+    os.makedirs(root, exist_ok=True)
+    if hasattr(uploaded, "seek"):
+        uploaded.seek(0)
+    h = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(dir=root, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in iter(lambda: uploaded.read(CHUNK_BYTES), b""):
+                h.update(chunk)
+                f.write(chunk)
+        path = os.path.join(root, h.hexdigest() + suffix)
+        if os.path.exists(path):
+            os.remove(tmp)
+            os.utime(path)  # recently used: evicted last
+        else:
+            os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    evict(root, UPLOAD_MAX_BYTES, keep=path)
+    return path
+
+
+def session_upload(uploaded) -> str:
+    """save_upload() once per Streamlit upload; reruns reuse the path stored in st.session_state."""
+    import streamlit as st
+    file_id = getattr(uploaded, "file_id", None) or (uploaded.name, uploaded.size)
+    saved = st.session_state.get("saved_upload")
+    if saved is None or saved[0] != file_id or not os.path.exists(saved[1]):
+        saved = (file_id, save_upload(uploaded))
+        st.session_state.saved_upload = saved
+    return saved[1]
+
+
+def mime_type(path: str) -> str:
+    return MIME_TYPES.get(os.path.splitext(path)[1].lower(), "audio/wav")
+
+
+# ---------------------------
+# DECODERS
+# ---------------------------
+def _soundfile_blocks(path: str, block_seconds: float):
+    import soundfile as sf
+    for block in sf.blocks(path, blocksize=int(block_seconds * SAMPLE_RATE), dtype="float32", always_2d=True):
+        yield block.mean(axis=1)
+
+
+def _ffmpeg_blocks(path: str, block_seconds: float):
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError(f"Cannot decode {os.path.basename(path)}: install ffmpeg to decode or resample it")
+    cmd = ["ffmpeg", "-nostdin", "-v", "error", "-i", path, "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    block_bytes = int(block_seconds * SAMPLE_RATE) * 4
+    try:
+        for chunk in iter(lambda: proc.stdout.read(block_bytes), b""):
+            yield np.frombuffer(chunk[:len(chunk) // 4 * 4], dtype=np.float32)
+    finally:
+        proc.stdout.close()
+        err = proc.stderr.read().decode("utf-8", "replace")
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed on {os.path.basename(path)}: {err.strip()}")
+
+
+def decode_blocks(path: str, block_seconds: float = 10.0):
+    """Yields 16 kHz mono float32 blocks; soundfile for 16 kHz files, ffmpeg for the rest."""
+    import soundfile as sf
+    try:
+        info = sf.info(path)
+    except Exception:
+        return _ffmpeg_blocks(path, block_seconds)
+    if info.samplerate != SAMPLE_RATE:
+        return _ffmpeg_blocks(path, block_seconds)  # band-limited resampling
+    return _soundfile_blocks(path, block_seconds)
+
+
+# ---------------------------
+# CANONICAL PCM
+# ---------------------------
+def canonical_pcm(path: str, root: str = PCM_DIR) -> str:
+    """
+    Transcodes `path` to raw 16 kHz mono float32 once, keyed by its content hash.
+
+    Returns:
+        str: Path of the .f32 file.
+    """
+    out = os.path.join(root, get_cache().digest(path) + ".f32")
+    if os.path.exists(out):
+        os.utime(out)  # recently used: evicted last
+        return out
+    os.makedirs(root, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=root, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for block in decode_blocks(path):
+                f.write(np.ascontiguousarray(block, dtype="<f4").tobytes())
+        os.replace(tmp, out)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    evict(root, keep=out)
+    return out
+
+
+def load_audio(path: str) -> np.ndarray:
+    """16 kHz mono float32 samples of any audio file as a memory map (copy-on-write, never written back)."""
+    pcm = canonical_pcm(path)
+    if os.path.getsize(pcm) == 0:
+        return np.zeros(0, dtype=np.float32)
+    return np.memmap(pcm, dtype=np.float32, mode="c")
+
+
+def evict(root: str = PCM_DIR, max_bytes: int = PCM_MAX_BYTES, keep: str = None):
+    """Removes the least recently used files (PCM or uploads) once the folder outgrows max_bytes."""
+    entries = []
+    for name in os.listdir(root):
+        if not name.endswith(".part"):
+            st = os.stat(os.path.join(root, name))
+            entries.append((st.st_mtime, st.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        if os.path.join(root, name) == keep:  # the file just written, even when it alone exceeds the budget
+            continue
+        try:
+            os.remove(os.path.join(root, name))  # an open memmap keeps its pages until unmapped
+            total -= size
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    if len(sys.argv) < 2:
+        print("Usage: python ingest.py <audio_file>")
+        sys.exit(1)
+    t0 = time.perf_counter()
+    samples = load_audio(sys.argv[1])
+    print(f"✅ {len(samples) / SAMPLE_RATE:.1f}s of audio in {time.perf_counter() - t0:.2f}s → {canonical_pcm(sys.argv[1])}")
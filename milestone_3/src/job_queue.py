@@ -0,0 +1,238 @@
+# job_queue.py
+"""
+Job Queue Module
+----------------
+Process-local background jobs for the Streamlit apps.
+
+Submitting work returns a job id straight away; the function runs on a
+bounded pool of worker threads and reports stage-level progress through
+the Job handle it receives as first argument. Heavy jobs (model calls,
+transcription) additionally pass an admission gate, so at most
+`max_heavy` of them run at once no matter how many users submit work.
+
+Cancellation is cooperative: a queued job is dropped before it starts, a
+running one stops at its next `job.report(...)` / `job.check()` call.
+Finished jobs are kept for `keep_seconds`, so a browser refresh can
+reattach to a job by id and pick up its result.
+
+Settings:
+    JOB_WORKERS      worker threads (default 4)
+    JOB_MAX_HEAVY    heavy jobs running at once (default: half the CPUs, at least 1)
+    JOB_MAX_PENDING  queued jobs before submissions are refused (default 32)
+
+Usage:
+    queue = get_job_queue()
+    job_id = queue.submit(process, audio_path, owner=session_key)
+    job = queue.get(job_id)          # job.status, job.stage, job.progress
+    queue.cancel(job_id)
+"""
+
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function when its job was cancelled."""
+
+
+class QueueFull(RuntimeError):
+    """Raised by submit() when too many jobs are already waiting."""
+
+
+class Job:
+    """Handle shared between the worker running a job and the UI polling it."""
+
+    def __init__(self, fn, args, kwargs, kind="", heavy=True, owner=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.fn, self.args, self.kwargs = fn, args, kwargs
+        self.kind = kind or getattr(fn, "__name__", "job")
+        self.heavy = heavy
+        self.owner = owner
+        self.status = QUEUED
+        self.stage = "queued"
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = self.finished = None
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    # ---- called from the job function ----
+    def report(self, stage: str, progress: float = None):
+        """Publishes the current stage (and 0..1 progress); raises JobCancelled if cancelled."""
+        self.check()
+        self.stage = stage
+        if progress is not None:
+            self.progress = min(max(float(progress), 0.0), 1.0)
+
+    def check(self):
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+    # ---- called from the UI ----
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in FINISHED
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._done.wait(timeout)
+
+    def snapshot(self) -> dict:
+        now = self.finished or time.time()
+        return {
+            "id": self.id, "kind": self.kind, "status": self.status, "stage": self.stage,
+            "progress": round(self.progress, 3), "error": self.error,
+            "queued_s": round((self.started or now) - self.created, 3),
+            "run_s": round(now - self.started, 3) if self.started else None,
+        }
+
+    def _finish(self, status, result=None, error=None):
+        self.status, self.result, self.error = status, result, error
+        self.finished = time.time()
+        if status == DONE:
+            self.stage, self.progress = "done", 1.0
+        self._done.set()
+
+
+class JobQueue:
+    """
+    Bounded worker pool with an admission gate for heavy jobs.
+
+    Args:
+        workers (int): Worker threads (light jobs can run while heavy ones wait for a slot).
+        max_heavy (int): Heavy jobs allowed to run at the same time.
+        max_pending (int): Queued jobs before submit() raises QueueFull.
+        keep_seconds (float): How long finished jobs stay retrievable.
+    """
+
+    def __init__(self, workers: int = 4, max_heavy: int = 1, max_pending: int = 32, keep_seconds: float = 3600):
+        self.max_heavy = max(1, max_heavy)
+        self.max_pending = max_pending
+        self.keep_seconds = keep_seconds
+        self._queue = queue.Queue()
+        self._heavy = threading.BoundedSemaphore(self.max_heavy)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._work, daemon=True, name=f"job-worker-{i}")
+                         for i in range(max(1, workers))]
+        for t in self._threads:
+            t.start()
+
+    # ---------------------------
+    # SUBMIT / LOOKUP
+    # ---------------------------
+    def submit(self, fn, *args, kind: str = "", heavy: bool = True, owner=None, **kwargs) -> str:
+        """
+        Queues fn(job, *args, **kwargs).
+
+        Returns:
+            str: The job id.
+        """
+        self._prune()
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j.status == QUEUED)
+            if pending >= self.max_pending:
+                raise QueueFull(f"{pending} jobs already waiting, try again shortly")
+            job = Job(fn, args, kwargs, kind, heavy, owner)
+            self._jobs[job.id] = job
+        self._queue.put(job)
+        return job.id
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, owner=None):
+        with self._lock:
+            return [j for j in self._jobs.values() if owner is None or j.owner == owner]
+
+    def position(self, job_id: str) -> int:
+        """Number of jobs queued ahead of this one (0 once it runs)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return 0
+            return sum(1 for j in self._jobs.values() if j.status == QUEUED and j.created < job.created)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        if job is None or job.is_finished:
+            return False
+        job._cancel.set()
+        if job.status == QUEUED:
+            job.stage = "cancelling"
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {}
+            for j in self._jobs.values():
+                counts[j.status] = counts.get(j.status, 0) + 1
+        return {"workers": len(self._threads), "max_heavy": self.max_heavy, **counts}
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_seconds
+        with self._lock:
+            for job_id in [k for k, j in self._jobs.items() if j.finished and j.finished < cutoff]:
+                del self._jobs[job_id]
+
+    # ---------------------------
+    # WORKERS
+    # ---------------------------
+    def _admit(self, job) -> bool:
+        """Waits for a heavy slot; gives up if the job is cancelled meanwhile."""
+        job.stage = "waiting for a free slot"
+        while not self._heavy.acquire(timeout=0.25):
+            if job.cancel_requested:
+                return False
+        return True
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job.cancel_requested:
+                job._finish(CANCELLED)
+                continue
+            if job.heavy and not self._admit(job):
+                job._finish(CANCELLED)
+                continue
+            try:
+                job.status, job.stage, job.started = RUNNING, "starting", time.time()
+                result = job.fn(job, *job.args, **job.kwargs)
+                job._finish(DONE, result)
+            except JobCancelled:
+                job._finish(CANCELLED)
+            except Exception as e:
+                job._finish(FAILED, error=f"{e}\n{traceback.format_exc()}")
+            finally:
+                if job.heavy:
+                    self._heavy.release()
+
+
+_QUEUE = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide queue configured from the environment (shared by every Streamlit session)."""
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is None:
+            _QUEUE = JobQueue(
+                workers=int(os.environ.get("JOB_WORKERS", "4")),
+                max_heavy=int(os.environ.get("JOB_MAX_HEAVY", str(max(1, (os.cpu_count() or 2) // 2)))),
+                max_pending=int(os.environ.get("JOB_MAX_PENDING", "32")),
+            )
+        return _QUEUE
@@ -0,0 +1,171 @@
+# lazy_imports.py
+"""
+Lazy Imports Module
+-------------------
+Keeps ML frameworks out of the Streamlit apps' first paint.
+
+lazy_import("torch") returns a stand-in module that runs the real import on
+first attribute access, so `torch = lazy_import("torch")` at the top of a
+script costs nothing until `torch.cuda...` actually runs. prewarm() imports
+heavy modules on a background thread (call it at the end of the script, once
+the page is drawn), so the first real use usually finds them loaded.
+
+check_startup() imports an entry point's top-level imports in a fresh
+interpreter and fails when that takes longer than the budget or pulls in
+one of HEAVY_MODULES.
+
+Settings:
+    PREWARM             0 disables background prewarming (default 1)
+    STARTUP_BUDGET_MS   import-time budget per entry point (default 1500)
+
+Usage:
+    torch = lazy_import("torch")
+    prewarm("torch", "whisperx")
+    python lazy_imports.py "Milestone 4/App.py" milestone_3/app.py    # exit code 1 on regression
+"""
+
+import ast
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import types
+
+HEAVY_MODULES = ("torch", "whisperx", "transformers", "faster_whisper", "ctranslate2", "vosk",
+                 "sklearn", "scipy", "speech_recognition", "sounddevice", "fpdf")
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+_LOCK = threading.Lock()
+_PREWARMED = set()
+
+
+# ---------------------------
+# FACADE
+# ---------------------------
+class LazyModule(types.ModuleType):
+    """Module stand-in that imports the real module on first attribute access."""
+
+    def _load(self):
+        module = self.__dict__.get("_module")
+        if module is None:
+            with _LOCK:
+                module = self.__dict__.get("_module")
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    @property
+    def loaded(self) -> bool:
+        return self.__dict__.get("_module") is not None
+
+    def __repr__(self):
+        return f"<lazy module '{self.__name__}' ({'loaded' if self.loaded else 'not loaded'})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """The real module if it is already imported, otherwise a LazyModule for it."""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def prewarm(*targets, delay: float = 0.0):
+    """
+    Imports modules (names) or runs warm-up callables on a daemon thread, once per process.
+
+    Returns:
+        threading.Thread or None: The warm-up thread, None if there was nothing left to do.
+    """
+    if os.environ.get("PREWARM", "1") == "0":
+        return None
+    with _LOCK:
+        todo = [t for t in targets if t not in _PREWARMED]
+        _PREWARMED.update(todo)
+    if not todo:
+        return None
+
+    def run():
+        time.sleep(delay)
+        for target in todo:
+            try:
+                target() if callable(target) else importlib.import_module(target)
+            except Exception as e:  # a missing optional dependency only costs the warm-up
+                print(f"⚠️ prewarm {getattr(target, '__name__', target)}: {e}")
+
+    thread = threading.Thread(target=run, daemon=True, name="prewarm")
+    thread.start()
+    return thread
+
+
+# ---------------------------
+# STARTUP BUDGET
+# ---------------------------
+def top_level_imports(path: str) -> list:
+    """Modules an entry point imports at module level (including inside top-level try blocks)."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    names, body = [], list(tree.body)
+    while body:
+        node = body.pop(0)
+        if isinstance(node, ast.Try):
+            body = node.body + body
+        elif isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.append(node.module)
+    return list(dict.fromkeys(names))
+
+
+_PROBE = """
+import importlib, json, sys, time
+t0 = time.perf_counter()
+missing = []
+for name in json.loads(sys.argv[1]):
+    try:
+        importlib.import_module(name)
+    except ImportError as e:
+        missing.append(f"{name} ({e.name})")
+print(json.dumps({"ms": (time.perf_counter() - t0) * 1000, "missing": missing, "modules": sorted(sys.modules)}))
+"""
+
+
+def check_startup(path: str, budget_ms: float = None, heavy=HEAVY_MODULES) -> dict:
+    """
+    Imports `path`'s top-level imports in a fresh interpreter.
+
+    Returns:
+        dict: {"entry", "ms", "budget_ms", "heavy", "missing", "ok"}; ok is False over budget,
+        when a heavy module was imported, or when a top-level import is not installed (its
+        cost was never measured).
+    """
+    if budget_ms is None:
+        budget_ms = float(os.environ.get("STARTUP_BUDGET_MS", "1500"))
+    entry_dir = os.path.dirname(os.path.abspath(path))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([entry_dir, SRC_DIR, os.environ.get("PYTHONPATH", "")]))
+    out = subprocess.run([sys.executable, "-c", _PROBE, json.dumps(top_level_imports(path))],
+                         capture_output=True, text=True, env=env, cwd=entry_dir, check=True).stdout
+    probe = json.loads(out.strip().splitlines()[-1])
+    loaded = [m for m in heavy if m in probe["modules"]]
+    return {"entry": path, "ms": round(probe["ms"], 1), "budget_ms": budget_ms, "heavy": loaded,
+            "missing": probe["missing"], "ok": probe["ms"] <= budget_ms and not loaded and not probe["missing"]}
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Fail when an app's import-time startup regresses")
+    parser.add_argument("entries", nargs="+", help="Streamlit entry point scripts")
+    parser.add_argument("--budget-ms", type=float, default=None, help="per entry point (default STARTUP_BUDGET_MS or 1500)")
+    args = parser.parse_args()
+    failed = False
+    for entry in args.entries:
+        r = check_startup(entry, args.budget_ms)
+        mark = "✅" if r["ok"] else "❌"
+        print(f"{mark} {entry}: {r['ms']:.0f} ms (budget {r['budget_ms']:.0f} ms)"
+              + (f", heavy modules imported: {', '.join(r['heavy'])}" if r["heavy"] else "")
+              + (f", not installed: {', '.join(r['missing'])}" if r["missing"] else ""))
+        failed |= not r["ok"]
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,178 @@
+# micro_batcher.py
+"""
+Micro Batcher Module
+--------------------
+Coalesces concurrent single-item requests into batched model calls.
+
+Callers submit() one item and get a Future back. A dispatcher thread keeps
+one queue per (key, length bucket): `key` holds whatever must be identical
+inside a batch (model, generation settings), the bucket is the item's
+length // bucket_width, so a batch mixes items of similar length and
+little compute goes to padding.
+
+A queue is dispatched as soon as it holds max_batch items, or when its
+oldest item has waited max_wait seconds. A batch dispatched on the timer
+is topped up from the neighbouring buckets of the same key (nearest length
+first), so a quiet period never sends half-empty batches while compatible
+work is waiting.
+
+stats() reports the batch fill rate (items / max_batch), padding
+efficiency (real length / padded length) and how long items sat in the
+queue before their batch started (p50 / p95 / max).
+
+Usage:
+    batcher = MicroBatcher(lambda key, items: [model(x, **dict(key)) for x in items], max_batch=8)
+    future = batcher.submit(text, key=(("max_length", 120),), length=len(text))
+    summary = future.result()
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class _Request:
+    __slots__ = ("item", "length", "future", "queued", "context")
+
+    def __init__(self, item, length):
+        self.item = item
+        self.length = length
+        self.future = Future()
+        self.queued = time.perf_counter()
+        self.context = contextvars.copy_context()  # the submitter's (e.g. its tracing collector)
+
+
+class MicroBatcher:
+    """
+    Args:
+        run_batch (callable): run_batch(key, items) -> list of results, one per item, in order.
+        max_batch (int): Items per model call.
+        max_wait (float): Seconds the oldest queued item may wait for company.
+        bucket_width (int): Length units (e.g. tokens) per bucket.
+        history (int): Recent batches kept for the latency percentiles.
+    """
+
+    def __init__(self, run_batch, max_batch: int = 8, max_wait: float = 0.01, bucket_width: int = 64,
+                 history: int = 1000):
+        self.run_batch = run_batch
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait))
+        self.bucket_width = max(1, int(bucket_width))
+        self._queues = {}  # (key, bucket) -> deque[_Request]
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self._real = 0
+        self._padded = 0
+        self._waits = deque(maxlen=history * self.max_batch)
+
+    # ---- public ----
+    def submit(self, item, key=(), length: int = 0) -> Future:
+        """Queues one item; the Future resolves to its result (or raises the batch's error)."""
+        request = _Request(item, int(length))
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("batcher is closed")
+            self._queues.setdefault((key, request.length // self.bucket_width), deque()).append(request)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True, name="micro-batcher")
+                self._thread.start()
+            self._cond.notify()
+        return request.future
+
+    def __call__(self, item, key=(), length: int = 0):
+        return self.submit(item, key, length).result()
+
+    def close(self):
+        """Stops the dispatcher after the queued items have run."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self) -> dict:
+        with self._cond:
+            waits = sorted(self._waits)
+            pending = sum(len(q) for q in self._queues.values())
+            pick = lambda q: round(waits[min(len(waits) - 1, int(q * len(waits)))] * 1000, 2) if waits else 0.0
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "errors": self.errors,
+                "pending": pending,
+                "max_batch": self.max_batch,
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+                "mean_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "fill_rate": round(self.items / (self.batches * self.max_batch), 3) if self.batches else 0.0,
+                "padding_efficiency": round(self._real / self._padded, 3) if self._padded else 1.0,
+                "queue_ms_p50": pick(0.50),
+                "queue_ms_p95": pick(0.95),
+                "queue_ms_max": round(waits[-1] * 1000, 2) if waits else 0.0,
+            }
+
+    # ---- dispatcher ----
+    def _take(self, now):
+        """(batch, key, None) for the next batch to run, or (None, None, seconds until one is due)."""
+        due, wait = None, None
+        for qkey, queue in self._queues.items():
+            if len(queue) >= self.max_batch:
+                return [queue.popleft() for _ in range(self.max_batch)], qkey[0], None
+            left = queue[0].queued + self.max_wait - now
+            if left <= 0 and (due is None or queue[0].queued < self._queues[due][0].queued):
+                due = qkey
+            elif left > 0:
+                wait = left if wait is None else min(wait, left)
+        if due is None:
+            return None, None, wait
+        key, bucket = due
+        batch = list(self._queues[due])
+        self._queues[due].clear()
+        neighbours = sorted((abs(b - bucket), b) for k, b in self._queues if k == key and b != bucket)
+        for _, b in neighbours:
+            queue = self._queues[(key, b)]
+            while queue and len(batch) < self.max_batch:
+                batch.append(queue.popleft())
+            if len(batch) >= self.max_batch:
+                break
+        return batch, key, None
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    self._queues = {k: q for k, q in self._queues.items() if q}
+                    if self._closed and not self._queues:
+                        return
+                    # closing: everything queued is due now
+                    batch, key, wait = self._take(float("inf") if self._closed else time.perf_counter())
+                    if batch is not None:
+                        break
+                    self._cond.wait(wait)
+                start = time.perf_counter()
+                self.batches += 1
+                self.items += len(batch)
+                self._real += sum(r.length for r in batch)
+                self._padded += max(r.length for r in batch) * len(batch)
+                self._waits.extend(start - r.queued for r in batch)
+            batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                # Runs in the oldest request's context, so e.g. its trace gets the batch span
+                results = batch[0].context.run(self.run_batch, key, [r.item for r in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"run_batch returned {len(results)} results for {len(batch)} items")
+            except BaseException as e:
+                with self._cond:
+                    self.errors += 1
+                for r in batch:
+                    r.future.set_exception(e)
+                continue
+            for r, result in zip(batch, results):
+                r.future.set_result(result)
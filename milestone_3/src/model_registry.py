@@ -0,0 +1,230 @@
+# model_registry.py
+"""
+Model Registry Module
+---------------------
+One process-wide cache for every heavy model the project loads
+(Whisper, WhisperX, WhisperX align models and Hugging Face summarizers).
+
+Models are keyed by (kind, name, device, compute_type, language), loaded once
+and kept warm between calls. When the estimated resident size of all cached
+models goes over the RAM budget, the least recently used ones are evicted.
+
+The budget comes from the MODEL_REGISTRY_MAX_MB environment variable
+(0 or unset = unlimited) or can be set with `get_registry().set_budget(...)`.
+
+Usage:
+    from model_registry import get_model, get_registry
+    model = get_model("whisperx", "small", device="cpu", compute_type="float32")
+    print(get_registry().stats())
+"""
+
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+# ---------------------------
+# LOADERS
+# ---------------------------
+def _load_whisper(name, device, compute_type, language):
+    import whisper
+    return whisper.load_model(name, device=device)
+
+
+def _load_whisperx(name, device, compute_type, language):
+    import whisperx
+    kwargs = {"device": device, "compute_type": compute_type}
+    if language:
+        kwargs["language"] = language
+    return whisperx.load_model(name, **kwargs)
+
+
+def _load_align(name, device, compute_type, language):
+    # `name` is an optional explicit align model; WhisperX picks one per language otherwise.
+    import whisperx
+    model_a, metadata = whisperx.load_align_model(
+        language_code=language, device=device, model_name=name or None
+    )
+    return model_a, metadata
+
+
+def _load_summarizer(name, device, compute_type, language):
+    from transformers import pipeline
+    return pipeline("summarization", model=name, device=-1 if device == "cpu" else 0)
+
+
+LOADERS = {
+    "whisper": _load_whisper,
+    "whisperx": _load_whisperx,
+    "align": _load_align,
+    "summarizer": _load_summarizer,
+}
+
+
+# ---------------------------
+# MEMORY HELPERS
+# ---------------------------
+def _rss_bytes() -> int:
+    """Current resident set size of this process (0 if unknown)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return 0
+
+
+def _param_bytes(obj) -> int:
+    """Size of torch parameters reachable from obj (pipelines, tuples, modules)."""
+    if isinstance(obj, (tuple, list)):
+        return sum(_param_bytes(o) for o in obj)
+    module = getattr(obj, "model", obj)
+    params = getattr(module, "parameters", None)
+    if not callable(params):
+        return 0
+    try:
+        return sum(p.numel() * p.element_size() for p in params())
+    except Exception:
+        return 0
+
+
+# ---------------------------
+# REGISTRY
+# ---------------------------
+class ModelRegistry:
+    """Thread-safe LRU cache of loaded models with a RAM budget."""
+
+    def __init__(self, max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self._models = OrderedDict()   # key -> (model, size_bytes)
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    @staticmethod
+    def make_key(kind, name, device="cpu", compute_type="float32", language=None):
+        return (kind, name, device, compute_type, language)
+
+    def set_budget(self, max_mb: float):
+        with self._lock:
+            self.max_bytes = int(max_mb * 1024 * 1024)
+            self._evict(keep=None)
+
+    def get(self, kind: str, name: str, device: str = "cpu",
+            compute_type: str = "float32", language: str = None, loader=None):
+        """
+        Returns the cached model for the key, loading it on first use.
+
+        Args:
+            kind (str): One of LOADERS ("whisper", "whisperx", "align", "summarizer").
+            name (str): Model name or path.
+            device (str): "cpu" or "cuda".
+            compute_type (str): CTranslate2 compute type (ignored by torch loaders).
+            language (str): Language code, required for "align".
+            loader (callable): Optional override with the same signature as LOADERS values.
+
+        Returns:
+            The loaded model object (a (model, metadata) tuple for "align").
+        """
+        key = self.make_key(kind, name, device, compute_type, language)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return self._models[key][0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given key; others wait and then hit the cache.
+        with key_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    self.hits += 1
+                    return self._models[key][0]
+                self.misses += 1
+
+            load = loader or LOADERS.get(kind)
+            if load is None:
+                raise ValueError(f"Unknown model kind: {kind}")
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            model = load(name, device, compute_type, language)
+            elapsed = time.perf_counter() - start
+            size = max(_param_bytes(model), _rss_bytes() - rss_before, 0)
+
+            with self._lock:
+                self.load_seconds += elapsed
+                self._models[key] = (model, size)
+                self._evict(keep=key)
+                self._key_locks.pop(key, None)
+            return model
+
+    def _evict(self, keep):
+        if not self.max_bytes:
+            return
+        while self._total_bytes() > self.max_bytes and len(self._models) > 1:
+            oldest = next(iter(self._models))
+            if oldest == keep:
+                break
+            self._models.pop(oldest)
+            self.evictions += 1
+        gc.collect()
+
+    def _total_bytes(self) -> int:
+        return sum(size for _, size in self._models.values())
+
+    def evict(self, kind=None):
+        """Drops all models (or only one kind) from the cache."""
+        with self._lock:
+            for key in [k for k in self._models if kind is None or k[0] == kind]:
+                self._models.pop(key)
+                self.evictions += 1
+        gc.collect()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "load_seconds": round(self.load_seconds, 3),
+                "resident_mb": round(self._total_bytes() / (1024 * 1024), 1),
+                "budget_mb": round(self.max_bytes / (1024 * 1024), 1),
+                "models": [
+                    {"key": list(k), "size_mb": round(s / (1024 * 1024), 1)}
+                    for k, (_, s) in self._models.items()
+                ],
+            }
+
+
+_REGISTRY = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    """Returns the process-wide registry, creating it on first call."""
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            max_mb = float(os.environ.get("MODEL_REGISTRY_MAX_MB", "0") or 0)
+            _REGISTRY = ModelRegistry(max_bytes=int(max_mb * 1024 * 1024))
+        return _REGISTRY
+
+
+def get_model(kind: str, name: str, device: str = "cpu",
+              compute_type: str = "float32", language: str = None):
+    """Shortcut for get_registry().get(...)."""
+    return get_registry().get(kind, name, device, compute_type, language)
+
+
+if __name__ == "__main__":
+    print(get_registry().stats())
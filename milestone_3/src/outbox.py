@@ -0,0 +1,570 @@
+# outbox.py
+"""
+Outbox Module
+-------------
+Durable background email delivery.
+
+Layout:
+    <root>/<message_id>.eml    the MIME message, built once when it is queued
+    <root>/<message_id>.json   envelope and per-recipient delivery state
+
+send() only writes the message to disk and returns, so a slow SMTP server
+never blocks the page and a failure never loses a summary. A dispatcher
+thread hands due recipients to a pool of sender threads. Senders reuse
+logged-in SMTP connections (one login per connection, NOOP-checked after
+being idle) and deliver up to `batch_size` recipients per SMTP transaction.
+Network errors and 4xx replies are retried with exponential backoff; a 5xx
+refusal fails that recipient only.
+
+SMTP passwords are never written to disk: accounts are registered in
+memory with add_account(), and queued messages of an unknown account wait
+until it is registered again (e.g. after a restart).
+
+LocalSMTPServer is a small in-process SMTP server for tests and demos.
+
+Settings:
+    OUTBOX_DIR          spool folder (default ~/.cache/speech_summarizer/outbox)
+    OUTBOX_WORKERS      sender threads = max connections per account (default 4)
+    OUTBOX_BATCH_SIZE   recipients per SMTP transaction (default 50)
+
+Usage:
+    outbox = get_outbox()
+    account = outbox.add_account("smtp.gmail.com", 465, user, password)
+    outbox.send(account, ["a@example.org", "b@example.org"], "Weekly sync", body,
+                attachments=[("summary.md", md_bytes, "text/markdown")], session_id=session_id)
+    outbox.status(session_id)    # {"sent": 2, "pending": 0, "failed": 0, "errors": [...]}
+"""
+
+import json
+import os
+import random
+import re
+import smtplib
+import socketserver
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from email.utils import formataddr, formatdate, make_msgid
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "speech_summarizer", "outbox")
+PENDING, SENT, FAILED = "pending", "sent", "failed"
+MAX_TO_HEADER = 10  # larger lists go out as undisclosed recipients
+
+
+def parse_recipients(text: str) -> list:
+    """Splits a comma / semicolon / whitespace separated address list, dropping duplicates."""
+    seen = {}
+    for addr in re.split(r"[,;\s]+", text or ""):
+        if "@" in addr:
+            seen.setdefault(addr.strip("<>").lower(), addr.strip("<>"))
+    return list(seen.values())
+
+
+def build_message(sender: str, recipients: list, subject: str, body: str, attachments=(),
+                  sender_name: str = "Speech-to-Text App") -> bytes:
+    """
+    MIME message as bytes.
+
+    Args:
+        attachments: (filename, data, mime_type) tuples, e.g. ("summary.pdf", pdf_bytes, "application/pdf").
+    """
+    msg = EmailMessage()
+    msg["From"] = formataddr((sender_name, sender))
+    msg["To"] = ", ".join(recipients) if len(recipients) <= MAX_TO_HEADER else "undisclosed-recipients:;"
+    msg["Subject"] = subject or "Meeting Summary"
+    msg["Date"] = formatdate(localtime=True)
+    msg["Message-ID"] = make_msgid()
+    msg.set_content(body or "")
+    for filename, data, mime_type in attachments:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        main, _, sub = (mime_type or "application/octet-stream").partition("/")
+        msg.add_attachment(data, maintype=main, subtype=sub or "octet-stream", filename=filename)
+    return msg.as_bytes()
+
+
+def _write_json(path: str, data: dict):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+# ---------------------------
+# CONNECTION POOL
+# ---------------------------
+class SMTPPool:
+    """
+    Logged-in SMTP connections per account, reused across messages.
+
+    Args:
+        idle_check (float): Connections idle longer than this are NOOP-checked before reuse.
+        timeout (float): Socket timeout for new connections.
+    """
+
+    def __init__(self, idle_check: float = 10.0, timeout: float = 30.0):
+        self.idle_check = idle_check
+        self.timeout = timeout
+        self.connects = 0
+        self._idle = {}  # account id -> [(connection, last used)]
+        self._lock = threading.Lock()
+
+    def acquire(self, account: dict):
+        """Returns (connection, reused)."""
+        while True:
+            with self._lock:
+                idle = self._idle.get(account["id"])
+                conn, last = idle.pop() if idle else (None, 0.0)
+            if conn is None:
+                return self._connect(account), False
+            if time.time() - last < self.idle_check:
+                return conn, True
+            try:
+                if conn.noop()[0] == 250:
+                    return conn, True
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.discard(conn)
+
+    def release(self, account: dict, conn):
+        with self._lock:
+            self._idle.setdefault(account["id"], []).append((conn, time.time()))
+
+    @staticmethod
+    def discard(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn, _ in conns:
+                try:
+                    conn.quit()
+                except Exception:
+                    self.discard(conn)
+
+    def _connect(self, account: dict):
+        if account["ssl"]:
+            conn = smtplib.SMTP_SSL(account["host"], account["port"], timeout=self.timeout)
+        else:
+            conn = smtplib.SMTP(account["host"], account["port"], timeout=self.timeout)
+            conn.ehlo()
+            if conn.has_extn("starttls"):
+                conn.starttls()
+                conn.ehlo()
+        try:
+            if account["user"] and account["password"] and conn.has_extn("auth"):
+                conn.login(account["user"], account["password"])
+        except BaseException:
+            self.discard(conn)
+            raise
+        self.connects += 1
+        return conn
+
+
+# ---------------------------
+# OUTBOX
+# ---------------------------
+class Outbox:
+    """
+    Disk-backed email queue with background delivery.
+
+    Args:
+        root (str): Spool directory.
+        workers (int): Sender threads (and so connections per account).
+        batch_size (int): Recipients per SMTP transaction.
+        max_attempts (int): Tries per recipient before it is marked failed.
+        backoff (float): First retry delay in seconds; doubled on every attempt up to max_backoff.
+        keep_seconds (float): How long finished messages stay listed.
+    """
+
+    def __init__(self, root: str = DEFAULT_DIR, workers: int = 4, batch_size: int = 50, max_attempts: int = 6,
+                 backoff: float = 2.0, max_backoff: float = 600.0, keep_seconds: float = 7 * 86400):
+        self.root = root
+        self.batch_size = max(1, batch_size)
+        self.max_attempts = max_attempts
+        self.backoff, self.max_backoff = backoff, max_backoff
+        self.keep_seconds = keep_seconds
+        self.pool = SMTPPool()
+        self.accounts = {}
+        self._messages = {}
+        self._inflight = {}  # message id -> batches still running
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max(1, workers), thread_name_prefix="outbox")
+        self._thread = None
+        os.makedirs(root, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        cutoff = time.time() - self.keep_seconds
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    msg = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if msg["status"] != PENDING and msg["updated"] < cutoff:
+                os.remove(path)
+            else:
+                self._messages[msg["id"]] = msg
+
+    def _save(self, msg: dict):
+        _write_json(os.path.join(self.root, f"{msg['id']}.json"), msg)
+
+    # ---------------------------
+    # PUBLIC API
+    # ---------------------------
+    def add_account(self, host: str, port, user: str, password: str, ssl: bool = None) -> str:
+        """
+        Registers SMTP credentials in memory.
+
+        Args:
+            ssl (bool): Implicit TLS; defaults to True for port 465 (STARTTLS is used when offered otherwise).
+
+        Returns:
+            str: Account id to pass to send().
+        """
+        port = int(port)
+        account_id = f"{user}@{host}:{port}"
+        with self._lock:
+            known = self.accounts.get(account_id)
+            self.accounts[account_id] = {"id": account_id, "host": host, "port": port, "user": user,
+                                         "password": password, "ssl": port == 465 if ssl is None else ssl}
+        if known and known["password"] != password:
+            self.pool.close()  # drop connections logged in with the old password
+        self._wake.set()
+        return account_id
+
+    def send(self, account_id: str, recipients, subject: str, body: str, attachments=(),
+             session_id: str = None, sender_name: str = "Speech-to-Text App") -> str:
+        """
+        Queues one message for any number of recipients.
+
+        Returns:
+            str: The message id.
+        """
+        if isinstance(recipients, str):
+            recipients = parse_recipients(recipients)
+        if not recipients:
+            raise ValueError("no recipients")
+        sender = account_id.rsplit("@", 1)[0]
+        msg_id = uuid.uuid4().hex[:16]
+        eml = os.path.join(self.root, f"{msg_id}.eml")
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(build_message(sender, recipients, subject, body, attachments, sender_name))
+        os.replace(tmp, eml)
+        now = time.time()
+        msg = {"id": msg_id, "session_id": session_id, "account": account_id, "sender": sender,
+               "subject": subject, "created": now, "updated": now, "status": PENDING,
+               "recipients": {addr: {"status": PENDING, "attempts": 0, "next_attempt": now, "error": None}
+                              for addr in recipients}}
+        with self._lock:
+            self._save(msg)
+            self._messages[msg_id] = msg
+        self.start()
+        self._wake.set()
+        return msg_id
+
+    def messages(self, session_id: str = None) -> list:
+        with self._lock:
+            return [json.loads(json.dumps(m)) for m in self._messages.values()
+                    if session_id is None or m["session_id"] == session_id]
+
+    def status(self, session_id: str = None) -> dict:
+        """Recipient counts by delivery status, plus the latest errors."""
+        counts = {PENDING: 0, SENT: 0, FAILED: 0, "messages": 0}
+        errors = []
+        with self._lock:
+            for m in self._messages.values():
+                if session_id is not None and m["session_id"] != session_id:
+                    continue
+                counts["messages"] += 1
+                for addr, r in m["recipients"].items():
+                    counts[r["status"]] += 1
+                    if r["error"]:
+                        errors.append(f"{addr}: {r['error']}")
+        return {**counts, "errors": errors[-5:]}
+
+    def wait(self, message_id: str = None, timeout: float = None) -> bool:
+        """Blocks until the message (or every message) has no pending recipient."""
+        deadline = None if timeout is None else time.time() + timeout
+
+        def done():
+            msgs = [self._messages.get(message_id)] if message_id else list(self._messages.values())
+            return all(m is None or m["status"] != PENDING for m in msgs)
+
+        with self._changed:
+            while not done():
+                left = None if deadline is None else deadline - time.time()
+                if left is not None and left <= 0:
+                    return False
+                self._changed.wait(left)
+        return True
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch, daemon=True, name="outbox-dispatcher")
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+
+    # ---------------------------
+    # DELIVERY
+    # ---------------------------
+    def _dispatch(self):
+        while not self._stop.is_set():
+            now = time.time()
+            next_due = now + 5.0
+            with self._lock:
+                for m in self._messages.values():
+                    if m["status"] != PENDING or m["id"] in self._inflight or m["account"] not in self.accounts:
+                        continue
+                    pending = [(addr, r) for addr, r in m["recipients"].items() if r["status"] == PENDING]
+                    due = [addr for addr, r in pending if r["next_attempt"] <= now]
+                    later = [r["next_attempt"] for addr, r in pending if r["next_attempt"] > now]
+                    if later:
+                        next_due = min(next_due, min(later))
+                    if not due:
+                        continue
+                    batches = [due[i:i + self.batch_size] for i in range(0, len(due), self.batch_size)]
+                    self._inflight[m["id"]] = len(batches)
+                    for batch in batches:
+                        self._executor.submit(self._deliver, m["id"], batch)
+            self._wake.wait(max(0.05, next_due - time.time()))
+            self._wake.clear()
+
+    def _sendmail(self, account: dict, sender: str, recipients: list, data: bytes) -> dict:
+        """One SMTP transaction on a pooled connection; a stale reused connection is replaced once."""
+        while True:
+            conn, reused = self.pool.acquire(account)
+            try:
+                refused = conn.sendmail(sender, recipients, data)
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException):
+                self.pool.release(account, conn)  # sendmail already reset the transaction
+                raise
+            except smtplib.SMTPServerDisconnected:
+                self.pool.discard(conn)
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                self.pool.discard(conn)
+                raise
+            self.pool.release(account, conn)
+            return refused
+
+    def _deliver(self, msg_id: str, recipients: list):
+        with self._lock:
+            msg = self._messages[msg_id]
+            account = self.accounts[msg["account"]]
+        refused, error, permanent = {}, None, False
+        try:
+            with open(os.path.join(self.root, f"{msg_id}.eml"), "rb") as f:
+                data = f.read()
+            refused = self._sendmail(account, msg["sender"], recipients, data)
+        except smtplib.SMTPRecipientsRefused as e:
+            refused = e.recipients
+        except smtplib.SMTPAuthenticationError as e:
+            error = f"{e.smtp_code} {e.smtp_error!r}"  # may be a rate limit; retried with backoff
+        except smtplib.SMTPResponseException as e:
+            error, permanent = f"{e.smtp_code} {e.smtp_error!r}", e.smtp_code >= 500
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self._record(msg_id, recipients, refused, error, permanent)
+
+    def _record(self, msg_id, recipients, refused, error, permanent):
+        now = time.time()
+        jitter = random.uniform(0.8, 1.2)  # one per batch, so retried recipients stay batched together
+        with self._changed:
+            msg = self._messages[msg_id]
+            for addr in recipients:
+                r = msg["recipients"][addr]
+                r["attempts"] += 1
+                if error is None and addr not in refused:
+                    r.update(status=SENT, error=None, sent_at=now)
+                    continue
+                if addr in refused:
+                    code, reply = refused[addr]
+                    r["error"] = f"{code} {reply.decode('utf-8', 'replace') if isinstance(reply, bytes) else reply}"
+                    failed = code >= 500
+                else:
+                    r["error"], failed = error, permanent
+                if failed or r["attempts"] >= self.max_attempts:
+                    r["status"] = FAILED
+                else:
+                    delay = min(self.backoff * 2 ** (r["attempts"] - 1), self.max_backoff)
+                    r["next_attempt"] = now + delay * jitter
+            self._inflight[msg_id] -= 1
+            if self._inflight[msg_id] == 0:
+                del self._inflight[msg_id]
+                if all(r["status"] != PENDING for r in msg["recipients"].values()):
+                    msg["status"] = SENT if all(r["status"] == SENT for r in msg["recipients"].values()) else FAILED
+                    try:
+                        os.remove(os.path.join(self.root, f"{msg_id}.eml"))
+                    except OSError:
+                        pass
+            msg["updated"] = now
+            self._save(msg)
+            self._changed.notify_all()
+        self._wake.set()
+
+
+_OUTBOX = None
+_OUTBOX_LOCK = threading.Lock()
+
+
+def get_outbox() -> Outbox:
+    """Process-wide outbox configured from the environment (shared by every Streamlit session)."""
+    global _OUTBOX
+    with _OUTBOX_LOCK:
+        if _OUTBOX is None:
+            _OUTBOX = Outbox(
+                os.environ.get("OUTBOX_DIR", DEFAULT_DIR),
+                workers=int(os.environ.get("OUTBOX_WORKERS", "4")),
+                batch_size=int(os.environ.get("OUTBOX_BATCH_SIZE", "50")),
+            )
+            _OUTBOX.start()
+        return _OUTBOX
+
+
+# ---------------------------
+# LOCAL SMTP STAND-IN
+# ---------------------------
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, text: str):
+        if self.server.owner.latency:
+            time.sleep(self.server.owner.latency)
+        self.wfile.write(text.encode("utf-8") + b"\r\n")
+
+    def handle(self):
+        owner = self.server.owner
+        with owner.lock:
+            owner.connections += 1
+        sender, rcpts = None, []
+        self.reply("220 localhost ESMTP stand-in")
+        for raw in self.rfile:
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            verb = line.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250-localhost\r\n250-8BITMIME\r\n250-AUTH PLAIN\r\n250 SIZE 52428800")
+            elif verb == "AUTH":
+                with owner.lock:
+                    owner.logins += 1
+                self.reply("235 2.7.0 Authentication successful")
+            elif verb == "MAIL":
+                sender, rcpts = line.split(":", 1)[1].strip().strip("<>").split(">")[0], []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                addr = line.split(":", 1)[1].strip().strip("<>")
+                with owner.lock:
+                    flaky = addr in owner.flaky and addr not in owner.seen
+                    owner.seen.add(addr)
+                if addr in owner.reject:
+                    self.reply("550 5.1.1 No such user")
+                elif flaky:
+                    self.reply("451 4.3.0 Try again later")
+                elif len(rcpts) >= owner.max_recipients:
+                    self.reply("452 4.5.3 Too many recipients")
+                else:
+                    rcpts.append(addr)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                if not rcpts:
+                    self.reply("503 5.5.1 No valid recipients")
+                    continue
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                for data_line in self.rfile:
+                    if data_line == b".\r\n":
+                        break
+                    lines.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                with owner.lock:
+                    owner.messages.append((sender, list(rcpts), b"".join(lines)))
+                sender, rcpts = None, []
+                self.reply("250 OK queued")
+            elif verb == "RSET":
+                sender, rcpts = None, []
+                self.reply("250 OK")
+            elif verb == "NOOP":
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                break
+            else:
+                self.reply("502 5.5.2 Command not recognized")
+
+
+class LocalSMTPServer:
+    """
+    Minimal threaded SMTP server (EHLO, AUTH PLAIN, MAIL, RCPT, DATA) that keeps messages in memory.
+
+    Args:
+        latency (float): Seconds added to every reply (simulates a remote server).
+        reject: Addresses refused with 550 at RCPT time.
+        flaky: Addresses refused with 451 the first time they are seen.
+        max_recipients (int): RCPTs accepted per transaction.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, reject=(), flaky=(),
+                 max_recipients: int = 100):
+        self.latency = latency
+        self.reject, self.flaky, self.seen = set(reject), set(flaky), set()
+        self.max_recipients = max_recipients
+        self.messages = []
+        self.connections = self.logins = 0
+        self.lock = threading.Lock()
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._server = socketserver.ThreadingTCPServer((host, port), _SMTPHandler)
+        self._server.daemon_threads = True
+        self._server.owner = self
+        self.host, self.port = self._server.server_address[:2]
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="smtp-stand-in").start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    # Demo: 300 recipients against a stand-in server with 20 ms per reply
+    with LocalSMTPServer(latency=0.02, reject={"user7@example.org"}, flaky={"user3@example.org"}) as server:
+        outbox = Outbox(tempfile.mkdtemp(), backoff=0.2)
+        account = outbox.add_account(server.host, server.port, "app@example.org", "secret", ssl=False)
+        recipients = [f"user{i}@example.org" for i in range(300)]
+        t0 = time.perf_counter()
+        outbox.send(account, recipients, "End-of-day summary", "Summary text", session_id="demo")
+        outbox.wait(timeout=60)
+        wall = time.perf_counter() - t0
+        print(f"✅ {outbox.status('demo')} in {wall:.2f}s over {server.connections} connection(s), "
+              f"{len(server.messages)} transaction(s)")
+        outbox.stop()
@@ -1,49 +1,159 @@
-import whisperx
-import torch
-import gc
 import os
+import sys
+from model_registry import get_model
+from artifact_cache import get_cache
+from tracing import span
+from diarizer import diarize, assign_speakers
+from transcript import Transcript
+import ingest
+from precision import resolve_compute_type
+from inference_client import get_client
 
 DEVICE = "cpu"
 MODEL_SIZE = "small"
+COMPUTE_TYPE = None  # None = WHISPER_PRECISION / per-host auto choice (precision.py)
+SAMPLE_RATE = 16000
 AUDIO_FILE = r"C:\Users\SOUMODIP\OneDrive\Desktop\speach_to_text_NLP\milestone_3\uploads\clean.wav"
 
-def main():
-    print("\n=== WhisperX Speech-to-Text Pipeline (CPU MODE - float32 enforced, no diarization) ===")
-
-    if not os.path.exists(AUDIO_FILE):
-        print(f"❌ Audio file not found: {AUDIO_FILE}")
+def load_models(language=None):
+    """Warms the shared registry (used by batch workers at start-up); a running inference daemon already holds them."""
+    if get_client():
         return
+    compute_type = COMPUTE_TYPE or resolve_compute_type(model_size=MODEL_SIZE, device=DEVICE)
+    get_model("whisperx", MODEL_SIZE, device=DEVICE, compute_type=compute_type)
+    if language:
+        get_model("align", None, device=DEVICE, language=language)
+
+def transcribe_file(audio_path, verbose=True, model_size=MODEL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE,
+                    diarization=False, num_speakers=None):
+    """
+    Transcribes and aligns one file. Both stages are memoized in the artifact
+    cache, keyed on the audio content hash plus model settings, so a rerun on
+    the same audio skips decoding and inference entirely.
+
+    compute_type=None resolves the precision through precision.py (the
+    WHISPER_PRECISION setting, or the fastest type calibrated for this host).
+
+    With diarization=True the CPU diarizer (diarizer.py) labels every word and
+    segment with a "speaker"; its turns are cached the same way.
 
-    # 1️⃣ Load model
-    print("\n[1/4] Loading WhisperX model...")
-    model = whisperx.load_model(MODEL_SIZE, device=DEVICE, compute_type="float32")
+    When the inference daemon (inference_server.py) is running, transcription
+    and alignment run on its shared models; the audio is passed by path.
 
-    # 2️⃣ Transcribe
-    print("\n[2/4] Transcribing audio...")
-    result = model.transcribe(AUDIO_FILE)
-    print("✅ Transcription complete!")
+    Returns:
+        tuple[Transcript, float]: (columnar word-level transcript, audio duration in seconds).
+    """
+    log = print if verbose else (lambda *a, **k: None)
+    compute_type = compute_type or resolve_compute_type(model_size=model_size, device=device)
+    cache = get_cache()
+    audio_hash = cache.digest(audio_path)
+    params = {"model": model_size, "device": device, "compute_type": compute_type}
+    audio = []  # decoded lazily, at most once
+    client = get_client()
+
+    def load_audio():
+        # Canonical 16 kHz PCM, transcoded once per content hash and memory-mapped (ingest.py)
+        if not audio:
+            with span("decode_audio", input_size=os.path.getsize(audio_path)):
+                audio.append(ingest.load_audio(audio_path))
+        return audio[0]
+
+    # 1️⃣ + 2️⃣ Load model and transcribe
+    def run_transcribe():
+        if client:
+            log("\n[1-2/4] Transcribing audio on the inference daemon...")
+            with span("transcribe", remote=True):
+                return client.transcribe(audio_path, model_size=model_size, device=device, compute_type=compute_type)
+        log("\n[1/4] Loading WhisperX model...")
+        with span("model_load", model=model_size, compute_type=compute_type):
+            model = get_model("whisperx", model_size, device=device, compute_type=compute_type)
+        log("\n[2/4] Transcribing audio...")
+        samples = load_audio()
+        with span("transcribe", input_size=len(samples)):
+            result = model.transcribe(samples)
+        result["duration"] = len(samples) / SAMPLE_RATE
+        return result
+
+    with span("transcribe_stage") as sp:
+        result, hit = cache.get_or_compute("transcribe", audio_hash, params, run_transcribe)
+        sp.set(cache_hit=hit)
+    log("♻️ Reused cached transcript." if hit else "✅ Transcription complete!")
 
     # 3️⃣ Alignment
-    print("\n[3/4] Aligning timestamps...")
-    model_a, metadata = whisperx.load_align_model(language_code=result["language"], device=DEVICE)
-    result_aligned = whisperx.align(result["segments"], model_a, metadata, AUDIO_FILE, DEVICE)
-    print("✅ Alignment complete!")
+    def run_align():
+        log("\n[3/4] Aligning timestamps...")
+        if client:
+            with span("align", input_size=len(result["segments"]), remote=True):
+                return client.align(result["segments"], result["language"], audio_path, device=device)
+        import whisperx  # heavy; only needed when alignment runs in this process
+        with span("model_load", model="align", language=result["language"]):
+            model_a, metadata = get_model("align", None, device=device, language=result["language"])
+        samples = load_audio()
+        with span("align", input_size=len(result["segments"])):
+            return whisperx.align(result["segments"], model_a, metadata, samples, device)
+
+    align_params = dict(params, language=result["language"], align_model=None)
+    with span("align_stage") as sp:
+        result_aligned, hit = cache.get_or_compute("align", audio_hash, align_params, run_align)
+        sp.set(cache_hit=hit)
+    result_aligned["language"] = result["language"]
+    log("♻️ Reused cached alignment." if hit else "✅ Alignment complete!")
+
+    # 4️⃣ Speaker diarization (CPU)
+    if diarization:
+        def run_diarize():
+            log("\n[4/4] Diarizing speakers...")
+            samples = load_audio()
+            with span("diarize", input_size=len(samples)):
+                return diarize(samples, num_speakers=num_speakers)
+
+        with span("diarize_stage") as sp:
+            turns, hit = cache.get_or_compute("diarize", audio_hash, {"num_speakers": num_speakers}, run_diarize)
+            sp.set(cache_hit=hit)
+        assign_speakers(result_aligned, turns)
+        log(f"✅ {len({t['speaker'] for t in turns})} speaker(s) found.")
+    transcript = Transcript.from_whisperx(result_aligned)
+    transcript.language = result["language"]
+    return transcript, result["duration"]
+
+def write_transcript(transcript, output_file, speakers=False):
+    with span("export_transcript", input_size=len(transcript)):
+        transcript.to_txt(output_file, speakers=speakers)
+
+def main(audio_path=None, output_file=None):
+    """
+    Runs transcription, alignment and diarization for one file and writes
+    the plain and speaker-labelled transcripts.
+
+    Args:
+        audio_path (str): Input audio (defaults to AUDIO_FILE).
+        output_file (str): Transcript path (defaults to final_transcription.txt next to the audio).
+
+    Returns:
+        Transcript: The transcript, or None if the file is missing.
+    """
+    audio_path = audio_path or AUDIO_FILE
+    if not os.path.exists(audio_path):
+        print(f"❌ Audio file not found: {audio_path}")
+        return None
+
+    # Resolved only for an existing file: "auto" may calibrate three models on first use
+    compute_type = COMPUTE_TYPE or resolve_compute_type(model_size=MODEL_SIZE, device=DEVICE)
+    print(f"\n=== WhisperX Speech-to-Text Pipeline ({DEVICE.upper()} MODE - compute_type={compute_type}, CPU diarization) ===")
 
-    # 4️⃣ Save output
-    output_dir = os.path.dirname(AUDIO_FILE)
-    output_file = os.path.join(output_dir, "final_transcription.txt")
+    transcript, _ = transcribe_file(audio_path, compute_type=compute_type, diarization=True)
 
-    with open(output_file, "w", encoding="utf-8") as f:
-        for seg in result_aligned["segments"]:
-            start, end = round(seg["start"], 2), round(seg["end"], 2)
-            f.write(f"[{start:.2f} - {end:.2f}] {seg['text'].strip()}\n")
+    # 5️⃣ Save output
+    output_file = output_file or os.path.join(os.path.dirname(audio_path), "final_transcription.txt")
+    write_transcript(transcript, output_file)
+    speaker_file = os.path.join(os.path.dirname(output_file), "transcript_with_speakers.txt")
+    write_transcript(transcript, speaker_file, speakers=True)
 
-    print(f"\n✅ Transcription saved successfully:\n{output_file}")
+    print(f"\n✅ Transcription saved successfully:\n{output_file}\n{speaker_file}")
 
-    del model, model_a
-    gc.collect()
-    torch.cuda.empty_cache()
-    print("\n🎯 Completed successfully on CPU (no diarization).\n")
+    # Models stay warm in the shared registry for the next call.
+    print("\n🎯 Completed successfully on CPU.\n")
+    return transcript
 
-if _name_ == "_main_":
-    main()
\ No newline at end of file
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,210 @@
+# precision.py
+"""
+Precision Module
+----------------
+Chooses the CTranslate2 compute type WhisperX runs with on this host.
+
+Modes:
+    float32        full precision (the reference)
+    int8_float32   int8 weights, float32 for the remaining layers
+    int8           int8 weights and activations
+    auto           benchmark the three once on the bundled clip
+                   (assets/audio/calibration_clip.wav, 18 s of Harvard
+                   sentences) and keep the fastest one whose word error
+                   rate is at most `max_wer_delta` above float32's
+
+The clip is only 43 words (one word error = WER 0.023), so the budget is
+applied in words: a mode may make max(1, ceil(max_wer_delta * words))
+more word errors than float32. A budget below one word would otherwise
+only accept transcripts identical to float32's.
+
+The auto choice is saved in a small JSON file under a host fingerprint
+(CPU model, core count, CTranslate2 version, model size), so each host
+calibrates once and later runs just read the file.
+
+Settings:
+    WHISPER_PRECISION   auto | float32 | int8_float32 | int8 (default auto)
+    PRECISION_MAX_WER   allowed WER increase over float32 (default 0.02, at least one word)
+    PRECISION_FILE      saved choices (default ~/.cache/speech_summarizer/precision.json)
+
+Usage:
+    compute_type = resolve_compute_type()                 # "int8" on most CPUs
+    rows = benchmark("small")                             # timing / WER table
+"""
+
+import json
+import math
+import os
+import platform
+import re
+import tempfile
+import threading
+import time
+
+MODES = ("float32", "int8_float32", "int8")
+ASSETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "audio")
+CLIP = os.path.join(ASSETS, "calibration_clip.wav")
+CLIP_TEXT = os.path.join(ASSETS, "calibration_clip.txt")
+DEFAULT_FILE = os.path.join(os.path.expanduser("~"), ".cache", "speech_summarizer", "precision.json")
+_LOCK = threading.Lock()
+BUDGET_RULE = "words"  # saved choices made under another budget rule are recalibrated
+
+
+def words(text: str) -> list:
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def wer(reference: str, hypothesis: str) -> float:
+    """Word error rate (word-level edit distance / reference length), case and punctuation insensitive."""
+    ref, hyp = words(reference), words(hypothesis)
+    if not ref:
+        return float(bool(hyp))
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1] / len(ref)
+
+
+def host_key(model_size: str, device: str) -> str:
+    cpu = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            cpu = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+    try:
+        import ctranslate2
+        ct2 = ctranslate2.__version__
+    except ImportError:
+        ct2 = "none"
+    return f"{cpu}|{os.cpu_count()}|ct2-{ct2}|{model_size}|{device}"
+
+
+# ---------------------------
+# BENCHMARK
+# ---------------------------
+def benchmark(model_size: str = "small", device: str = "cpu", modes=MODES, clip: str = CLIP,
+              reference: str = None, repeat: int = 2, verbose: bool = False) -> list:
+    """
+    Times WhisperX on `clip` once per compute type (best of `repeat` after a warm-up run).
+
+    Models are loaded straight from the registry's loader and dropped afterwards,
+    so the candidates never pile up in the shared model cache.
+
+    Returns:
+        list[dict]: {"compute_type", "seconds", "rtf", "wer", "wer_delta", "words"} per mode that loaded.
+    """
+    import gc
+    from ingest import load_audio
+    from model_registry import LOADERS
+    samples = load_audio(clip)
+    if reference is None:
+        with open(os.path.splitext(clip)[0] + ".txt", encoding="utf-8") as f:
+            reference = f.read()
+    audio_seconds = len(samples) / 16000
+    rows = []
+    for compute_type in modes:
+        try:
+            model = LOADERS["whisperx"](model_size, device, compute_type, "en")
+        except Exception as e:  # e.g. a type this CPU / CTranslate2 build does not support
+            if verbose:
+                print(f"⚠️ {compute_type}: {e}")
+            continue
+        text, best = "", float("inf")
+        for _ in range(repeat + 1):
+            t0 = time.perf_counter()
+            result = model.transcribe(samples)
+            best = min(best, time.perf_counter() - t0)
+            text = " ".join(seg["text"].strip() for seg in result["segments"])
+        del model
+        gc.collect()
+        rows.append({"compute_type": compute_type, "seconds": round(best, 3),
+                     "rtf": round(best / audio_seconds, 4), "wer": round(wer(reference, text), 4),
+                     "words": len(words(reference))})
+        if verbose:
+            print(f"⏱️ {compute_type:>13}: {best:.2f}s, WER {rows[-1]['wer']:.3f}")
+    base = next((r["wer"] for r in rows if r["compute_type"] == "float32"), None)
+    for r in rows:
+        r["wer_delta"] = round(r["wer"] - base, 4) if base is not None else None
+    return rows
+
+
+def choose(rows: list, max_wer_delta: float) -> str:
+    """Fastest mode within the WER budget, counted in words and at least one (float32 is always acceptable)."""
+    def within(r):
+        if r["wer_delta"] is None:
+            return False
+        n = r.get("words") or 0
+        if not n:
+            return r["wer_delta"] <= max_wer_delta
+        return round(r["wer_delta"] * n) <= max(1, math.ceil(max_wer_delta * n))
+    ok = [r for r in rows if r["compute_type"] == "float32" or within(r)]
+    return min(ok, key=lambda r: r["seconds"])["compute_type"] if ok else "float32"
+
+
+# ---------------------------
+# RESOLVE
+# ---------------------------
+def resolve_compute_type(mode: str = None, model_size: str = "small", device: str = "cpu",
+                         max_wer_delta: float = None, path: str = None, refresh: bool = False) -> str:
+    """
+    Turns a precision mode into a CTranslate2 compute type.
+
+    Args:
+        mode (str): One of MODES or "auto" (default: WHISPER_PRECISION, else "auto").
+        refresh (bool): Re-run the auto benchmark even if a choice is saved.
+
+    Returns:
+        str: The compute type to load WhisperX with.
+    """
+    mode = mode or os.environ.get("WHISPER_PRECISION", "auto")
+    if mode in MODES:
+        return mode
+    if mode != "auto":
+        raise ValueError(f"Unknown precision '{mode}' (choose from auto, {', '.join(MODES)})")
+    if device != "cpu":
+        return "float16"  # GPUs: half precision is the WhisperX default
+    if max_wer_delta is None:
+        max_wer_delta = float(os.environ.get("PRECISION_MAX_WER", "0.02"))
+    path = path or os.environ.get("PRECISION_FILE", DEFAULT_FILE)
+    key = host_key(model_size, device)
+
+    with _LOCK:
+        saved = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+            except (OSError, ValueError):
+                saved = {}
+        entry = saved.get(key)
+        if (entry and not refresh and entry.get("max_wer_delta") == max_wer_delta
+                and entry.get("rule") == BUDGET_RULE):
+            return entry["compute_type"]
+
+        print(f"🔧 Calibrating WhisperX precision for this host ({model_size}, {device})...")
+        try:
+            rows = benchmark(model_size, device, verbose=True)
+        except Exception as e:
+            print(f"⚠️ Precision benchmark failed ({e}); using float32")
+            return "float32"
+        if not rows:
+            return "float32"
+        choice = choose(rows, max_wer_delta)
+        saved[key] = {"compute_type": choice, "max_wer_delta": max_wer_delta, "rule": BUDGET_RULE, "results": rows,
+                      "measured": time.strftime("%Y-%m-%d %H:%M:%S")}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(saved, f, indent=2)
+        os.replace(tmp, path)
+        print(f"✅ Using compute_type={choice}")
+        return choice
+
+
+if __name__ == "__main__":
+    import sys
+    size = sys.argv[1] if len(sys.argv) > 1 else "small"
+    print(f"✅ compute_type={resolve_compute_type('auto', size, refresh=True)}")
@@ -0,0 +1,492 @@
+# search_index.py
+"""
+Search Index Module
+-------------------
+Incremental full-text search over past meeting transcripts and summaries.
+
+Each flush writes an immutable segment file:
+
+    [8-byte header length][JSON header][postings blob][doc store blob]
+
+The header holds the term dictionary (byte ranges into the postings blob),
+document ids and lengths. Postings are delta + variable-byte encoded
+(doc ids, term frequencies and per-document token positions) and decoded
+with vectorized NumPy straight from a memory-mapped file. The doc store
+keeps, per document, the aligned segment timestamps so every hit can point
+at the exact moment in the recording.
+
+Adding a session only writes a new small segment; a background merger
+combines small segments and drops replaced documents. Ranking is BM25;
+"quoted phrases" must match consecutive tokens.
+
+Usage:
+    index = SearchIndex("search_index")
+    index.add_session("session_1", segments=[{"start": 0.0, "end": 4.2, "text": "..."}], summary="...")
+    index.flush()
+    index.search('budget "next quarter"', limit=10)
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import uuid
+import zlib
+from bisect import bisect_right
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+PHRASE_RE = re.compile(r'"([^"]+)"')
+MANIFEST = "manifest.json"
+K1, B = 1.2, 0.75
+
+
+def tokenize(text: str):
+    return TOKEN_RE.findall(text.lower())
+
+
+# ---------------------------
+# VARIABLE-BYTE CODEC
+# ---------------------------
+def vbyte_encode(values) -> bytes:
+    """Little-endian base-128; the last byte of each value has the high bit clear."""
+    out = bytearray()
+    for v in values:
+        v = int(v)
+        while v >= 0x80:
+            out.append((v & 0x7F) | 0x80)
+            v >>= 7
+        out.append(v)
+    return bytes(out)
+
+
+def vbyte_decode(buf: np.ndarray) -> np.ndarray:
+    """Vectorized decode of a uint8 array produced by vbyte_encode."""
+    if len(buf) == 0:
+        return np.zeros(0, dtype=np.int64)
+    ends = buf < 0x80
+    value_id = np.concatenate(([0], np.cumsum(ends[:-1])))
+    starts = np.flatnonzero(np.concatenate(([True], ends[:-1])))
+    shift = 7 * (np.arange(len(buf)) - starts[value_id])
+    parts = (buf & 0x7F).astype(np.int64) << shift
+    return np.bincount(value_id, weights=parts).astype(np.int64)
+
+
+# ---------------------------
+# SEGMENT
+# ---------------------------
+class Segment:
+    """
+    Read-only view over one memory-mapped segment file.
+
+    Reference counted: the index holds one reference while the segment is
+    live and every search holds another while it reads, so a merge that
+    retires the segment mid-search only closes the mapping after the last
+    reader releases it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (header_len,) = struct.unpack("<Q", self._mm[:8])
+        self.header = json.loads(self._mm[8:8 + header_len].decode("utf-8"))
+        self._postings_base = 8 + header_len
+        self._store_base = self._postings_base + self.header["postings_bytes"]
+        self._bytes = np.frombuffer(self._mm, dtype=np.uint8)
+        self.doc_ids = self.header["doc_ids"]
+        self.doc_lengths = np.asarray(self.header["doc_lengths"], dtype=np.float64)
+        self.terms = self.header["terms"]
+        self._refs = 1
+        self._refs_lock = threading.Lock()
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_ids)
+
+    def df(self, term: str) -> int:
+        entry = self.terms.get(term)
+        return entry[4] if entry else 0
+
+    def _slice(self, offset, length):
+        start = self._postings_base + offset
+        return self._bytes[start:start + length]
+
+    def postings(self, term: str, with_positions: bool = False):
+        """
+        Returns:
+            tuple: (local doc ids, term frequencies[, list of position arrays]) or None.
+        """
+        entry = self.terms.get(term)
+        if entry is None:
+            return None
+        offset, n_docs_bytes, n_tf_bytes, n_pos_bytes, _ = entry
+        docs = np.cumsum(vbyte_decode(self._slice(offset, n_docs_bytes)))
+        tfs = vbyte_decode(self._slice(offset + n_docs_bytes, n_tf_bytes))
+        if not with_positions:
+            return docs, tfs
+        gaps = vbyte_decode(self._slice(offset + n_docs_bytes + n_tf_bytes, n_pos_bytes))
+        bounds = np.concatenate(([0], np.cumsum(tfs)))
+        positions = [np.cumsum(gaps[bounds[i]:bounds[i + 1]]) for i in range(len(docs))]
+        return docs, tfs, positions
+
+    def doc(self, local_id: int) -> dict:
+        """Doc store entry: token starts, timestamps and text of the aligned segments."""
+        offset, length = self.header["store"][local_id]
+        start = self._store_base + offset
+        return json.loads(zlib.decompress(self._mm[start:start + length]).decode("utf-8"))
+
+    def acquire(self):
+        with self._refs_lock:
+            self._refs += 1
+        return self
+
+    def release(self):
+        """Drops one reference; the mapping is closed with the last one."""
+        with self._refs_lock:
+            self._refs -= 1
+            last = self._refs == 0
+        if last:
+            self.close()
+
+    def close(self):
+        self._bytes = None
+        self._mm.close()
+        self._file.close()
+
+
+def _gaps(values):
+    return [values[0]] + [b - a for a, b in zip(values, values[1:])] if values else []
+
+
+def write_segment(path: str, docs):
+    """
+    Writes a segment from docs = [(doc_id, tokens, store_dict), ...].
+    Every document's token positions are recorded for phrase queries.
+    """
+    index = {}
+    for local_id, (_, tokens, _) in enumerate(docs):
+        seen = {}
+        for pos, tok in enumerate(tokens):
+            seen.setdefault(tok, []).append(pos)
+        for tok, positions in seen.items():
+            index.setdefault(tok, []).append((local_id, positions))
+
+    blob = bytearray()
+    terms = {}
+    for term in sorted(index):
+        plist = index[term]
+        doc_bytes = vbyte_encode(_gaps([d for d, _ in plist]))
+        tf_bytes = vbyte_encode(len(p) for _, p in plist)
+        # Positions restart per document: the first gap is the absolute position.
+        pos_bytes = vbyte_encode(g for _, p in plist for g in _gaps(p))
+        terms[term] = [len(blob), len(doc_bytes), len(tf_bytes), len(pos_bytes), len(plist)]
+        blob += doc_bytes + tf_bytes + pos_bytes
+
+    store_blob = bytearray()
+    store = []
+    for _, _, stored in docs:
+        data = zlib.compress(json.dumps(stored).encode("utf-8"))
+        store.append([len(store_blob), len(data)])
+        store_blob += data
+
+    header = json.dumps({
+        "doc_ids": [d for d, _, _ in docs],
+        "doc_lengths": [len(t) for _, t, _ in docs],
+        "terms": terms,
+        "store": store,
+        "postings_bytes": len(blob),
+    }).encode("utf-8")
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(blob)
+        f.write(store_blob)
+    os.replace(tmp, path)
+
+
+# ---------------------------
+# INDEX
+# ---------------------------
+class SearchIndex:
+    """
+    Segmented inverted index with BM25 ranking and timestamped hits.
+
+    Args:
+        root (str): Index directory.
+        merge_factor (int): Merge once this many small segments exist.
+    """
+
+    def __init__(self, root: str, merge_factor: int = 8):
+        self.root = root
+        self.merge_factor = merge_factor
+        self._lock = threading.RLock()
+        self._pending = []
+        self._merger = None
+        self._stop = threading.Event()
+        os.makedirs(root, exist_ok=True)
+        self._manifest = self._load_manifest()
+        self._segments = {name: Segment(os.path.join(root, name)) for name in self._manifest["segments"]}
+        self._locations = {}  # session id -> (segment name, local id) of its live copy
+        for name in self._manifest["segments"]:
+            self._register(name)
+
+    def _register(self, name):
+        dead = set(self._manifest["deleted"].get(name, []))
+        for local_id, doc_id in enumerate(self._segments[name].doc_ids):
+            if local_id not in dead:
+                self._locations[doc_id] = (name, local_id)
+
+    def _load_manifest(self):
+        path = os.path.join(self.root, MANIFEST)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {"segments": [], "deleted": {}}
+
+    def _save_manifest(self):
+        path = os.path.join(self.root, MANIFEST)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+        os.replace(path + ".tmp", path)
+
+    # ---------------------------
+    # WRITE
+    # ---------------------------
+    def add_session(self, session_id: str, segments=None, title: str = "", summary: str = "", transcript: str = ""):
+        """
+        Buffers one session. `segments` are aligned dicts with start/end/text;
+        a plain `transcript` is indexed as a single untimed segment.
+        Re-adding an existing session id replaces it.
+        """
+        segments = list(segments or [])
+        if not segments and transcript:
+            segments = [{"start": 0.0, "end": 0.0, "text": transcript}]
+        tokens, seg_starts, times, texts = [], [], [], []
+        for seg in segments:
+            seg_starts.append(len(tokens))
+            times.append([float(seg.get("start", 0.0)), float(seg.get("end", 0.0))])
+            texts.append(seg.get("text", "").strip())
+            tokens.extend(tokenize(seg.get("text", "")))
+        # Title / summary tokens go after the transcript and map to no timestamp.
+        extra_start = len(tokens)
+        tokens.extend(tokenize(title) + tokenize(summary))
+        stored = {"seg_starts": seg_starts, "times": times, "texts": texts,
+                  "extra_start": extra_start, "title": title}
+        with self._lock:
+            self._pending = [p for p in self._pending if p[0] != session_id]
+            self._pending.append((session_id, tokens, stored))
+
+    def flush(self):
+        """Writes buffered sessions as a new segment (existing segments are untouched)."""
+        with self._lock:
+            if not self._pending:
+                return None
+            ids = {p[0] for p in self._pending}
+            self._tombstone(ids)
+            name = f"seg_{uuid.uuid4().hex[:12]}.idx"
+            write_segment(os.path.join(self.root, name), self._pending)
+            self._pending = []
+            self._segments[name] = Segment(os.path.join(self.root, name))
+            self._manifest["segments"].append(name)
+            self._register(name)
+            self._save_manifest()
+            return name
+
+    def _tombstone(self, session_ids):
+        for doc_id in session_ids:
+            loc = self._locations.pop(doc_id, None)
+            if loc:
+                name, local_id = loc
+                self._manifest["deleted"].setdefault(name, []).append(local_id)
+
+    def merge(self, max_segments: int = None):
+        """Merges the smallest segments into one, dropping replaced documents."""
+        with self._lock:
+            names = sorted(self._manifest["segments"], key=lambda n: self._segments[n].n_docs)
+            names = names[:max_segments or self.merge_factor]
+            if len(names) < 2:
+                return None
+            docs = []
+            for name in names:
+                seg = self._segments[name]
+                dead = set(self._manifest["deleted"].get(name, []))
+                tokens = self._segment_tokens(seg)
+                for local_id, doc_id in enumerate(seg.doc_ids):
+                    if local_id not in dead:
+                        docs.append((doc_id, tokens[local_id], seg.doc(local_id)))
+            merged = f"seg_{uuid.uuid4().hex[:12]}.idx"
+            write_segment(os.path.join(self.root, merged), docs)
+            self._segments[merged] = Segment(os.path.join(self.root, merged))
+            self._manifest["segments"] = [n for n in self._manifest["segments"] if n not in names] + [merged]
+            for name in names:
+                self._manifest["deleted"].pop(name, None)
+            self._register(merged)
+            self._save_manifest()
+            for name in names:
+                self._segments.pop(name).release()  # closed once in-flight searches are done
+                try:
+                    os.remove(os.path.join(self.root, name))
+                except OSError:
+                    pass  # still mapped elsewhere (Windows); removed on the next merge
+            return merged
+
+    @staticmethod
+    def _segment_tokens(seg):
+        """Rebuilds every document's token stream from the postings in one pass (used by merge)."""
+        tokens = [[None] * int(n) for n in seg.doc_lengths]
+        for term in seg.terms:
+            docs, _, positions = seg.postings(term, with_positions=True)
+            for local_id, pos in zip(docs.tolist(), positions):
+                doc_tokens = tokens[local_id]
+                for p in pos.tolist():
+                    doc_tokens[p] = term
+        return tokens
+
+    def start_merger(self, interval_seconds: float = 60.0):
+        """Merges in the background whenever merge_factor small segments pile up."""
+        if self._merger and self._merger.is_alive():
+            return
+
+        def loop():
+            while not self._stop.wait(interval_seconds):
+                try:
+                    if len(self._manifest["segments"]) >= self.merge_factor:
+                        self.merge()
+                except Exception as e:
+                    print(f"⚠️ Index merge failed: {e}")
+
+        self._stop.clear()
+        self._merger = threading.Thread(target=loop, daemon=True)
+        self._merger.start()
+
+    def stop_merger(self):
+        self._stop.set()
+
+    # ---------------------------
+    # SEARCH
+    # ---------------------------
+    def __len__(self):
+        with self._lock:
+            dead = sum(len(v) for v in self._manifest["deleted"].values())
+            return sum(s.n_docs for s in self._segments.values()) - dead
+
+    def search(self, query: str, limit: int = 10, hits_per_doc: int = 3):
+        """
+        BM25 search; quoted phrases must match exactly.
+
+        Returns:
+            list[dict]: {"session_id", "score", "title", "hits": [{"start", "end", "text"}]}.
+        """
+        phrases = [tokenize(p) for p in PHRASE_RE.findall(query)]
+        phrases = [p for p in phrases if p]
+        terms = list(dict.fromkeys(tokenize(PHRASE_RE.sub(" ", query)) + [t for p in phrases for t in p]))
+        if not terms:
+            return []
+
+        with self._lock:
+            segments = [(self._segments[n].acquire(), set(self._manifest["deleted"].get(n, [])))
+                        for n in self._manifest["segments"]]
+        try:
+            return self._search(segments, terms, phrases, limit, hits_per_doc)
+        finally:
+            for seg, _ in segments:
+                seg.release()
+
+    def _search(self, segments, terms, phrases, limit, hits_per_doc):
+        # Collection statistics count live documents only (replaced sessions are still in old segments).
+        n_docs, total_len, df, postings = 0, 0.0, dict.fromkeys(terms, 0), []
+        for seg, dead in segments:
+            live = np.ones(seg.n_docs, dtype=bool)
+            if dead:
+                live[list(dead)] = False
+            n_docs += int(live.sum())
+            total_len += float(seg.doc_lengths[live].sum())
+            found = {}
+            for t in terms:
+                res = seg.postings(t, with_positions=bool(phrases))
+                if res is not None:
+                    found[t] = res
+                    df[t] += int(live[res[0]].sum())
+            postings.append((seg, live, found))
+        if n_docs == 0:
+            return []
+        avgdl = total_len / n_docs
+        idf = {t: np.log(1 + (n_docs - df[t] + 0.5) / (df[t] + 0.5)) for t in terms}
+
+        candidates = []
+        for seg, live, found in postings:
+            scores = np.zeros(seg.n_docs)
+            matched = np.zeros(seg.n_docs, dtype=bool)
+            positions = {}
+            for t, res in found.items():
+                docs, tfs = res[0], res[1].astype(np.float64)
+                dl = seg.doc_lengths[docs]
+                scores[docs] += idf[t] * tfs * (K1 + 1) / (tfs + K1 * (1 - B + B * dl / avgdl))
+                matched[docs] = True
+                if phrases:
+                    positions[t] = dict(zip(docs.tolist(), res[2]))
+            ok = matched & live
+            for phrase in phrases:
+                for local_id in np.flatnonzero(ok):
+                    ok[local_id] = self._has_phrase(positions, phrase, int(local_id))
+            for local_id in np.flatnonzero(ok):
+                candidates.append((scores[local_id], seg, int(local_id)))
+
+        candidates.sort(key=lambda c: -c[0])
+        return [self._hit(seg, local_id, score, terms, phrases, hits_per_doc)
+                for score, seg, local_id in candidates[:limit]]
+
+    @staticmethod
+    def _has_phrase(positions, phrase, local_id):
+        first = positions.get(phrase[0], {}).get(local_id)
+        if first is None:
+            return False
+        starts = first
+        for offset, term in enumerate(phrase[1:], start=1):
+            pos = positions.get(term, {}).get(local_id)
+            if pos is None:
+                return False
+            starts = np.intersect1d(starts, pos - offset, assume_unique=True)
+            if len(starts) == 0:
+                return False
+        return True
+
+    def _hit(self, seg, local_id, score, terms, phrases, hits_per_doc):
+        stored = seg.doc(local_id)
+        # Positions of the query terms in this document -> aligned segments.
+        hit_positions = []
+        for t in (phrases[0][:1] if phrases else terms):
+            res = seg.postings(t, with_positions=True)
+            if res is None:
+                continue
+            docs, _, positions = res
+            i = np.searchsorted(docs, local_id)
+            if i < len(docs) and docs[i] == local_id:
+                hit_positions.extend(int(p) for p in positions[i])
+        hits, seen = [], set()
+        for pos in sorted(hit_positions):
+            if pos >= stored["extra_start"]:
+                continue
+            seg_idx = bisect_right(stored["seg_starts"], pos) - 1
+            if seg_idx in seen or seg_idx < 0:
+                continue
+            seen.add(seg_idx)
+            start, end = stored["times"][seg_idx]
+            hits.append({"start": start, "end": end, "text": stored["texts"][seg_idx]})
+            if len(hits) >= hits_per_doc:
+                break
+        return {"session_id": seg.doc_ids[local_id], "score": round(float(score), 4),
+                "title": stored.get("title", ""), "hits": hits}
+
+    def close(self):
+        self.stop_merger()
+        with self._lock:
+            for seg in self._segments.values():
+                seg.release()
+            self._segments = {}
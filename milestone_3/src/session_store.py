@@ -0,0 +1,345 @@
+# session_store.py
+"""
+Session Store Module
+--------------------
+Consolidated meeting history in date-partitioned Parquet files.
+
+Layout:
+    <root>/date=2025-11-11/part-<time>-<id>.parquet
+    <root>/_manifest.json      one entry per file: partition, rows, min/max timestamp
+    <root>/traces/<session_id>.jsonl   per-stage timing spans (see tracing.py)
+
+Appends write a small Parquet file into the day's partition and register it
+in the manifest. A background compactor merges small files of a partition
+into one. Queries prune files with the manifest, then read only the
+requested columns through memory-mapped Arrow readers, so listing history
+never opens thousands of tiny per-session folders.
+
+Usage:
+    store = SessionStore("sessions_store")
+    store.append({"title": "Weekly sync", "transcript": "...", "summary": "..."})
+    rows = store.query(start="2025-11-01", columns=["session_id", "title"], limit=20)
+    store.import_legacy("Milestone 4/sessions")
+"""
+
+import csv
+import glob
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+SCHEMA = pa.schema([
+    ("session_id", pa.string()),
+    ("timestamp", pa.timestamp("us")),
+    ("title", pa.string()),
+    ("date", pa.string()),
+    ("speakers", pa.string()),
+    ("transcript", pa.string()),
+    ("summary", pa.string()),
+    ("audio_path", pa.string()),
+    ("duration_seconds", pa.float64()),
+    ("meta_json", pa.string()),
+])
+LEGACY_TS_FORMAT = "%Y%m%d_%H%M%S"
+MANIFEST = "_manifest.json"
+
+
+def _to_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    for fmt in (LEGACY_TS_FORMAT, "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(str(value), fmt)
+        except ValueError:
+            continue
+    return datetime.fromisoformat(str(value))
+
+
+def _normalize(record: dict) -> dict:
+    """Fills defaults and moves unknown keys into meta_json."""
+    ts = _to_datetime(record.get("timestamp")) or datetime.now()
+    known = {name for name in SCHEMA.names}
+    extra = {k: v for k, v in record.items() if k not in known}
+    meta = json.loads(record.get("meta_json") or "{}")
+    meta.update(extra)
+    return {
+        "session_id": record.get("session_id") or f"session_{ts.strftime(LEGACY_TS_FORMAT)}_{uuid.uuid4().hex[:6]}",
+        "timestamp": ts,
+        "title": record.get("title") or "",
+        "date": record.get("date") or ts.strftime("%Y-%m-%d"),
+        "speakers": record.get("speakers") or "",
+        "transcript": record.get("transcript") or "",
+        "summary": record.get("summary") or "",
+        "audio_path": record.get("audio_path") or "",
+        "duration_seconds": float(record.get("duration_seconds") or 0.0),
+        "meta_json": json.dumps(meta, default=str) if meta else "",
+    }
+
+
+class SessionStore:
+    """
+    Append-only, partitioned session history with a manifest index.
+
+    Args:
+        root (str): Dataset directory.
+        small_file_rows (int): Files with fewer rows are candidates for compaction.
+    """
+
+    def __init__(self, root: str, small_file_rows: int = 1000):
+        self.root = root
+        self.small_file_rows = small_file_rows
+        self._lock = threading.RLock()
+        self._compactor = None
+        self._stop = threading.Event()
+        os.makedirs(root, exist_ok=True)
+        self._manifest = self._load_manifest()
+
+    # ---------------------------
+    # MANIFEST
+    # ---------------------------
+    def _load_manifest(self):
+        path = os.path.join(self.root, MANIFEST)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {"files": []}
+
+    def _save_manifest(self):
+        path = os.path.join(self.root, MANIFEST)
+        tmp = path + f".{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp, path)
+
+    def _write_file(self, partition: str, table: pa.Table) -> dict:
+        folder = os.path.join(self.root, f"date={partition}")
+        os.makedirs(folder, exist_ok=True)
+        name = f"part-{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp = os.path.join(folder, "." + name + ".tmp")
+        pq.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, os.path.join(folder, name))
+        ts = table.column("timestamp")
+        return {
+            "path": f"date={partition}/{name}",
+            "partition": partition,
+            "rows": table.num_rows,
+            "min_ts": pc.min(ts).as_py().isoformat(),
+            "max_ts": pc.max(ts).as_py().isoformat(),
+        }
+
+    # ---------------------------
+    # WRITE
+    # ---------------------------
+    def append(self, records):
+        """
+        Appends one record (dict) or a list of them.
+
+        Returns:
+            list[str]: The session ids written.
+        """
+        if isinstance(records, dict):
+            records = [records]
+        rows = [_normalize(r) for r in records]
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(row["timestamp"].strftime("%Y-%m-%d"), []).append(row)
+        with self._lock:
+            for day, day_rows in by_day.items():
+                table = pa.Table.from_pylist(day_rows, schema=SCHEMA)
+                self._manifest["files"].append(self._write_file(day, table))
+            self._save_manifest()
+        return [r["session_id"] for r in rows]
+
+    def compact(self, min_files: int = 2):
+        """
+        Merges the small files of each partition into one file.
+
+        Returns:
+            int: Number of files removed.
+        """
+        removed = 0
+        with self._lock:
+            partitions = {}
+            for entry in self._manifest["files"]:
+                if entry["rows"] < self.small_file_rows:
+                    partitions.setdefault(entry["partition"], []).append(entry)
+            for day, entries in partitions.items():
+                if len(entries) < min_files:
+                    continue
+                table = pa.concat_tables(
+                    pq.read_table(os.path.join(self.root, e["path"]), memory_map=True) for e in entries
+                ).sort_by("timestamp")
+                merged = self._write_file(day, table)
+                old = {e["path"] for e in entries}
+                self._manifest["files"] = [e for e in self._manifest["files"] if e["path"] not in old]
+                self._manifest["files"].append(merged)
+                self._save_manifest()
+                for path in old:
+                    try:
+                        os.remove(os.path.join(self.root, path))
+                    except FileNotFoundError:
+                        pass
+                removed += len(old)
+        return removed
+
+    def start_compactor(self, interval_seconds: float = 300.0):
+        """Runs compact() periodically on a daemon thread."""
+        if self._compactor and self._compactor.is_alive():
+            return
+
+        def loop():
+            while not self._stop.wait(interval_seconds):
+                try:
+                    self.compact()
+                except Exception as e:
+                    print(f"⚠️ Session compaction failed: {e}")
+
+        self._stop.clear()
+        self._compactor = threading.Thread(target=loop, daemon=True)
+        self._compactor.start()
+
+    def stop_compactor(self):
+        self._stop.set()
+
+    # ---------------------------
+    # READ
+    # ---------------------------
+    def count(self) -> int:
+        with self._lock:
+            return sum(e["rows"] for e in self._manifest["files"])
+
+    def query(self, start=None, end=None, columns=None, limit: int = 50, offset: int = 0,
+              newest_first: bool = True, as_table: bool = False):
+        """
+        Sessions in [start, end), sorted by timestamp.
+
+        Args:
+            start, end: datetime or date strings ("2025-11-11", "20251111_130026", ISO).
+            columns (list[str]): Columns to read (timestamp is always read for sorting).
+            limit (int): Page size (None = everything).
+            offset (int): Rows to skip (pagination).
+            newest_first (bool): Sort order.
+            as_table (bool): Return a pyarrow.Table instead of a list of dicts.
+        """
+        try:
+            return self._query(start, end, columns, limit, offset, newest_first, as_table)
+        except FileNotFoundError:
+            # A concurrent compaction replaced a file between pruning and reading; retry once.
+            return self._query(start, end, columns, limit, offset, newest_first, as_table)
+
+    def _query(self, start, end, columns, limit, offset, newest_first, as_table):
+        start, end = _to_datetime(start), _to_datetime(end)
+        read_cols = list(dict.fromkeys((columns or SCHEMA.names) + ["timestamp"]))
+        with self._lock:
+            entries = [
+                e for e in self._manifest["files"]
+                if not (start and datetime.fromisoformat(e["max_ts"]) < start)
+                and not (end and datetime.fromisoformat(e["min_ts"]) >= end)
+            ]
+        by_day = {}
+        for e in entries:
+            by_day.setdefault(e["partition"], []).append(e)
+
+        # Partitions never overlap in time, so walk them in order and stop once the page is full.
+        need = None if limit is None else offset + limit
+        tables, have = [], 0
+        for day in sorted(by_day, reverse=newest_first):
+            table = pa.concat_tables(
+                pq.read_table(os.path.join(self.root, e["path"]), columns=read_cols, memory_map=True)
+                for e in by_day[day]
+            )
+            mask = None
+            if start:
+                mask = pc.greater_equal(table["timestamp"], pa.scalar(start, pa.timestamp("us")))
+            if end:
+                m = pc.less(table["timestamp"], pa.scalar(end, pa.timestamp("us")))
+                mask = m if mask is None else pc.and_(mask, m)
+            if mask is not None:
+                table = table.filter(mask)
+            tables.append(table.sort_by([("timestamp", "descending" if newest_first else "ascending")]))
+            have += table.num_rows
+            if need is not None and have >= need:
+                break
+
+        if tables:
+            result = pa.concat_tables(tables)
+        else:
+            result = SCHEMA.empty_table().select(read_cols)
+        result = result.slice(offset, limit) if limit is not None else result.slice(offset)
+        if columns:
+            result = result.select(columns)
+        return result if as_table else result.to_pylist()
+
+    def get(self, session_id: str):
+        """Full record for one session id (or None)."""
+        with self._lock:
+            paths = [e["path"] for e in self._manifest["files"]]
+        for path in paths:
+            table = pq.read_table(os.path.join(self.root, path), memory_map=True,
+                                  filters=[("session_id", "=", session_id)])
+            if table.num_rows:
+                return table.to_pylist()[0]
+        return None
+
+    def trace_path(self, session_id: str) -> str:
+        """JSON-lines file holding the timing spans recorded for a session."""
+        return os.path.join(self.root, "traces", f"{session_id}.jsonl")
+
+    # ---------------------------
+    # LEGACY IMPORT
+    # ---------------------------
+    def import_legacy(self, sessions_dir: str) -> int:
+        """
+        One-shot import of the old per-session folders
+        (session_<timestamp>/session.json, .parquet or .csv).
+
+        Returns:
+            int: Number of sessions imported.
+        """
+        existing = {r["session_id"] for r in self.query(columns=["session_id"], limit=None)}
+        records = []
+        for folder in sorted(glob.glob(os.path.join(sessions_dir, "session_*"))):
+            session_id = os.path.basename(folder)
+            if session_id in existing:
+                continue
+            record = self._read_legacy(folder)
+            if record is None:
+                continue
+            record["session_id"] = session_id
+            record.setdefault("timestamp", session_id[len("session_"):])
+            records.append(record)
+        if records:
+            self.append(records)
+        return len(records)
+
+    @staticmethod
+    def _read_legacy(folder):
+        json_path = os.path.join(folder, "session.json")
+        if os.path.exists(json_path):
+            with open(json_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        parquet_path = os.path.join(folder, "session.parquet")
+        if os.path.exists(parquet_path):
+            rows = pq.read_table(parquet_path).to_pylist()
+            return rows[0] if rows else None
+        csv_path = os.path.join(folder, "session.csv")
+        if os.path.exists(csv_path):
+            with open(csv_path, "r", encoding="utf-8", newline="") as f:
+                rows = list(csv.DictReader(f))
+            return rows[0] if rows else None
+        return None
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 3:
+        print("Usage: python session_store.py <store_dir> <legacy_sessions_dir>")
+        sys.exit(1)
+    store = SessionStore(sys.argv[1])
+    print(f"✅ Imported {store.import_legacy(sys.argv[2])} sessions into {sys.argv[1]}")
@@ -5,41 +5,269 @@ Summarizer Module
 This script takes a diarized transcript or plain meeting text as input
 and generates a concise summary using a pre-trained Hugging Face model (T5-small).
 
+Transcripts longer than the model's input window are summarized with a
+map-reduce pass: the text is split on speaker turns / sentences using the
+model's own tokenizer, chunks are summarized in batches, and the chunk
+summaries are reduced level by level until they fit the length target.
+
+When the inference daemon (inference_server.py) is running, summaries are
+generated by its shared model instead of a copy loaded in this process.
+
+Concurrent requests that fit the model window (several users, Streamlit
+sessions or daemon clients at once) go through a micro-batcher
+(micro_batcher.py): they are grouped by settings and token length and run
+as one padded generate call.
+
+Settings:
+    SUMMARY_BATCH_MAX       requests per generate call (default 8, 1 disables batching)
+    SUMMARY_BATCH_WAIT_MS   how long a request waits for company (default 10)
+    SUMMARY_BATCH_BUCKET    token-length bucket width (default 64)
+
 Usage:
     python summarizer.py "Your meeting transcript text here"
+    python summarizer.py --file transcript_with_speakers.txt
 """
 
+import contextvars
+import os
+import re
 import sys
-from transformers import pipeline
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from model_registry import get_model
+from artifact_cache import get_cache, text_digest
+from tracing import span
+from inference_client import get_client
+from micro_batcher import MicroBatcher
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+MAX_REDUCE_LEVELS = 6
+_BATCHER = None
+_BATCHER_LOCK = threading.Lock()
+
 
-def summarize_text(text: str, model_name: str = "t5-small", max_length: int = 120, min_length: int = 25) -> str:
+def summarize_text(text: str, model_name: str = "t5-small", max_length: int = 120, min_length: int = 25,
+                   long_document: bool = True, **long_kwargs) -> str:
     """
     Summarizes a given text using a transformer model.
+    The model is loaded once per process through the shared model registry,
+    and summaries are memoized in the artifact cache per (text, settings).
 
     Args:
         text (str): Input text (transcript or notes).
         model_name (str): Hugging Face model to use.
         max_length (int): Maximum length of the summary.
         min_length (int): Minimum length of the summary.
+        long_document (bool): Use map-reduce when the text exceeds the model window.
+        **long_kwargs: Extra options forwarded to summarize_long.
 
     Returns:
         str: Generated summary.
     """
+    params = {"model": model_name, "max_length": max_length, "min_length": min_length,
+              "long_document": long_document, **long_kwargs}
     try:
-        summarizer = pipeline("summarization", model=model_name)
-        summary = summarizer(
-            text,
-            max_length=max_length,
-            min_length=min_length,
-            do_sample=False
-        )
-        return summary[0]["summary_text"]
+        with span("summarize", input_size=len(text), model=model_name) as sp:
+            summary, hit = get_cache().get_or_compute(
+                "summarize", text_digest(text), params,
+                lambda: _summarize(text, model_name, max_length, min_length, long_document, **long_kwargs),
+            )
+            sp.set(cache_hit=hit)
+        return summary
     except Exception as e:
         return f"[Error during summarization] {e}"
 
+
+def _summarize(text, model_name, max_length, min_length, long_document, **long_kwargs):
+    client = get_client()
+    if client:
+        return client.summarize(text, model_name, max_length, min_length, long_document, **long_kwargs)
+    with span("model_load", model=model_name):
+        summarizer = get_model("summarizer", model_name)
+    n_tokens = _count_tokens(summarizer.tokenizer, text)
+    if long_document and n_tokens > _input_limit(summarizer.tokenizer):
+        return summarize_long(text, model_name, max_length, min_length, **long_kwargs)
+    batcher = get_summary_batcher()
+    if batcher:
+        return batcher(text, key=(model_name, max_length, min_length), length=n_tokens)
+    summary = summarizer(
+        text,
+        max_length=max_length,
+        min_length=min_length,
+        do_sample=False
+    )
+    return summary[0]["summary_text"]
+
+
+# ---------------------------
+# MICRO-BATCHING
+# ---------------------------
+def _run_summary_batch(key, texts):
+    """One padded generate call for requests sharing (model, max_length, min_length)."""
+    model_name, max_length, min_length = key
+    summarizer = get_model("summarizer", model_name)
+    with span("summarize_batch", input_size=len(texts), model=model_name):
+        outputs = summarizer(texts, batch_size=len(texts), max_length=max_length, min_length=min_length,
+                             do_sample=False, truncation=True)
+    return [out["summary_text"] for out in outputs]
+
+
+def get_summary_batcher():
+    """Process-wide summary batcher, configured from SUMMARY_BATCH_* (None when batching is off)."""
+    global _BATCHER
+    max_batch = int(os.environ.get("SUMMARY_BATCH_MAX", "8"))
+    if max_batch <= 1:
+        return None
+    with _BATCHER_LOCK:
+        if _BATCHER is None:
+            _BATCHER = MicroBatcher(
+                _run_summary_batch,
+                max_batch=max_batch,
+                max_wait=float(os.environ.get("SUMMARY_BATCH_WAIT_MS", "10")) / 1000,
+                bucket_width=int(os.environ.get("SUMMARY_BATCH_BUCKET", "64")),
+            )
+        return _BATCHER
+
+
+# ---------------------------
+# LONG DOCUMENT (MAP-REDUCE)
+# ---------------------------
+def _input_limit(tokenizer, reserve: int = 16) -> int:
+    """Usable input tokens per chunk (the tokenizer limit minus room for the task prefix)."""
+    limit = getattr(tokenizer, "model_max_length", 512) or 512
+    if limit > 100_000:  # "unbounded" sentinel used by some tokenizers
+        limit = 512
+    return limit - reserve
+
+
+def _count_tokens(tokenizer, text: str) -> int:
+    return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+
+def _split_units(text: str):
+    """Splits a transcript on speaker turns (lines), then sentences."""
+    units = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            units.extend(s for s in SENTENCE_SPLIT.split(line) if s.strip())
+    return units
+
+
+def chunk_by_tokens(text: str, tokenizer, max_tokens: int):
+    """
+    Packs speaker turns / sentences into chunks of at most max_tokens tokens.
+
+    Units longer than max_tokens on their own are cut on token boundaries.
+
+    Returns:
+        list[str]: Chunks in transcript order.
+    """
+    units = _split_units(text)
+    if not units:
+        return []
+    lengths = [len(ids) for ids in tokenizer(units, add_special_tokens=False)["input_ids"]]
+
+    chunks, current, used = [], [], 0
+    for unit, n in zip(units, lengths):
+        if n > max_tokens:
+            if current:
+                chunks.append(" ".join(current))
+                current, used = [], 0
+            ids = tokenizer(unit, add_special_tokens=False)["input_ids"]
+            for i in range(0, len(ids), max_tokens):
+                chunks.append(tokenizer.decode(ids[i:i + max_tokens], skip_special_tokens=True))
+            continue
+        if used + n > max_tokens and current:
+            chunks.append(" ".join(current))
+            current, used = [], 0
+        current.append(unit)
+        used += n
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _summarize_batch(summarizer, texts, batch_size, workers, max_length, min_length):
+    """Runs the chunk summaries as batched forward passes, optionally several batches at once."""
+    kwargs = {"max_length": max_length, "min_length": min_length, "do_sample": False, "truncation": True}
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+
+    def run(batch):
+        return [out["summary_text"] for out in summarizer(batch, batch_size=len(batch), **kwargs)]
+
+    if workers > 1 and len(batches) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # copy_context().run per batch: spans on the pool threads reach the caller's collect()
+            results = [f.result() for f in [pool.submit(contextvars.copy_context().run, run, b) for b in batches]]
+    else:
+        results = [run(b) for b in batches]
+    return [s for batch in results for s in batch]
+
+
+def summarize_long(text: str, model_name: str = "t5-small", max_length: int = 120, min_length: int = 25,
+                   batch_size=8, workers=1, num_threads: int = None,
+                   chunk_max_length: int = 80, chunk_min_length: int = 10, verbose: bool = False) -> str:
+    """
+    Map-reduce summarization for transcripts longer than the model window.
+
+    Args:
+        text (str): Full transcript.
+        model_name (str): Hugging Face model to use.
+        max_length (int): Maximum length of the final summary.
+        min_length (int): Minimum length of the final summary.
+        batch_size (int | list[int]): Chunks per forward pass; a list gives one value
+            per reduce level (the last value is reused for deeper levels).
+        workers (int | list[int]): Batches run concurrently per level, same list rules.
+        num_threads (int): Torch intra-op threads. This is process-wide (it also applies to
+            Streamlit, daemon and batcher threads), so it is only changed when given.
+        chunk_max_length (int): Maximum length of each intermediate chunk summary.
+        chunk_min_length (int): Minimum length of each intermediate chunk summary.
+        verbose (bool): Print reduce-level progress (each level is also a "summarize_reduce" span).
+
+    Returns:
+        str: Generated summary.
+    """
+    summarizer = get_model("summarizer", model_name)
+    tokenizer = summarizer.tokenizer
+    limit = _input_limit(tokenizer)
+
+    if num_threads:
+        import torch
+        torch.set_num_threads(num_threads)
+
+    def per_level(value, level):
+        if isinstance(value, (list, tuple)):
+            return value[min(level, len(value) - 1)]
+        return value
+
+    current = text
+    for level in range(MAX_REDUCE_LEVELS):
+        if _count_tokens(tokenizer, current) <= limit:
+            break
+        chunks = chunk_by_tokens(current, tokenizer, limit)
+        if verbose:
+            print(f"🔹 Reduce level {level + 1}: {len(chunks)} chunks")
+        with span("summarize_reduce", input_size=len(current), level=level + 1, chunks=len(chunks)):
+            summaries = _summarize_batch(
+                summarizer, chunks,
+                batch_size=max(1, per_level(batch_size, level)),
+                workers=max(1, per_level(workers, level)),
+                max_length=chunk_max_length, min_length=chunk_min_length,
+            )
+        # One summary per line so the next level can split on them again.
+        current = "\n".join(s.strip() for s in summaries)
+
+    return summarizer(current, max_length=max_length, min_length=min_length,
+                      do_sample=False, truncation=True)[0]["summary_text"]
+
+
 if __name__ == "__main__":
     # If user passes text directly from terminal
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 2 and sys.argv[1] == "--file":
+        with open(sys.argv[2], "r", encoding="utf-8") as f:
+            input_text = f.read()
+    elif len(sys.argv) > 1:
         input_text = " ".join(sys.argv[1:])
     else:
         # If no argument provided, use a sample text
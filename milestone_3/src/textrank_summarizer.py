@@ -0,0 +1,224 @@
+# textrank_summarizer.py
+"""
+TextRank Summarizer
+-------------------
+Graph-based extractive summarizer for both Streamlit apps, on top of the
+incremental term index of tfidf_summarizer.py (same update() / summary()
+interface, so new transcript text is still only tokenized once).
+
+Summing TF-IDF weights per sentence favours long sentences and lines that
+are repeated over and over. Here instead:
+
+1. Near-duplicate utterances ("yeah, okay", the same point restated) are
+   collapsed with MinHash/LSH: `num_perm` min-hashes of each sentence's term
+   set, banded into buckets; members whose estimated Jaccard similarity to
+   their bucket's first member reaches `dedup_threshold` join its cluster,
+   and only the earliest sentence of a cluster is ranked.
+2. The similarity graph keeps each sentence's `top_k` most similar
+   neighbours (cosine of l2-normalized TF-IDF rows). Candidates come from a
+   capped inverted index: each term keeps only its `postings` highest
+   weighted sentences, so a sentence is compared with at most
+   terms * postings others, and products run in row blocks. Time and memory
+   grow linearly with the transcript; the graph holds at most n * top_k
+   edges. (Similarities through a common term's dropped postings are left
+   out, so scores are approximate for very frequent terms.)
+3. PageRank scores come from vectorized power iteration on that sparse
+   graph.
+
+Sentences with fewer than `min_terms` content words (filler) and collapsed
+duplicates score below every ranked sentence, so they are only picked when
+there is nothing else. The summary is picked greedily by score, skipping a
+sentence whose graph similarity to an already picked one exceeds
+`redundancy` (paraphrases of the same point).
+
+Usage:
+    summ = TextRankSummarizer()
+    summ.update(transcript_so_far)
+    print(summ.summary(3))
+"""
+
+import numpy as np
+
+from tfidf_summarizer import IncrementalTfidfSummarizer
+
+PRIME = (1 << 31) - 1
+
+
+class TextRankSummarizer(IncrementalTfidfSummarizer):
+    """
+    Args:
+        stop_words, strip: As for IncrementalTfidfSummarizer.
+        top_k (int): Neighbours kept per sentence in the similarity graph.
+        damping (float): PageRank damping factor.
+        num_perm (int): MinHash permutations (num_perm = bands * rows per band).
+        bands (int): LSH bands.
+        dedup_threshold (float): Estimated Jaccard similarity at which two sentences are duplicates.
+        postings (int): Sentences kept per term in the candidate index.
+        min_terms (int): Content words a sentence needs to be ranked.
+        redundancy (float): Cosine similarity above which a sentence repeats one already picked.
+        block_rows (int): Rows per similarity product block (bounds peak memory).
+    """
+
+    def __init__(self, stop_words=None, strip: bool = True, top_k: int = 10, damping: float = 0.85,
+                 num_perm: int = 32, bands: int = 8, dedup_threshold: float = 0.8, postings: int = 64,
+                 min_terms: int = 3, redundancy: float = 0.5, block_rows: int = 2048, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.top_k = top_k
+        self.damping = damping
+        self.bands = bands
+        self.dedup_threshold = dedup_threshold
+        self.postings = postings
+        self.min_terms = min_terms
+        self.redundancy = redundancy
+        self._graph = None  # (sentence -> graph row, similarity graph) of the last scores() call
+        self.block_rows = block_rows
+        rng = np.random.default_rng(seed)
+        self._hash_a = rng.integers(1, PRIME, num_perm, dtype=np.int64)
+        self._hash_b = rng.integers(0, PRIME, num_perm, dtype=np.int64)
+        super().__init__(stop_words, strip)
+
+    # ---------------------------
+    # NEAR-DUPLICATES (MinHash / LSH)
+    # ---------------------------
+    def minhash(self, rows, terms, n, block: int = 1 << 16) -> np.ndarray:
+        """(n, num_perm) MinHash signatures of each sentence's term set; empty sentences get PRIME."""
+        sig = np.full((n, len(self._hash_a)), PRIME, dtype=np.int64)
+        for i in range(0, len(rows), block):
+            r, t = rows[i:i + block], terms[i:i + block]
+            h = (t[:, None] * self._hash_a + self._hash_b) % PRIME
+            np.minimum.at(sig, r, h)
+        return sig
+
+    def duplicates(self, rows, terms, n) -> np.ndarray:
+        """Cluster id per sentence: the index of the earliest near-duplicate (itself when unique)."""
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+        sig = self.minhash(rows, terms, n)
+        nonempty = np.flatnonzero(np.bincount(rows, minlength=n) > 0)
+        width = sig.shape[1] // self.bands
+        src, dst = [], []
+        for b in range(self.bands):
+            band = sig[nonempty, b * width:(b + 1) * width]
+            _, first, bucket = np.unique(band, axis=0, return_index=True, return_inverse=True)
+            leader = first[bucket.ravel()]
+            cand = np.flatnonzero(leader != np.arange(len(nonempty)))
+            similar = (sig[nonempty[cand]] == sig[nonempty[leader[cand]]]).mean(axis=1) >= self.dedup_threshold
+            src.append(nonempty[cand[similar]])
+            dst.append(nonempty[leader[cand[similar]]])
+        src, dst = np.concatenate(src), np.concatenate(dst)
+        graph = coo_matrix((np.ones(len(src)), (src, dst)), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+        _, earliest = np.unique(labels, return_index=True)
+        return earliest[labels]
+
+    # ---------------------------
+    # GRAPH
+    # ---------------------------
+    def tfidf_rows(self, rows, terms, counts, df, n):
+        """CSR matrix of l2-normalized TF-IDF rows."""
+        from scipy.sparse import csr_matrix
+        idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+        w = counts * idf[terms]
+        norm = np.sqrt(np.bincount(rows, weights=w * w, minlength=n))
+        w = np.divide(w, norm[rows], out=np.zeros_like(w), where=norm[rows] > 0)
+        return csr_matrix((w, (rows, terms)), shape=(n, len(df)))
+
+    def similarity_graph(self, X):
+        """Symmetric sparse graph keeping each row's top_k cosine neighbours (self excluded)."""
+        from scipy.sparse import csr_matrix
+        n = X.shape[0]
+        XT = self._top_per_row(X.T.tocoo(), self.postings)
+        src, dst, val = [], [], []
+        for start in range(0, n, self.block_rows):
+            S = (X[start:start + self.block_rows] @ XT).tocoo()
+            r, c, v = S.row + start, S.col, S.data
+            mask = (r != c) & (v > 0)
+            r, c, v = self._top_k(r[mask], c[mask], v[mask], self.top_k)
+            src.append(r); dst.append(c); val.append(v)
+        src, dst, val = np.concatenate(src), np.concatenate(dst), np.concatenate(val)
+        W = csr_matrix((val, (src, dst)), shape=(n, n))
+        return W.maximum(W.T)
+
+    @staticmethod
+    def _top_k(r, c, v, k):
+        """Keeps the k largest (positive) values of every row of a COO triplet list."""
+        if len(r) == 0:
+            return r, c, v
+        # one float sort key: row number plus a descending-value fraction in [0, 1)
+        order = np.argsort(r + (1.0 - v / (v.max() * (1 + 1e-9))))
+        r, c, v = r[order], c[order], v[order]
+        starts = np.flatnonzero(np.r_[True, r[1:] != r[:-1]])
+        rank = np.arange(len(r)) - np.repeat(starts, np.diff(np.r_[starts, len(r)]))
+        top = rank < k
+        return r[top], c[top], v[top]
+
+    def _top_per_row(self, M, k):
+        from scipy.sparse import csr_matrix
+        r, c, v = self._top_k(M.row, M.col, M.data, k)
+        return csr_matrix((v, (r, c)), shape=M.shape)
+
+    def pagerank(self, W, tol: float = 1e-6, max_iter: int = 100) -> np.ndarray:
+        """Power iteration on the row-normalized graph; dangling sentences spread their rank uniformly."""
+        n = W.shape[0]
+        out = np.asarray(W.sum(axis=1)).ravel()
+        dangling = out == 0
+        inv = np.divide(1.0, out, out=np.zeros(n), where=~dangling)
+        PT = W.multiply(inv[:, None]).T.tocsr()
+        rank = np.full(n, 1.0 / n)
+        for _ in range(max_iter):
+            new = self.damping * (PT @ rank + rank[dangling].sum() / n) + (1.0 - self.damping) / n
+            done = np.abs(new - rank).sum() < tol
+            rank = new
+            if done:
+                break
+        return rank
+
+    # ---------------------------
+    # QUERY
+    # ---------------------------
+    def scores(self) -> np.ndarray:
+        """
+        TextRank score per sentence (tail included).
+
+        Ranked sentences score in (0, 1]; filler scores -1 and collapsed duplicates -2.
+        """
+        rows, terms, counts, df, n = self._matrix()
+        scores = np.full(n, -1.0)
+        self._graph = None
+        if n == 0 or len(rows) == 0:
+            return scores
+        cluster = self.duplicates(rows, terms, n)
+        reps = np.flatnonzero(cluster == np.arange(n))
+        ranked = reps[np.bincount(rows, minlength=n)[reps] >= self.min_terms]
+        if len(ranked) == 0:
+            ranked = reps
+        index = np.full(n, -1)
+        index[ranked] = np.arange(len(ranked))
+        keep = index[rows] >= 0
+        # idf over the ranked sentences only: df counted over collapsed duplicates would exceed n
+        df = np.bincount(terms[keep], minlength=len(df)).astype(np.float64)
+        X = self.tfidf_rows(index[rows[keep]], terms[keep], counts[keep], df, len(ranked))
+        W = self.similarity_graph(X)
+        rank = self.pagerank(W)
+        scores[cluster != np.arange(n)] = -2.0
+        scores[ranked] = rank / rank.max()
+        self._graph = (index, W)
+        return scores
+
+    def select(self, num_sentences: int):
+        """Highest scores first, skipping paraphrases of sentences already picked."""
+        order = np.argsort(self.scores())[::-1]
+        if self._graph is None:
+            return order[:num_sentences]
+        index, W = self._graph
+        picked, skipped = [], []
+        for i in order:
+            if len(picked) == num_sentences:
+                break
+            g = index[i]
+            if g >= 0 and any(index[p] >= 0 and W[g, index[p]] > self.redundancy for p in picked):
+                skipped.append(i)
+            else:
+                picked.append(i)
+        return picked + skipped[:num_sentences - len(picked)]
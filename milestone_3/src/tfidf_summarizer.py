@@ -0,0 +1,185 @@
+# tfidf_summarizer.py
+"""
+Incremental TF-IDF Summarizer
+-----------------------------
+Stateful version of the extractive summarizer both Streamlit apps started
+with (`simple_summarizer` / `summarize_tfidf`). Its term index is also the
+base of the TextRank summarizer the apps use now (textrank_summarizer.py).
+
+It keeps running document frequencies and every sentence's term counts as
+flat sparse arrays. Feeding more transcript only tokenizes the new sentences;
+asking for the top-k summary is a few vectorized passes over the stored
+counts, so a 10k-sentence transcript re-summarizes in milliseconds.
+
+Scores match a fresh `TfidfVectorizer(stop_words="english")` refit (smooth idf,
+l2 norm, row sums) to within 1e-9 relative error; the chosen sentences are the
+same except when two sentences tie to within that tolerance.
+
+Usage:
+    summ = IncrementalTfidfSummarizer()
+    summ.update(transcript_so_far)
+    print(summ.summary(3))
+"""
+
+import re
+
+import numpy as np
+
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?]) +')
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+
+class IncrementalTfidfSummarizer:
+    """
+    Extractive top-k summarizer whose state grows with the transcript.
+
+    Args:
+        stop_words (frozenset): Words ignored when counting terms (default: scikit-learn's
+            English list, imported here rather than at module import; sklearn is slow to load).
+        strip (bool): Strip sentences and drop empty ones (Milestone 4 behaviour).
+    """
+
+    def __init__(self, stop_words=None, strip: bool = True):
+        if stop_words is None:
+            from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+            stop_words = ENGLISH_STOP_WORDS
+        self.stop_words = stop_words
+        self.strip = strip
+        self.reset()
+
+    def reset(self):
+        self._generation = getattr(self, "_generation", 0) + 1
+        self.sentences = []
+        self.vocab = {}
+        self._df = np.zeros(1024, dtype=np.int64)
+        self._rows = np.zeros(4096, dtype=np.int64)    # sentence index per nnz
+        self._terms = np.zeros(4096, dtype=np.int64)   # term id per nnz
+        self._counts = np.zeros(4096, dtype=np.float64)
+        self._nnz = 0
+        self._text = ""
+        self._tail = ""     # last, possibly unfinished sentence (not indexed yet)
+        self._cache = None  # ((generation, text length, k), summary)
+
+    # ---------------------------
+    # INGEST
+    # ---------------------------
+    def _tokenize(self, sentence):
+        counts = {}
+        for tok in TOKEN_PATTERN.findall(sentence.lower()):
+            if tok not in self.stop_words:
+                counts[tok] = counts.get(tok, 0) + 1
+        return counts
+
+    def _grow(self, name, size):
+        arr = getattr(self, name)
+        if size > len(arr):
+            new = np.zeros(max(size, 2 * len(arr)), dtype=arr.dtype)
+            new[:len(arr)] = arr
+            setattr(self, name, new)
+
+    def add_sentences(self, sentences):
+        """Indexes complete sentences; cost is proportional to their length."""
+        for sentence in sentences:
+            if self.strip:
+                sentence = sentence.strip()
+                if not sentence:
+                    continue
+            row = len(self.sentences)
+            self.sentences.append(sentence)
+            counts = self._tokenize(sentence)
+            if not counts:
+                continue
+            ids = []
+            for tok in counts:
+                tid = self.vocab.get(tok)
+                if tid is None:
+                    tid = self.vocab[tok] = len(self.vocab)
+                ids.append(tid)
+            ids = np.array(ids, dtype=np.int64)
+            self._grow("_df", len(self.vocab))
+            self._df[ids] += 1
+            end = self._nnz + len(ids)
+            for name in ("_rows", "_terms", "_counts"):
+                self._grow(name, end)
+            self._rows[self._nnz:end] = row
+            self._terms[self._nnz:end] = ids
+            self._counts[self._nnz:end] = list(counts.values())
+            self._nnz = end
+        return self
+
+    def update(self, text: str):
+        """
+        Feeds the full transcript so far. If it extends the previous text, only
+        the new part is tokenized; otherwise the state is rebuilt.
+        """
+        if not text.startswith(self._text):
+            self.reset()
+        delta = text[len(self._text):]
+        self._text = text
+        parts = SENTENCE_SPLIT.split(self._tail + delta)
+        self._tail = parts[-1]
+        self.add_sentences(parts[:-1])
+        return self
+
+    # ---------------------------
+    # QUERY
+    # ---------------------------
+    def _matrix(self):
+        """
+        Sparse term counts of every sentence, tail included.
+
+        Returns:
+            tuple: (rows, terms, counts, df, n) - one (row, term, count) triplet per nnz, in row order.
+        """
+        rows, terms, counts = self._rows[:self._nnz], self._terms[:self._nnz], self._counts[:self._nnz]
+        df = self._df[:len(self.vocab)].astype(np.float64)
+        n = len(self.sentences)
+
+        tail = self._tail.strip() if self.strip else self._tail
+        tail_counts = self._tokenize(tail) if (tail or not self.strip) else None
+        if tail_counts is not None:
+            n += 1
+            tail_ids = [self.vocab.get(t, -1) for t in tail_counts]
+            new_terms = sum(1 for i in tail_ids if i < 0)
+            df = np.concatenate((df, np.zeros(new_terms)))
+            next_id = len(self.vocab)
+            for j, tid in enumerate(tail_ids):
+                if tid < 0:
+                    tail_ids[j], next_id = next_id, next_id + 1
+            tail_ids = np.array(tail_ids, dtype=np.int64)
+            df[tail_ids] += 1
+            rows = np.concatenate((rows, np.full(len(tail_ids), n - 1)))
+            terms = np.concatenate((terms, tail_ids))
+            counts = np.concatenate((counts, np.fromiter(tail_counts.values(), float, len(tail_counts))))
+        return rows, terms, counts, df, n
+
+    def scores(self) -> np.ndarray:
+        """Sum of l2-normalized TF-IDF weights per sentence (tail included)."""
+        rows, terms, counts, df, n = self._matrix()
+        idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+        w = counts * idf[terms]
+        num = np.bincount(rows, weights=w, minlength=n)
+        den = np.sqrt(np.bincount(rows, weights=w * w, minlength=n))
+        return np.divide(num, den, out=np.zeros(n), where=den > 0)
+
+    def select(self, num_sentences: int):
+        """Indices of the sentences that make up the summary."""
+        return np.argsort(self.scores())[::-1][:num_sentences]
+
+    def all_sentences(self):
+        tail = self._tail.strip() if self.strip else self._tail
+        return self.sentences + ([tail] if (tail or not self.strip) else [])
+
+    def summary(self, num_sentences: int = 3) -> str:
+        """Top-k sentences in transcript order (the whole text if it is short)."""
+        key = (self._generation, len(self._text), num_sentences)
+        if self._cache and self._cache[0] == key:
+            return self._cache[1]
+        sentences = self.all_sentences()
+        if len(sentences) <= num_sentences:
+            result = self._text
+        else:
+            idx = self.select(num_sentences)
+            result = " ".join(sentences[i] for i in sorted(idx))
+        self._cache = (key, result)
+        return result
@@ -0,0 +1,147 @@
+# tracing.py
+"""
+Tracing Module
+--------------
+Lightweight per-stage spans for the pipeline and the Streamlit apps.
+
+Each span records wall time, process CPU time, the change in current
+RSS between entry and exit (rss_delta_mb; memory a stage frees again, or
+other threads' allocations in between, are not separated out) and an
+optional input size. Spans are only recorded inside a `collect()` block
+(or when TRACE=1 is set); otherwise `span()` hands back a shared no-op
+context manager, so instrumented code costs one ContextVar lookup.
+
+The active collector lives in a ContextVar, which new threads do not
+inherit: work handed to a thread pool or dispatcher thread is submitted
+through contextvars.copy_context().run so its spans reach the caller's
+collect() block.
+
+Usage:
+    from tracing import collect, span, write_jsonl
+    with collect() as spans:
+        with span("transcribe", input_size=len(audio)):
+            ...
+    write_jsonl(spans, "session.trace.jsonl")
+"""
+
+import contextvars
+import json
+import os
+import time
+
+_collector = contextvars.ContextVar("trace_collector", default=None)
+_parent = contextvars.ContextVar("trace_parent", default=None)
+_GLOBAL = []  # used when TRACE=1 and no collect() block is active
+_ENV_ENABLED = os.environ.get("TRACE", "") not in ("", "0")
+
+
+def _rss_bytes() -> int:
+    """Current resident set size: /proc on Linux, psutil (through the model registry) elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        from model_registry import _rss_bytes as rss_bytes
+        return rss_bytes()
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    """One timed stage; use through span()."""
+
+    def __init__(self, sink, name, input_size, attrs):
+        self.sink = sink
+        self.record = {"name": name, "input_size": input_size, **attrs}
+
+    def set(self, **attrs):
+        """Adds attributes discovered while the stage runs (e.g. output size, cache hit)."""
+        self.record.update(attrs)
+
+    def __enter__(self):
+        self.record["parent"] = _parent.get()
+        self.record["id"] = f"{id(self):x}"
+        self._token = _parent.set(self.record["id"])
+        self._rss = _rss_bytes()
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+        self.record["start"] = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.record["wall_s"] = round(time.perf_counter() - self._wall, 6)
+        self.record["cpu_s"] = round(time.process_time() - self._cpu, 6)
+        self.record["rss_delta_mb"] = round((_rss_bytes() - self._rss) / (1024 * 1024), 3)
+        if exc_type is not None:
+            self.record["error"] = f"{exc_type.__name__}: {exc}"
+        _parent.reset(self._token)
+        self.sink.append(self.record)
+        return False
+
+
+def span(name: str, input_size=None, **attrs):
+    """Context manager timing one stage (a no-op unless tracing is active)."""
+    sink = _collector.get()
+    if sink is None:
+        if not _ENV_ENABLED:
+            return _NOOP
+        sink = _GLOBAL
+    return Span(sink, name, input_size, attrs)
+
+
+class collect:
+    """Records every span opened in this context (thread / Streamlit session) into a list."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.spans = []
+
+    def __enter__(self):
+        self._token = _collector.set(self.spans if self.enabled else None)
+        return self.spans
+
+    def __exit__(self, *exc):
+        _collector.reset(self._token)
+        return False
+
+
+def global_spans():
+    """Spans recorded outside collect() while TRACE=1."""
+    return list(_GLOBAL)
+
+
+def write_jsonl(spans, path: str):
+    """Appends spans to a JSON-lines file."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for record in spans:
+            f.write(json.dumps(record, default=str) + "\n")
+
+
+def read_jsonl(path: str):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize_spans(spans):
+    """Rows for a timing table, in start order."""
+    return [
+        {"stage": s["name"], "wall_s": s.get("wall_s"), "cpu_s": s.get("cpu_s"),
+         "rss_delta_mb": s.get("rss_delta_mb"), "input_size": s.get("input_size"),
+         **({"error": s["error"]} if "error" in s else {})}
+        for s in sorted(spans, key=lambda s: s.get("start", 0))
+    ]
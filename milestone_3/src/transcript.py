@@ -0,0 +1,315 @@
+# transcript.py
+"""
+Transcript Module
+-----------------
+Columnar container for aligned transcripts.
+
+A WhisperX result is a list of segment dicts, each holding a list of word
+dicts; a three-hour meeting is hundreds of thousands of small objects.
+Transcript keeps the same information in a handful of NumPy arrays:
+
+    rows (words)   start, end (float32), speaker (int16, -1 = unknown),
+                   confidence (float32, NaN = none), text offsets (int64)
+    segments       row ranges, start, end, speaker
+    text           one UTF-8 buffer; every row's text is followed by a space,
+                   so any contiguous row range decodes to its plain text in one step
+
+Time-range slices are two binary searches and share every array with the
+parent; per-speaker views hold an index range into one stable argsort.
+Transcripts save to and memory-map from a small binary format (.trn).
+
+Usage:
+    t = Transcript.from_whisperx(result_aligned)
+    t.to_txt("transcript_with_speakers.txt")
+    part = t.slice_time(60, 120)
+    for start, end, speaker, text in part.segments(): ...
+    t.save("meeting.trn"); t = Transcript.load("meeting.trn")
+"""
+
+import json
+import os
+
+import numpy as np
+
+UNKNOWN = "Unknown"
+MAGIC = b"TRNS1\n"
+_ALIGN = 64
+_FIELDS = ("start", "end", "speaker", "confidence", "offsets", "buf",
+           "seg_rows", "seg_start", "seg_end", "seg_speaker")
+
+
+class Transcript:
+    """
+    Args:
+        start, end, speaker, confidence: Per-row arrays (rows are words, or whole
+            segments when no word timing exists).
+        offsets (np.ndarray): n_rows + 1 byte offsets into buf.
+        buf (np.ndarray): uint8 UTF-8 text, each row followed by one space.
+        seg_rows (np.ndarray): n_segments + 1 row offsets.
+        seg_start, seg_end, seg_speaker: Per-segment arrays.
+        speakers (list[str]): Speaker names indexed by speaker id.
+    """
+
+    def __init__(self, start, end, speaker, confidence, offsets, buf,
+                 seg_rows, seg_start, seg_end, seg_speaker, speakers=()):
+        self.start, self.end, self.speaker, self.confidence = start, end, speaker, confidence
+        self.offsets, self.buf = offsets, buf
+        self.seg_rows, self.seg_start, self.seg_end, self.seg_speaker = seg_rows, seg_start, seg_end, seg_speaker
+        self.speakers = list(speakers)
+        self.language = None
+        self._end_max = None
+        self._by_speaker = None
+
+    # ---------------------------
+    # BUILD
+    # ---------------------------
+    @classmethod
+    def from_whisperx(cls, result):
+        """Builds from a WhisperX-style dict (or a bare segment list) in one pass."""
+        segments = result.get("segments", []) if isinstance(result, dict) else result
+        speakers = {}
+        starts, ends, spk, conf, pieces = [], [], [], [], []
+        seg_rows, seg_start, seg_end, seg_spk = [0], [], [], []
+        last = 0.0
+        for seg in segments:
+            words = [w for w in (seg.get("words") or []) if str(w.get("word", "")).strip()]
+            if not words:
+                words = [{"word": seg.get("text", ""), "start": seg.get("start"), "end": seg.get("end"),
+                          "speaker": seg.get("speaker")}]
+            for w in words:
+                s = w.get("start")
+                s = last if s is None else s  # untimed tokens (numbers, symbols) inherit the previous time
+                e = w.get("end")
+                e = s if e is None else e
+                last = e
+                starts.append(s)
+                ends.append(e)
+                name = w.get("speaker") or seg.get("speaker")
+                spk.append(speakers.setdefault(name, len(speakers)) if name else -1)
+                conf.append(w.get("score", np.nan))
+                pieces.append(str(w.get("word", "")).strip())
+            seg_rows.append(len(starts))
+            seg_start.append(seg.get("start", starts[seg_rows[-2]]))
+            seg_end.append(seg.get("end", ends[-1]))
+            name = seg.get("speaker")
+            seg_spk.append(speakers.setdefault(name, len(speakers)) if name else -1)
+
+        encoded = [p.encode("utf-8") for p in pieces]
+        lengths = np.fromiter((len(b) + 1 for b in encoded), dtype=np.int64, count=len(encoded))
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        buf = np.frombuffer(b"".join(b + b" " for b in encoded), dtype=np.uint8)
+        return cls(
+            np.asarray(starts, np.float32), np.asarray(ends, np.float32), np.asarray(spk, np.int16),
+            np.asarray(conf, np.float32), offsets, buf,
+            np.asarray(seg_rows, np.int64), np.asarray(seg_start, np.float32),
+            np.asarray(seg_end, np.float32), np.asarray(seg_spk, np.int16),
+            [name for name, _ in sorted(speakers.items(), key=lambda kv: kv[1])],
+        )
+
+    # ---------------------------
+    # ACCESS
+    # ---------------------------
+    def __len__(self):
+        return len(self.start)
+
+    @property
+    def n_segments(self) -> int:
+        return len(self.seg_start)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, f).nbytes for f in _FIELDS)
+
+    def speaker_name(self, speaker_id: int) -> str:
+        return self.speakers[speaker_id] if speaker_id >= 0 else UNKNOWN
+
+    def _text(self, row_from: int, row_to: int) -> str:
+        if row_to <= row_from:
+            return ""
+        return self.buf[self.offsets[row_from]:self.offsets[row_to] - 1].tobytes().decode("utf-8")
+
+    def word_text(self, i: int) -> str:
+        return self._text(i, i + 1)
+
+    def segment_text(self, j: int) -> str:
+        return self._text(int(self.seg_rows[j]), int(self.seg_rows[j + 1]))
+
+    def plain_text(self) -> str:
+        """All rows joined by single spaces (one decode, no per-row work)."""
+        return self._text(0, len(self))
+
+    def segments(self):
+        """Yields (start, end, speaker, text) per segment."""
+        names = [self.speaker_name(int(s)) for s in self.seg_speaker]
+        rows = self.seg_rows.tolist()
+        for j, (s, e) in enumerate(zip(self.seg_start.tolist(), self.seg_end.tolist())):
+            yield s, e, names[j], self._text(rows[j], rows[j + 1])
+
+    def words(self):
+        """Yields (start, end, speaker, confidence, text) per row."""
+        text = self.buf[self.offsets[0]:self.offsets[-1]].tobytes() if len(self) else b""
+        rel = (self.offsets - self.offsets[0]).tolist()
+        names = [self.speaker_name(i) for i in range(len(self.speakers))] + [UNKNOWN]
+        for i, (s, e, sp, c) in enumerate(zip(self.start.tolist(), self.end.tolist(),
+                                             self.speaker.tolist(), self.confidence.tolist())):
+            yield s, e, names[sp], c, text[rel[i]:rel[i + 1] - 1].decode("utf-8")
+
+    # ---------------------------
+    # VIEWS
+    # ---------------------------
+    def slice_time(self, t0: float, t1: float) -> "Transcript":
+        """
+        Rows overlapping [t0, t1), found with two binary searches.
+
+        The row arrays of the result are views into this transcript; only the
+        (small) per-segment arrays of the touched segments are copied.
+        """
+        if self._end_max is None:
+            self._end_max = np.maximum.accumulate(self.end) if len(self) else self.end
+        # float32 keys: a float64 key would make NumPy cast the whole column first
+        i0 = int(np.searchsorted(self._end_max, np.float32(t0), side="right"))
+        i1 = max(i0, int(np.searchsorted(self.start, np.float32(t1), side="left")))
+        j0 = max(0, int(np.searchsorted(self.seg_rows, i0, side="right")) - 1)
+        j1 = max(j0, int(np.searchsorted(self.seg_rows, i1, side="left")))
+        seg_rows = np.clip(self.seg_rows[j0:j1 + 1], i0, i1) - i0
+        if i1 == i0:
+            seg_rows, j1 = np.zeros(1, np.int64), j0
+        return Transcript(
+            self.start[i0:i1], self.end[i0:i1], self.speaker[i0:i1], self.confidence[i0:i1],
+            self.offsets[i0:i1 + 1], self.buf, seg_rows,
+            self.seg_start[j0:j1], self.seg_end[j0:j1], self.seg_speaker[j0:j1], self.speakers,
+        )
+
+    def speaker_view(self, speaker) -> "SpeakerView":
+        """Rows of one speaker (name or id) as an index view into a shared stable argsort."""
+        if self._by_speaker is None:
+            order = np.argsort(self.speaker, kind="stable")
+            bounds = np.searchsorted(self.speaker[order], np.arange(-1, len(self.speakers) + 1))
+            self._by_speaker = (order, bounds)
+        if isinstance(speaker, str):
+            sid = -1 if speaker == UNKNOWN else self.speakers.index(speaker)
+        else:
+            sid = int(speaker)
+        order, bounds = self._by_speaker
+        return SpeakerView(self, order[bounds[sid + 1]:bounds[sid + 2]], self.speaker_name(sid))
+
+    def talk_time(self) -> dict:
+        """Seconds of speech per speaker."""
+        dur = np.bincount(self.speaker.astype(np.int64) + 1, weights=self.end - self.start,
+                          minlength=len(self.speakers) + 1)
+        return {self.speaker_name(i - 1): round(float(d), 3) for i, d in enumerate(dur) if d > 0}
+
+    # ---------------------------
+    # EXPORT
+    # ---------------------------
+    def to_txt(self, path: str, speakers: bool = True):
+        """One '[start - end] SPEAKER: text' line per segment (speaker omitted with speakers=False)."""
+        lines = [f"[{s:.2f} - {e:.2f}] {name}: {text}\n" if speakers else f"[{s:.2f} - {e:.2f}] {text}\n"
+                 for s, e, name, text in self.segments()]
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("".join(lines))
+
+    def to_dict(self) -> dict:
+        """Columnar, JSON-ready form (lists, no per-word dicts)."""
+        # Times as integer milliseconds and confidence in 1/1000 (-1 = none): ints serialize several times faster than floats
+        ms = lambda a: np.round(a.astype(np.float64) * 1000).astype(np.int64).tolist()
+        conf = np.where(np.isnan(self.confidence), -1, np.round(self.confidence * 1000)).astype(np.int64)
+        text = self.plain_text()
+        return {
+            "speakers": self.speakers,
+            "start_ms": ms(self.start), "end_ms": ms(self.end),
+            "speaker": self.speaker.tolist(),
+            "confidence_permille": conf.tolist(),
+            "words": text.split(" ") if text else [],
+            "segment_rows": self.seg_rows.tolist(),
+            "segment_start_ms": ms(self.seg_start), "segment_end_ms": ms(self.seg_end),
+            "segment_speaker": self.seg_speaker.tolist(),
+        }
+
+    def to_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.to_dict(), ensure_ascii=False))
+
+    def to_whisperx(self) -> dict:
+        """Back to the list-of-dict shape for code that still needs it."""
+        segments = []
+        rows = self.seg_rows.tolist()
+        words = list(self.words())
+        for j, (s, e, name, text) in enumerate(self.segments()):
+            seg = {"start": s, "end": e, "text": text, "speaker": name,
+                   "words": [{"word": w[4], "start": w[0], "end": w[1], "speaker": w[2]}
+                             for w in words[rows[j]:rows[j + 1]]]}
+            segments.append(seg)
+        return {"segments": segments}
+
+    def save(self, path: str):
+        """Binary format: magic, header length, JSON header, then 64-byte aligned raw arrays."""
+        fields, blobs, pos = {}, [], 0
+        base = int(self.offsets[0]) if len(self.offsets) else 0
+        arrays = {f: getattr(self, f) for f in _FIELDS}
+        # Views may point into a larger parent: store just the referenced text and rebased offsets.
+        arrays["buf"] = self.buf[base:int(self.offsets[-1])] if len(self.offsets) else self.buf[:0]
+        arrays["offsets"] = self.offsets - base
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            pad = (-pos) % _ALIGN
+            blobs.append(b"\0" * pad + arr.tobytes())
+            pos += pad
+            fields[name] = [arr.dtype.str, list(arr.shape), pos]
+            pos += arr.nbytes
+        header = json.dumps({"fields": fields, "speakers": self.speakers}).encode("utf-8")
+        header_len = len(MAGIC) + 8 + len(header)
+        header += b" " * ((-header_len) % _ALIGN)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + len(header).to_bytes(8, "little") + header)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "Transcript":
+        """Opens a .trn file; with mmap=True the arrays are read-only views onto the file."""
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a transcript file: {path}")
+            header_len = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_len))
+        data_start = len(MAGIC) + 8 + header_len
+        raw = np.memmap(path, dtype=np.uint8, mode="r") if mmap else np.fromfile(path, dtype=np.uint8)
+        arrays = {}
+        for name, (dtype, shape, offset) in header["fields"].items():
+            dt = np.dtype(dtype)
+            count = int(np.prod(shape))
+            start = data_start + offset
+            arrays[name] = raw[start:start + count * dt.itemsize].view(dt).reshape(shape)
+        return cls(**arrays, speakers=header["speakers"])
+
+
+class SpeakerView:
+    """One speaker's rows of a Transcript: `rows` is a slice of the parent's shared argsort."""
+
+    def __init__(self, parent: Transcript, rows: np.ndarray, name: str):
+        self.parent, self.rows, self.name = parent, rows, name
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def start(self):
+        return self.parent.start[self.rows]
+
+    @property
+    def end(self):
+        return self.parent.end[self.rows]
+
+    @property
+    def confidence(self):
+        return self.parent.confidence[self.rows]
+
+    def talk_time(self) -> float:
+        return float((self.end - self.start).sum())
+
+    def texts(self):
+        return [self.parent.word_text(int(i)) for i in self.rows]
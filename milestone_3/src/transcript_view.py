@@ -0,0 +1,182 @@
+# transcript_view.py
+"""
+Transcript View Module
+----------------------
+Append-only, windowed transcript display for the Streamlit apps.
+
+A full transcript in st.text_area (or one st.markdown per segment) is
+serialized and sent to the browser again on every rerun, so with a
+multi-hour meeting each click costs megabytes. Instead:
+
+1. TranscriptFeed keeps the transcript as display lines in fixed-size
+   blocks. sync_text() / sync_segments() only process what was appended
+   since the last call; a full block is rendered to markdown once and never
+   changes again.
+2. draw_transcript() emits only a window of `window` blocks (the newest by
+   default, or any position picked with the slider) in a fixed-height
+   scroll box, so what goes to the browser per rerun is bounded by the
+   window, not the meeting length.
+3. transcript_view() runs that inside its own st.fragment: scrolling,
+   "follow latest" and live refreshes rerun only the fragment, and the rest
+   of the page never re-serializes the transcript.
+
+Usage:
+    feed = session_feed("transcript")
+    feed.sync_text(st.session_state.transcription)
+    transcript_view(feed, "transcript")
+"""
+
+import re
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+MARKDOWN_SPECIAL = re.compile(r"([\\`*_{}\[\]<>#|$~])")
+
+
+def escape_markdown(text: str) -> str:
+    return MARKDOWN_SPECIAL.sub(r"\\\1", text)
+
+
+def format_time(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class TranscriptFeed:
+    """
+    Display lines of a growing transcript, in blocks of `block_lines`.
+
+    Args:
+        block_lines (int): Lines per block (the unit of rendering and windowing).
+        line_chars (int): Unpunctuated text is wrapped into lines of about this many characters.
+    """
+
+    def __init__(self, block_lines: int = 50, line_chars: int = 300):
+        self.block_lines = block_lines
+        self.line_chars = line_chars
+        self.reset()
+
+    def reset(self, source=None):
+        self.source = source   # what sync_segments() last read from
+        self.lines = []
+        self._text = ""        # text consumed by sync_text()
+        self._tail = ""        # unfinished last sentence (shown, not yet a line)
+        self._seen = 0         # segments consumed by sync_segments()
+        self._rendered = []    # markdown of the full blocks
+
+    def __len__(self):
+        return len(self.lines) + bool(self._tail.strip())
+
+    # ---------------------------
+    # APPEND
+    # ---------------------------
+    def sync_text(self, text: str):
+        """Follows a growing plain-text transcript; only the new suffix is split into lines."""
+        text = text or ""
+        if self.source is not None or not text.startswith(self._text):
+            self.reset()
+        parts = SENTENCE_END.split(self._tail + text[len(self._text):])
+        self._text = text
+        self._tail = parts.pop()
+        while len(self._tail) > self.line_chars:  # no punctuation (live STT): wrap at a space
+            cut = self._tail.rfind(" ", 0, self.line_chars)
+            cut = cut if cut > 0 else self.line_chars
+            parts.append(self._tail[:cut])
+            self._tail = self._tail[cut:].lstrip()
+        self.lines.extend(escape_markdown(p.strip()) for p in parts if p.strip())
+        return self
+
+    def sync_segments(self, segments, source):
+        """
+        Follows a growing segment list. `source` identifies the transcript: a
+        different one starts over, the same one only appends segments[seen:].
+
+        Segments are dicts ({"start", "end", "text"[, "speaker"]}) or
+        (start, end, speaker, text) tuples.
+        """
+        if source != self.source:
+            self.reset(source)
+        for seg in segments[self._seen:]:
+            if isinstance(seg, dict):
+                start, speaker, text = seg.get("start"), seg.get("speaker"), seg.get("text", "")
+            else:
+                start, _, speaker, text = seg
+            line = escape_markdown(str(text).strip())
+            if speaker:
+                line = f"🗣️ **{escape_markdown(str(speaker))}** {line}"
+            if start is not None:
+                line = f"`{format_time(start)}` {line}"
+            self.lines.append(line)
+        self._seen = len(segments)
+        return self
+
+    # ---------------------------
+    # BLOCKS
+    # ---------------------------
+    @property
+    def n_blocks(self) -> int:
+        return -(-len(self) // self.block_lines)
+
+    def block(self, i: int) -> str:
+        """Markdown of block i; full blocks are rendered once, the last one each time."""
+        n = self.block_lines
+        while len(self._rendered) < len(self.lines) // n:
+            j = len(self._rendered)
+            self._rendered.append("  \n".join(self.lines[j * n:(j + 1) * n]))
+        if i < len(self._rendered):
+            return self._rendered[i]
+        lines = self.lines[i * n:(i + 1) * n]
+        if self._tail.strip():
+            lines = lines + [escape_markdown(self._tail.strip())]
+        return "  \n".join(lines)
+
+
+# ---------------------------
+# STREAMLIT
+# ---------------------------
+def session_feed(key: str, **kwargs) -> TranscriptFeed:
+    """The session's feed for `key` (created on first use)."""
+    import streamlit as st
+    name = f"{key}_feed"
+    if name not in st.session_state:
+        st.session_state[name] = TranscriptFeed(**kwargs)
+    return st.session_state[name]
+
+
+def draw_transcript(feed: TranscriptFeed, key: str, height: int = 300, window: int = 4):
+    """Draws `window` blocks of the feed (the newest while "Follow latest" is on)."""
+    import streamlit as st
+    n = feed.n_blocks
+    if n == 0:
+        st.caption("No transcript yet.")
+        return
+    last = max(0, n - window)
+    first = last
+    if n > window:
+        c1, c2 = st.columns([1, 3])
+        follow = c1.toggle("Follow latest", value=True, key=f"{key}_follow")
+        pos = c2.slider("Position", 0, last, last, key=f"{key}_pos", disabled=follow, label_visibility="collapsed")
+        first = last if follow else min(pos, last)
+    with st.container(height=height):
+        for i in range(first, min(n, first + window)):
+            st.markdown(feed.block(i))
+    shown_from = first * feed.block_lines + 1
+    st.caption(f"Lines {shown_from}–{min(len(feed), (first + window) * feed.block_lines)} of {len(feed)}")
+
+
+def transcript_view(feed: TranscriptFeed, key: str, source=None, run_every=None, height: int = 300, window: int = 4):
+    """
+    draw_transcript() in an isolated fragment.
+
+    Args:
+        source (callable): Optional source(feed) run at the start of every fragment run
+            (e.g. feed.sync_text(worker.text) for a live recording).
+        run_every (float): Refresh period in seconds for live transcripts (None = on interaction only).
+    """
+    import streamlit as st
+
+    @st.fragment(run_every=run_every)
+    def view():
+        if source is not None:
+            source(feed)
+        draw_transcript(feed, key, height, window)
+    view()
@@ -0,0 +1,209 @@
+# whisper_longform.py
+"""
+Whisper Long-Form Module
+------------------------
+Full-file decoding for openai-whisper models. whisper.pad_or_trim() plus a
+single decode only ever sees the first 30 seconds; this decodes the whole
+recording.
+
+1. The log-mel spectrogram is computed once for the whole file (plus 30 s
+   of padding, as whisper.transcribe does), from the canonical PCM
+   (ingest.py).
+2. 30-second windows are strided views into that one tensor
+   (Tensor.unfold): stride = 30 s - overlap, nothing is copied or
+   recomputed per window.
+3. The language is detected once, on the first window that contains speech.
+4. Windows are decoded `batch_size` at a time with timestamp tokens on.
+5. Timestamp tokens place every segment on the file timeline; in the
+   overlap between two windows each window keeps the segments whose midpoint
+   falls on its side of the overlap centre, so a sentence cut at a window
+   edge comes from the window that heard it whole.
+
+Usage:
+    model = whisper.load_model("turbo")
+    result = transcribe_full(model, "clean.wav", overlap_seconds=5, batch_size=8)
+    print(result["language"], result["text"])
+"""
+
+import numpy as np
+
+from ingest import load_audio
+
+SAMPLE_RATE = 16000
+FRAMES_PER_SECOND = 100       # log-mel hop of 160 samples
+WINDOW_SECONDS = 30
+WINDOW_FRAMES = WINDOW_SECONDS * FRAMES_PER_SECOND
+TIME_PRECISION = 0.02         # seconds per timestamp token
+
+
+# ---------------------------
+# FEATURES
+# ---------------------------
+def log_mel(audio: np.ndarray, n_mels: int, device=None):
+    """Log-mel spectrogram of the whole recording with 30 s of trailing padding: (n_mels, frames + 3000)."""
+    import torch
+    import whisper
+    samples = torch.from_numpy(np.ascontiguousarray(audio, dtype=np.float32))
+    return whisper.log_mel_spectrogram(samples, n_mels=n_mels, padding=WINDOW_SECONDS * SAMPLE_RATE, device=device)
+
+
+def window_starts(content_frames: int, overlap_seconds: float) -> list:
+    """First frame of every 30 s window needed to cover `content_frames` frames."""
+    stride, starts = window_stride(overlap_seconds), [0]
+    while starts[-1] + WINDOW_FRAMES < content_frames:
+        starts.append(starts[-1] + stride)
+    return starts
+
+
+def window_stride(overlap_seconds: float) -> int:
+    overlap = int(round(overlap_seconds * FRAMES_PER_SECOND))
+    if not 0 <= overlap < WINDOW_FRAMES:
+        raise ValueError(f"overlap must be in [0, {WINDOW_SECONDS}) seconds, got {overlap_seconds}")
+    return WINDOW_FRAMES - overlap
+
+
+def window_views(mel, content_frames: int, overlap_seconds: float):
+    """
+    Zero-copy 30 s windows over a padded spectrogram.
+
+    Returns:
+        tuple[Tensor, list[int]]: (n_windows, n_mels, 3000) strided view, window start frames.
+    """
+    starts = window_starts(content_frames, overlap_seconds)
+    views = mel.unfold(1, WINDOW_FRAMES, window_stride(overlap_seconds)).transpose(0, 1)
+    return views[:len(starts)], starts
+
+
+def first_speech_window(audio: np.ndarray, starts: list, threshold: float = 0.01) -> int:
+    """Index of the first window whose audio RMS reaches `threshold` (0 when none does)."""
+    span = WINDOW_SECONDS * SAMPLE_RATE
+    for i, start in enumerate(starts):
+        a = start * SAMPLE_RATE // FRAMES_PER_SECOND
+        chunk = np.asarray(audio[a:a + span], dtype=np.float32)
+        if chunk.size and float(np.sqrt(np.mean(chunk * chunk))) >= threshold:
+            return i
+    return 0
+
+
+# ---------------------------
+# TIMESTAMPS / MERGE
+# ---------------------------
+def parse_segments(tokens, timestamp_begin: int, eot: int, decode, offset: float,
+                   window_end: float = WINDOW_SECONDS) -> list:
+    """
+    Splits one window's tokens into segments at timestamp tokens.
+
+    Args:
+        tokens (list[int]): Decoded tokens (text and timestamp tokens).
+        timestamp_begin (int): Id of <|0.00|>; higher ids are timestamps.
+        eot (int): End-of-text id (decoding stops there).
+        decode (callable): Text tokens -> str.
+        offset (float): Window start in seconds (added to every time).
+        window_end (float): Window-relative end for trailing text without a closing timestamp.
+
+    Returns:
+        list[dict]: {"start", "end", "text"} in file time.
+    """
+    segments, start, text = [], None, []
+    for t in tokens:
+        if t == eot:
+            break
+        if t >= timestamp_begin:
+            time = (t - timestamp_begin) * TIME_PRECISION
+            if text:
+                segments.append({"start": offset + (start if start is not None else 0.0), "end": offset + time,
+                                 "text": decode(text).strip()})
+                text, start = [], None
+            else:
+                start = time  # opening timestamp (or a repeated one)
+        else:
+            text.append(t)
+    if text:
+        segments.append({"start": offset + (start if start is not None else 0.0), "end": offset + window_end,
+                         "text": decode(text).strip()})
+    return [s for s in segments if s["text"]]
+
+
+def merge_windows(window_segments: list, starts: list, overlap_seconds: float) -> list:
+    """
+    Joins per-window segments (already in file time) into one timeline.
+
+    In each overlap the cut is the overlap centre: window i keeps segments whose
+    midpoint is before it, window i + 1 the ones at or after it. A segment a
+    window cut off at its edge runs to the window end, so its midpoint lands
+    past the cut whenever the next window heard it from the start.
+    """
+    bounds = []
+    for i, start in enumerate(starts):
+        lo = -np.inf if i == 0 else start / FRAMES_PER_SECOND + overlap_seconds / 2
+        hi = np.inf if i == len(starts) - 1 else starts[i + 1] / FRAMES_PER_SECOND + overlap_seconds / 2
+        bounds.append((lo, hi))
+    merged = []
+    for (lo, hi), segments in zip(bounds, window_segments):
+        for s in segments:
+            mid = (s["start"] + s["end"]) / 2
+            if lo <= mid < hi:
+                merged.append({"start": round(s["start"], 2), "end": round(s["end"], 2), "text": s["text"]})
+    return merged
+
+
+# ---------------------------
+# DECODE
+# ---------------------------
+def transcribe_full(model, audio, overlap_seconds: float = 5.0, batch_size: int = 8, language: str = None,
+                    no_speech_threshold: float = 0.6, logprob_threshold: float = -1.0, verbose: bool = False) -> dict:
+    """
+    Transcribes a whole recording with an openai-whisper model.
+
+    Args:
+        model: whisper.load_model(...) result.
+        audio (str | np.ndarray): Path, or 16 kHz mono float32 samples.
+        overlap_seconds (float): Overlap between consecutive 30 s windows.
+        batch_size (int): Windows per decode call.
+        language (str): Skip detection and decode in this language.
+        no_speech_threshold (float): Windows above this no-speech probability (and below
+            logprob_threshold average log-probability) are dropped as silence, as in whisper.transcribe.
+
+    Returns:
+        dict: {"text", "segments", "language", "duration", "windows"}
+    """
+    import whisper
+    from whisper.tokenizer import get_tokenizer
+
+    samples = load_audio(audio) if isinstance(audio, str) else np.asarray(audio, dtype=np.float32)
+    content_frames = len(samples) // (SAMPLE_RATE // FRAMES_PER_SECOND)
+    mel = log_mel(samples, model.dims.n_mels, model.device)
+    views, starts = window_views(mel, content_frames, overlap_seconds)
+
+    if language is None:
+        first = first_speech_window(samples, starts)
+        _, probs = model.detect_language(views[first])
+        language = max(probs, key=probs.get)
+        if verbose:
+            print(f"🌐 Detected language: {language} (window {first + 1}/{len(starts)})")
+
+    tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages, language=language,
+                              task="transcribe")
+    options = whisper.DecodingOptions(language=language, without_timestamps=False,
+                                      fp16=model.device.type != "cpu")
+    duration = len(samples) / SAMPLE_RATE
+    window_segments = []
+    for b in range(0, len(starts), batch_size):
+        results = whisper.decode(model, views[b:b + batch_size], options)
+        for i, r in enumerate(results, b):
+            offset = starts[i] / FRAMES_PER_SECOND
+            silent = r.no_speech_prob > no_speech_threshold and r.avg_logprob < logprob_threshold
+            window_segments.append([] if silent else parse_segments(
+                r.tokens, tokenizer.timestamp_begin, tokenizer.eot, tokenizer.decode, offset,
+                min(WINDOW_SECONDS, duration - offset)))
+        if verbose:
+            print(f"🔹 Decoded windows {min(b + batch_size, len(starts))}/{len(starts)}")
+
+    segments = merge_windows(window_segments, starts, overlap_seconds)
+    return {
+        "text": " ".join(s["text"] for s in segments),
+        "segments": segments,
+        "language": language,
+        "duration": duration,
+        "windows": len(starts),
+    }